@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parents[1] / "lambdas"
+sys.path.insert(0, str(LAMBDA_DIR))
+
+from vela_common import codec  # noqa: E402
+from vela_common import dynamo  # noqa: E402
+from bench_dynamo import SAMPLE_ITEMS  # noqa: E402
+
+SIZES = (1000, 10000)
+ORJSON = codec.orjson
+
+
+def decimal_default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError
+
+
+def wire_page(size: int):
+    item = SAMPLE_ITEMS["recommendation"]
+    return [dynamo.to_item({**item, "spotId": f"spot-{i}", "lat": Decimal(f"{i % 180 - 90}.{i:04d}")}) for i in range(size)]
+
+
+def before(wire):
+    """Decimals from the deserializer, then json.dumps with a per-number callback."""
+    return json.dumps({"items": [dynamo.from_item(item) for item in wire]}, default=decimal_default)
+
+
+def after(wire):
+    """JSON numbers straight from the deserializer, then codec.dumps."""
+    return codec.dumps({"items": [dynamo.from_item(item, codec.number) for item in wire]})
+
+
+def encode_before(body):
+    return json.dumps(body, default=decimal_default)
+
+
+def encode_after(body):
+    return codec.dumps(body)
+
+
+def snapshot_before(body):
+    """The snapshot encoding before the codec."""
+    return json.dumps(body, default=decimal_default, separators=(",", ":")).encode("ascii")
+
+
+def snapshot_after(body):
+    return codec.dumpb(body)
+
+
+def best_ms(function, value, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(value)
+        samples.append(time.perf_counter() - started)
+    return min(samples) * 1e3
+
+
+def use_backend(backend):
+    codec.orjson = backend
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare codec.dumps with json.dumps(default=decimal_default).")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per case (best is reported)")
+    args = parser.parse_args()
+
+    backends = {"stdlib": None}
+    if ORJSON is not None:
+        backends["orjson"] = ORJSON
+    else:
+        print("orjson not installed; timing the stdlib backend only")
+
+    # "encode" times the response body alone; "page" adds decoding the
+    # DynamoDB items, where the one-pass number conversion happens;
+    # "snapshot" is the bytes the publisher hashes and uploads.
+    # "same data" checks that each output parses to what the old
+    # json.dumps output did; the bytes differ (compact, and UTF-8 with orjson).
+    print(f"{'items':>6} {'stage':<8} {'backend':<8} {'before ms':>10} {'after ms':>9} {'speedup':>8}  same data")
+    for size in SIZES:
+        wire = wire_page(size)
+        decimal_body = {"items": [dynamo.from_item(item) for item in wire]}
+        number_body = {"items": [dynamo.from_item(item, codec.number) for item in wire]}
+        for name, backend in backends.items():
+            use_backend(backend)
+            for stage, slow_case, fast_case in (
+                ("encode", (encode_before, decimal_body), (encode_after, number_body)),
+                ("page", (before, wire), (after, wire)),
+                ("snapshot", (snapshot_before, decimal_body), (snapshot_after, number_body)),
+            ):
+                same = json.loads(slow_case[0](slow_case[1])) == json.loads(fast_case[0](fast_case[1]))
+                slow = best_ms(*slow_case, args.repeat)
+                fast = best_ms(*fast_case, args.repeat)
+                print(f"{size:>6} {stage:<8} {name:<8} {slow:>10.2f} {fast:>9.2f} {slow / fast:>7.1f}x  {same}")
+    use_backend(ORJSON)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import argparse
+import copy
+import os
+import statistics
+import subprocess
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parents[1] / "lambdas"
+sys.path.insert(0, str(LAMBDA_DIR))
+
+from vela_common import dynamo  # noqa: E402
+
+# What a cold container pays before its first request, each in a fresh interpreter.
+COLD_STARTS = {
+    "resource": 'import boto3; boto3.resource("dynamodb").Table("Recommendations")',
+    "dynamo import": 'from vela_common import dynamo; dynamo.Table("Recommendations")',
+    "dynamo client": 'from vela_common import dynamo; dynamo.Table("Recommendations"); dynamo.client()',
+    # The router and /bootstrap load several handlers into one container.
+    "resource x3": 'import boto3; [boto3.resource("dynamodb").Table("Recommendations") for _ in range(3)]',
+    "dynamo x3": 'from vela_common import dynamo; [dynamo.Table("Recommendations") for _ in range(3)]; dynamo.client()',
+}
+
+SAMPLE_ITEMS = {
+    "favorite": {
+        "userId": "3f1c2a9e-8d4b-4c1e-9b7a-2f6d5e4c3b2a",
+        "spotId": "-23.456789,-68.123456",
+        "createdAt": "2026-01-01T12:00:00+00:00",
+        "lat": Decimal("-23.456789"),
+        "lon": Decimal("-68.123456"),
+    },
+    "recommendation": {
+        "spotId": "atacama-desert",
+        "name": "Atacama Desert",
+        "type": "desert",
+        "lat": Decimal("-23.86"),
+        "lon": Decimal("-69.13"),
+        "gh": "6gkzwgjz",
+        "gh2": "6g",
+        "gh4": "6gkz",
+        "createdAt": "2026-01-01T12:00:00+00:00",
+        "updatedAt": "2026-01-01T12:00:00.000000Z",
+        "syncShard": "2026-01",
+        "data": {
+            "id": "atacama-desert",
+            "name": "Atacama Desert",
+            "country": "Chile",
+            "region": "Antofagasta",
+            "type": "desert",
+            "description": "One of the driest and darkest places on Earth. " * 4,
+            "photo_urls": [f"https://example.com/photos/{i}.jpg" for i in range(4)],
+            "coordinates": {"lat": Decimal("-23.86"), "lon": Decimal("-69.13")},
+            "bortle": 1,
+            "verified": True,
+        },
+    },
+}
+
+
+def cold_start_ms(code: str, runs: int) -> float:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(LAMBDA_DIR), os.environ.get("PYTHONPATH", "")])}
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    timer = f"import time; started = time.perf_counter(); {code}; print((time.perf_counter() - started) * 1000)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", timer], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip()))
+    return statistics.median(samples)
+
+
+def per_item_us(function, value, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function(value)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def stubbed_query_ms(table, client, wire_items, repeat: int) -> float:
+    from botocore.stub import Stubber
+
+    with Stubber(client) as stubber:
+        # The resource API converts responses in place, so each call gets its own copy.
+        for _ in range(repeat):
+            page = copy.deepcopy(wire_items)
+            stubber.add_response("query", {"Items": page, "Count": len(page), "ScannedCount": len(page)})
+        started = time.perf_counter()
+        for _ in range(repeat):
+            table.query(KeyConditionExpression="spotId = :spot", ExpressionAttributeValues={":spot": "x"})
+        return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the dynamo module with the boto3 resource API.")
+    parser.add_argument("--cold-runs", type=int, default=5, help="fresh interpreters per cold-start case")
+    parser.add_argument("--repeat", type=int, default=20000, help="marshalling iterations per item")
+    parser.add_argument("--page", type=int, default=100, help="items per stubbed query page")
+    args = parser.parse_args()
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    import boto3
+    from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+    print(f"{'cold start':<16} {'median ms':>10}")
+    for name, code in COLD_STARTS.items():
+        print(f"{name:<16} {cold_start_ms(code, args.cold_runs):>10.1f}")
+
+    serializer = TypeSerializer()
+    deserializer = TypeDeserializer()
+
+    def boto3_to_item(item):
+        return {key: serializer.serialize(value) for key, value in item.items()}
+
+    def boto3_from_item(item):
+        return {key: deserializer.deserialize(value) for key, value in item.items()}
+
+    print()
+    print(f"{'item':<16} {'op':<12} {'boto3 us':>9} {'dynamo us':>10} {'speedup':>8}  match")
+    for name, item in SAMPLE_ITEMS.items():
+        wire = boto3_to_item(item)
+        match = dynamo.to_item(item) == wire and dynamo.from_item(wire) == boto3_from_item(wire)
+        for op, theirs, ours, value in (
+            ("serialize", boto3_to_item, dynamo.to_item, item),
+            ("deserialize", boto3_from_item, dynamo.from_item, wire),
+        ):
+            slow = per_item_us(theirs, value, args.repeat)
+            fast = per_item_us(ours, value, args.repeat)
+            print(f"{name:<16} {op:<12} {slow:>9.1f} {fast:>10.1f} {slow / fast:>7.1f}x  {match}")
+
+    # A full query call minus the network: request building, response parsing
+    # and attribute conversion, with the HTTP layer replaced by a stub.
+    wire_items = [boto3_to_item({**SAMPLE_ITEMS["recommendation"], "spotId": f"spot-{i}"}) for i in range(args.page)]
+    repeat = max(1, args.repeat // (10 * args.page))
+    resource_table = boto3.resource("dynamodb").Table("Recommendations")
+    slow = stubbed_query_ms(resource_table, resource_table.meta.client, wire_items, repeat)
+    fast = stubbed_query_ms(dynamo.Table("Recommendations"), dynamo.client(), wire_items, repeat)
+    print()
+    print(f"query of {args.page} items: resource {slow:.2f} ms, dynamo {fast:.2f} ms ({slow / fast:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambdas"))
+
+import geo  # noqa: E402
+import spatial_index  # noqa: E402
+
+
+def random_spots(count: int, rng: random.Random) -> list:
+    # Mostly mid-latitude land-ish clusters plus a uniform tail, like real catalogues.
+    spots = []
+    for _ in range(count):
+        if rng.random() < 0.9:
+            spots.append((rng.uniform(20.0, 55.0), rng.uniform(-125.0, 40.0)))
+        else:
+            spots.append((rng.uniform(-90.0, 90.0), rng.uniform(-180.0, 180.0)))
+    return spots
+
+
+def brute_force(spots: list, lat: float, lon: float, k: int) -> list:
+    return sorted((geo.haversine_km(lat, lon, s_lat, s_lon), i) for i, (s_lat, s_lon) in enumerate(spots))[:k]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the nearest-spot KD-tree against brute force.")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'spots':>8} {'build ms':>9} {'kd-tree us':>11} {'brute ms':>9} {'speedup':>8}  match")
+    for size in (int(value) for value in args.sizes.split(",")):
+        spots = random_spots(size, rng)
+        queries = random_spots(args.queries, rng)
+
+        start = time.perf_counter()
+        index = spatial_index.NearestIndex(spots, list(range(size)))
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree_results = [index.nearest(lat, lon, args.k) for lat, lon in queries]
+        tree = (time.perf_counter() - start) / len(queries)
+
+        brute_queries = queries[: max(1, min(len(queries), 2_000_000 // size))]
+        start = time.perf_counter()
+        brute_results = [brute_force(spots, lat, lon, args.k) for lat, lon in brute_queries]
+        brute = (time.perf_counter() - start) / len(brute_queries)
+
+        match = all(
+            [i for _, i in got] == [i for _, i in expected]
+            for got, expected in zip(tree_results, brute_results)
+        )
+        print(f"{size:>8} {build * 1e3:>9.1f} {tree * 1e6:>11.1f} {brute * 1e3:>9.2f} {brute / tree:>7.0f}x  {match}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
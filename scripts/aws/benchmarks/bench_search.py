@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+import argparse
+import bisect
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambdas"))
+
+import search_index  # noqa: E402
+
+SYLLABLES = "ka lo mi ra ne to sa vi lu de pa ri mo na te zu ba ge fi ho".split()
+TYPES = ["desert", "mountain", "lake", "park", "island", "plateau", "beach", "forest"]
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def random_bodies(count: int, rng: random.Random) -> list:
+    countries = [word(rng).title() for _ in range(60)]
+    regions = [word(rng).title() for _ in range(400)]
+    vocabulary = [word(rng) for _ in range(5000)]
+    return [
+        {
+            "name": f"{word(rng).title()} {rng.choice(TYPES).title()}",
+            "country": rng.choice(countries),
+            "region": rng.choice(regions),
+            "type": rng.choice(TYPES),
+            "description": " ".join(rng.choice(vocabulary) for _ in range(rng.randint(10, 40))),
+        }
+        for _ in range(count)
+    ]
+
+
+class PostingStore:
+    """In-memory stand-in for the search table: sorted keys per gram, queried by prefix."""
+
+    def __init__(self, rows):
+        grams = {}
+        for row in rows:
+            grams.setdefault(row["gram"], []).append((row["key"], row["w"]))
+        self.grams = {gram: sorted(entries) for gram, entries in grams.items()}
+        self.keys = {gram: [key for key, _ in entries] for gram, entries in self.grams.items()}
+
+    def query(self, term):
+        gram = term[:search_index.GRAM_LENGTH]
+        entries = self.grams.get(gram, [])
+        keys = self.keys.get(gram, [])
+        lo = bisect.bisect_left(keys, term)
+        hi = bisect.bisect_left(keys, term + "\uffff")
+        return entries[lo:hi]
+
+
+def scan_filter(bodies: list, text: str) -> list:
+    # What clients did before: download everything and substring-match.
+    needles = search_index.query_terms(text, 5)
+    hits = []
+    for i, body in enumerate(bodies):
+        haystack = search_index.normalize(" ".join(str(body.get(field, "")) for field, _ in search_index.FIELD_WEIGHTS))
+        if all(needle in haystack for needle in needles):
+            hits.append(i)
+    return hits
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ranked prefix search over posting rows against a scan.")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'spots':>8} {'postings':>9} {'index s':>8} {'search us':>10} {'scan ms':>8} {'speedup':>8}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        bodies = random_bodies(size, rng)
+        start = time.perf_counter()
+        rows = []
+        for i, body in enumerate(bodies):
+            rows.extend(search_index.posting_rows(f"spot{i}", body))
+        store = PostingStore(rows)
+        build = time.perf_counter() - start
+
+        # Mix of one-word prefixes and two-word queries taken from real names.
+        queries = []
+        for _ in range(args.queries):
+            body = rng.choice(bodies)
+            name = body["name"].lower().split()
+            if rng.random() < 0.5:
+                queries.append(name[0][: rng.randint(3, len(name[0]))])
+            else:
+                queries.append(f"{name[0]} {body['region'].lower()[:4]}")
+
+        start = time.perf_counter()
+        for text in queries:
+            terms = search_index.query_terms(text, 5)
+            search_index.rank(terms, [store.query(term) for term in terms])
+        search = (time.perf_counter() - start) / len(queries)
+
+        scan_queries = queries[: max(1, min(len(queries), 1_000_000 // size))]
+        start = time.perf_counter()
+        for text in scan_queries:
+            scan_filter(bodies, text)
+        scan = (time.perf_counter() - start) / len(scan_queries)
+
+        print(f"{size:>8} {len(rows):>9} {build:>8.2f} {search * 1e6:>10.1f} {scan * 1e3:>8.2f} {scan / search:>7.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
 ﻿#!/usr/bin/env python3
 import atexit
+import compileall
+import hashlib
 import json
 import mimetypes
 import os
+import py_compile
 import random
 import shutil
 import string
@@ -28,6 +31,8 @@ ARTIFACTS_DIR = AWS_SCRIPTS_DIR / "artifacts"
 OUTPUTS_PATH = AWS_SCRIPTS_DIR / "outputs.env"
 CONFIG_PATH = AWS_SCRIPTS_DIR / "config.env"
 LAMBDA_SRC_DIR = AWS_SCRIPTS_DIR / "lambdas"
+# Code every Python handler imports, shipped once as a layer instead of in each zip.
+COMMON_PACKAGE = "vela_common"
 
 
 def load_env_file(path: Path) -> dict:
@@ -89,12 +94,145 @@ def find_artifact(filename: str) -> Path:
     return Path()
 
 
-def package_python_lambda(module_name: str, source_path: Path, zip_path: Path) -> None:
+def install_python_requirements(requirements: list[str], target: Path, runtime: str) -> None:
+    if target.exists():
+        shutil.rmtree(target)
+    target.mkdir(parents=True)
+    subprocess.run(
+        [
+            sys.executable, "-m", "pip", "install",
+            "--quiet",
+            "--target", str(target),
+            "--platform", "manylinux2014_x86_64",
+            "--implementation", "cp",
+            "--python-version", runtime.replace("python", ""),
+            "--only-binary=:all:",
+            *requirements,
+        ],
+        check=True,
+    )
+
+
+def package_python_lambda(
+    module_name: str,
+    source_path: Path,
+    zip_path: Path,
+    extra_modules: list[str] | None = None,
+    requirements: list[str] | None = None,
+    runtime: str = "python3.12",
+) -> None:
+    deps_dir = None
+    if requirements:
+        deps_dir = ARTIFACTS_DIR / f"{zip_path.stem}-deps"
+        install_python_requirements(requirements, deps_dir, runtime)
+
     with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
         zf.write(source_path, arcname=f"{module_name}.py")
+        for extra in extra_modules or []:
+            zf.write(LAMBDA_SRC_DIR / f"{extra}.py", arcname=f"{extra}.py")
+        if deps_dir:
+            for path in sorted(deps_dir.rglob("*")):
+                if path.is_file() and "__pycache__" not in path.parts:
+                    zf.write(path, arcname=str(path.relative_to(deps_dir)).replace("\\", "/"))
+
+
+def build_common_layer(zip_path: Path, runtime: str, requirements: list[str] | None = None) -> str:
+    """Zip COMMON_PACKAGE and ``requirements`` as a layer; returns a hash of its contents."""
+    build_dir = ARTIFACTS_DIR / "vela-common-layer"
+    site_dir = build_dir / "python"
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    if requirements:
+        install_python_requirements(requirements, site_dir, runtime)
+    site_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(
+        LAMBDA_SRC_DIR / COMMON_PACKAGE,
+        site_dir / COMMON_PACKAGE,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    for cache_dir in list(site_dir.rglob("__pycache__")):
+        shutil.rmtree(cache_dir)
+
+    # /opt is read-only, so without bytecode in the layer every cold start
+    # recompiles it. Hash-based .pyc files keep the zip (and its hash) stable.
+    local_version = f"python{sys.version_info.major}.{sys.version_info.minor}"
+    if local_version == runtime:
+        compileall.compile_dir(
+            site_dir, quiet=1, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+    else:
+        print(f"Deploying with {local_version}, not {runtime}: the {COMMON_PACKAGE} layer ships without bytecode.")
+
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path in sorted(p for p in build_dir.rglob("*") if p.is_file()):
+            arcname = path.relative_to(build_dir).as_posix()
+            data = path.read_bytes()
+            digest.update(arcname.encode("utf-8") + b"\0" + hashlib.sha256(data).digest())
+            # Fixed timestamps and modes, so unchanged code builds an identical zip.
+            info = zipfile.ZipInfo(arcname)
+            info.external_attr = 0o644 << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, data)
+    return digest.hexdigest()[:16]
+
+
+def publish_common_layer(lambda_client, layer_name: str, zip_path: Path, digest: str, runtime: str) -> str:
+    """The ARN of the layer version holding this build, publishing one only when the contents changed."""
+    description = f"{COMMON_PACKAGE} {runtime} {digest}"
+    paginator = lambda_client.get_paginator("list_layer_versions")
+    for page in paginator.paginate(LayerName=layer_name):
+        for version in page.get("LayerVersions", []):
+            if version.get("Description") == description:
+                print(f"Layer {layer_name} is unchanged (version {version['Version']}).")
+                return version["LayerVersionArn"]
+
+    out = lambda_client.publish_layer_version(
+        LayerName=layer_name,
+        Description=description,
+        Content={"ZipFile": load_zip_bytes(zip_path)},
+        CompatibleRuntimes=[runtime],
+    )
+    print(f"Published layer {layer_name} version {out['Version']} ({digest}).")
+    return out["LayerVersionArn"]
 
 
 def ensure_role(iam, role_name: str, policy_name: str) -> str:
+    return ensure_service_role(iam, role_name, policy_name, [
+        {
+            "Sid": "DynamoAccess",
+            "Effect": "Allow",
+            "Action": [
+                "dynamodb:GetItem",
+                "dynamodb:BatchGetItem",
+                "dynamodb:BatchWriteItem",
+                "dynamodb:PutItem",
+                "dynamodb:UpdateItem",
+                "dynamodb:DeleteItem",
+                "dynamodb:Query",
+                "dynamodb:Scan",
+                "dynamodb:DescribeTable",
+            ],
+            "Resource": "arn:aws:dynamodb:*:*:table/*",
+        },
+        {
+            "Sid": "S3ReadAccess",
+            "Effect": "Allow",
+            "Action": [
+                "s3:GetObject",
+                "s3:GetObjectVersion",
+                "s3:ListBucket",
+            ],
+            "Resource": [
+                "arn:aws:s3:::*",
+                "arn:aws:s3:::*/*",
+            ],
+        },
+    ])
+
+
+def ensure_service_role(iam, role_name: str, policy_name: str, statements: list[dict]) -> str:
+    """A Lambda execution role with basic logging plus ``statements`` as its inline policy."""
     trust_policy = {
         "Version": "2012-10-17",
         "Statement": [
@@ -105,38 +243,8 @@ def ensure_role(iam, role_name: str, policy_name: str) -> str:
             }
         ],
     }
-    access_policy = {
-        "Version": "2012-10-17",
-        "Statement": [
-            {
-                "Sid": "DynamoAccess",
-                "Effect": "Allow",
-                "Action": [
-                    "dynamodb:GetItem",
-                    "dynamodb:PutItem",
-                    "dynamodb:UpdateItem",
-                    "dynamodb:DeleteItem",
-                    "dynamodb:Query",
-                    "dynamodb:Scan",
-                    "dynamodb:DescribeTable",
-                ],
-                "Resource": "arn:aws:dynamodb:*:*:table/*",
-            },
-            {
-                "Sid": "S3ReadAccess",
-                "Effect": "Allow",
-                "Action": [
-                    "s3:GetObject",
-                    "s3:GetObjectVersion",
-                    "s3:ListBucket",
-                ],
-                "Resource": [
-                    "arn:aws:s3:::*",
-                    "arn:aws:s3:::*/*",
-                ],
-            },
-        ],
-    }
+    access_policy = {"Version": "2012-10-17", "Statement": statements}
+    created = False
     try:
         role = iam.get_role(RoleName=role_name)["Role"]
     except ClientError as exc:
@@ -146,6 +254,7 @@ def ensure_role(iam, role_name: str, policy_name: str) -> str:
             RoleName=role_name,
             AssumeRolePolicyDocument=json.dumps(trust_policy),
         )["Role"]
+        created = True
 
     basic_policy = "arn:aws:iam::aws:policy/service-role/AWSLambdaBasicExecutionRole"
     attached = []
@@ -168,6 +277,9 @@ def ensure_role(iam, role_name: str, policy_name: str) -> str:
         PolicyName=policy_name,
         PolicyDocument=json.dumps(access_policy),
     )
+    if created:
+        # Lambda rejects a role it cannot assume yet; IAM needs a few seconds.
+        time.sleep(10)
     return role["Arn"]
 
 def find_user_pool_id(cognito, pool_name: str) -> str:
@@ -297,21 +409,78 @@ def ensure_admin_user(cognito, pool_id: str, email: str, password: str) -> None:
     cognito.admin_add_user_to_group(UserPoolId=pool_id, Username=email, GroupName="admin")
 
 
-def ensure_table(dynamodb, name: str, key_schema: list, attr_defs: list) -> None:
+def gsi(name: str, hash_key: str, range_key: str | None = None) -> dict:
+    key_schema = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+    if range_key:
+        key_schema.append({"AttributeName": range_key, "KeyType": "RANGE"})
+    return {"IndexName": name, "KeySchema": key_schema, "Projection": {"ProjectionType": "ALL"}}
+
+
+def wait_for_indexes(dynamodb, name: str) -> None:
+    while True:
+        table = dynamodb.describe_table(TableName=name)["Table"]
+        statuses = [index["IndexStatus"] for index in table.get("GlobalSecondaryIndexes", [])]
+        if table["TableStatus"] == "ACTIVE" and all(status == "ACTIVE" for status in statuses):
+            return
+        time.sleep(10)
+
+
+def ensure_table(dynamodb, name: str, key_schema: list, attr_defs: list, indexes: list | None = None) -> None:
     try:
-        dynamodb.describe_table(TableName=name)
-        return
+        existing = dynamodb.describe_table(TableName=name)["Table"]
     except ClientError as exc:
         if exc.response["Error"]["Code"] != "ResourceNotFoundException":
             raise
+        existing = None
+
+    if existing is None:
+        extra = {"GlobalSecondaryIndexes": indexes} if indexes else {}
+        dynamodb.create_table(
+            TableName=name,
+            BillingMode="PAY_PER_REQUEST",
+            AttributeDefinitions=attr_defs,
+            KeySchema=key_schema,
+            **extra,
+        )
+        dynamodb.get_waiter("table_exists").wait(TableName=name)
+        return
+
+    # DynamoDB only accepts one index creation per UpdateTable call.
+    present = {index["IndexName"] for index in existing.get("GlobalSecondaryIndexes", [])}
+    for index in indexes or []:
+        if index["IndexName"] in present:
+            continue
+        print(f"Adding index {index['IndexName']} to {name} (this can take a few minutes)...")
+        wait_for_indexes(dynamodb, name)
+        dynamodb.update_table(
+            TableName=name,
+            AttributeDefinitions=attr_defs,
+            GlobalSecondaryIndexUpdates=[{"Create": index}],
+        )
+        wait_for_indexes(dynamodb, name)
+
+
+def ensure_stream(dynamodb, name: str, view_type: str = "KEYS_ONLY") -> str:
+    table = dynamodb.describe_table(TableName=name)["Table"]
+    if not (table.get("StreamSpecification") or {}).get("StreamEnabled"):
+        wait_for_indexes(dynamodb, name)
+        dynamodb.update_table(
+            TableName=name,
+            StreamSpecification={"StreamEnabled": True, "StreamViewType": view_type},
+        )
+        wait_for_indexes(dynamodb, name)
+        table = dynamodb.describe_table(TableName=name)["Table"]
+    return table["LatestStreamArn"]
+
 
-    dynamodb.create_table(
+def ensure_ttl(dynamodb, name: str, attribute: str) -> None:
+    desc = dynamodb.describe_time_to_live(TableName=name).get("TimeToLiveDescription", {})
+    if desc.get("TimeToLiveStatus") in {"ENABLED", "ENABLING"}:
+        return
+    dynamodb.update_time_to_live(
         TableName=name,
-        BillingMode="PAY_PER_REQUEST",
-        AttributeDefinitions=attr_defs,
-        KeySchema=key_schema,
+        TimeToLiveSpecification={"Enabled": True, "AttributeName": attribute},
     )
-    dynamodb.get_waiter("table_exists").wait(TableName=name)
 
 
 def ensure_bucket(s3, name: str, region: str) -> None:
@@ -338,6 +507,25 @@ def ensure_bucket_versioning(s3, name: str) -> None:
     )
 
 
+def expire_noncurrent_versions(s3, bucket: str, prefix: str, days: int) -> None:
+    """Keep one lifecycle rule that drops old versions of objects under ``prefix``."""
+    rule_id = f"expire-noncurrent-{prefix.strip('/').replace('/', '-')}"
+    try:
+        rules = s3.get_bucket_lifecycle_configuration(Bucket=bucket).get("Rules", [])
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "NoSuchLifecycleConfiguration":
+            raise
+        rules = []
+    rules = [rule for rule in rules if rule.get("ID") != rule_id]
+    rules.append({
+        "ID": rule_id,
+        "Filter": {"Prefix": prefix},
+        "Status": "Enabled",
+        "NoncurrentVersionExpiration": {"NoncurrentDays": days},
+    })
+    s3.put_bucket_lifecycle_configuration(Bucket=bucket, LifecycleConfiguration={"Rules": rules})
+
+
 def upload_file(s3, local_path: Path, bucket: str, key: str, content_type: str | None = None) -> None:
     extra_args = {}
     if content_type:
@@ -370,6 +558,7 @@ def upsert_lambda(
     env_vars: dict | None = None,
     timeout: int | None = None,
     memory: int | None = None,
+    layers: list[str] | None = None,
 ) -> None:
     code_bytes = load_zip_bytes(zip_path)
     try:
@@ -388,6 +577,8 @@ def upsert_lambda(
             config["Timeout"] = timeout
         if memory is not None:
             config["MemorySize"] = memory
+        if layers is not None:
+            config["Layers"] = layers
         for _ in range(10):
             try:
                 lambda_client.update_function_configuration(**config)
@@ -413,6 +604,8 @@ def upsert_lambda(
             config["Timeout"] = timeout
         if memory is not None:
             config["MemorySize"] = memory
+        if layers is not None:
+            config["Layers"] = layers
         lambda_client.create_function(**config)
         wait_for_lambda_update(lambda_client, name)
 
@@ -446,28 +639,117 @@ def add_lambda_permission(lambda_client, function_name: str, statement_id: str,
         SourceArn=source_arn,
     )
 
-def ensure_http_api(apigw, name: str, cors_methods: list[str]) -> str:
+def ensure_schedule(events, lambda_client, rule_name: str, schedule: str, function_name: str) -> None:
+    rule_arn = events.put_rule(Name=rule_name, ScheduleExpression=schedule, State="ENABLED")["RuleArn"]
+    add_lambda_permission(lambda_client, function_name, f"{rule_name}-invoke", "events.amazonaws.com", rule_arn)
+    events.put_targets(Rule=rule_name, Targets=[{"Id": function_name, "Arn": get_lambda_arn(lambda_client, function_name)}])
+    print(f"Scheduled {function_name} with {schedule}")
+
+
+def ensure_event_source_mapping(lambda_client, function_name: str, source_arn: str, batch_window: int) -> None:
+    mappings = lambda_client.list_event_source_mappings(
+        FunctionName=function_name,
+        EventSourceArn=source_arn,
+    ).get("EventSourceMappings", [])
+    if mappings:
+        lambda_client.update_event_source_mapping(
+            UUID=mappings[0]["UUID"],
+            MaximumBatchingWindowInSeconds=batch_window,
+        )
+        return
+
+    # A freshly attached role policy can take a few seconds to be honoured.
+    for attempt in range(10):
+        try:
+            lambda_client.create_event_source_mapping(
+                FunctionName=function_name,
+                EventSourceArn=source_arn,
+                StartingPosition="LATEST",
+                BatchSize=1000,
+                MaximumBatchingWindowInSeconds=batch_window,
+            )
+            return
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "InvalidParameterValueException" or attempt == 9:
+                raise
+            time.sleep(6)
+
+
+def ensure_snapshot_role(
+    iam,
+    role_name: str,
+    bucket: str,
+    prefix: str,
+    table_arns: list[str],
+    stream_arn: str,
+) -> str:
+    """The snapshot function's own role: its S3 prefix, the catalogue tables and one stream."""
+    return ensure_service_role(iam, role_name, "vela-snapshot-access", [
+        {
+            "Sid": "SnapshotObjects",
+            "Effect": "Allow",
+            "Action": ["s3:GetObject", "s3:PutObject", "s3:DeleteObject"],
+            "Resource": f"arn:aws:s3:::{bucket}/{prefix}/*",
+        },
+        {
+            "Sid": "SnapshotList",
+            "Effect": "Allow",
+            "Action": "s3:ListBucket",
+            "Resource": f"arn:aws:s3:::{bucket}",
+            "Condition": {"StringLike": {"s3:prefix": f"{prefix}/*"}},
+        },
+        {
+            "Sid": "CatalogueRead",
+            "Effect": "Allow",
+            "Action": ["dynamodb:GetItem", "dynamodb:Scan"],
+            "Resource": table_arns,
+        },
+        {
+            "Sid": "RecommendationsStream",
+            "Effect": "Allow",
+            "Action": [
+                "dynamodb:DescribeStream",
+                "dynamodb:GetRecords",
+                "dynamodb:GetShardIterator",
+            ],
+            "Resource": stream_arn,
+        },
+        {
+            # ListStreams has no resource-level permissions.
+            "Sid": "ListStreams",
+            "Effect": "Allow",
+            "Action": "dynamodb:ListStreams",
+            "Resource": "*",
+        },
+    ])
+
+
+def delete_role_policy_if_exists(iam, role_name: str, policy_name: str) -> None:
+    try:
+        iam.delete_role_policy(RoleName=role_name, PolicyName=policy_name)
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "NoSuchEntity":
+            raise
+
+
+def ensure_http_api(apigw, name: str, cors_methods: list[str], expose_headers: list[str] | None = None) -> str:
+    cors = {
+        "AllowOrigins": ["*"],
+        "AllowHeaders": ["*"],
+        "AllowMethods": cors_methods,
+    }
+    if expose_headers:
+        cors["ExposeHeaders"] = expose_headers
     apis = apigw.get_apis().get("Items", [])
     for api in apis:
         if api.get("Name") == name:
             api_id = api.get("ApiId")
-            apigw.update_api(
-                ApiId=api_id,
-                CorsConfiguration={
-                    "AllowOrigins": ["*"],
-                    "AllowHeaders": ["*"],
-                    "AllowMethods": cors_methods,
-                },
-            )
+            apigw.update_api(ApiId=api_id, CorsConfiguration=cors)
             return api_id
     resp = apigw.create_api(
         Name=name,
         ProtocolType="HTTP",
-        CorsConfiguration={
-            "AllowOrigins": ["*"],
-            "AllowHeaders": ["*"],
-            "AllowMethods": cors_methods,
-        },
+        CorsConfiguration=cors,
     )
     return resp["ApiId"]
 
@@ -675,6 +957,40 @@ def upload_directory(s3, directory: Path, bucket: str) -> None:
             content_type, _ = mimetypes.guess_type(path.name)
             upload_file(s3, path, bucket, key, content_type)
 
+def publish_planet_grid(s3, bucket: str, key: str, hours: int) -> bool:
+    sys.path.insert(0, str(LAMBDA_SRC_DIR))
+    try:
+        import planet_grid
+    except ImportError:
+        print("numpy not installed locally; skipping planet grid. Run: py -m pip install numpy")
+        return False
+
+    grid_path = ARTIFACTS_DIR / "visible-planets-grid.bin"
+    print(f"Building {hours}h planet visibility grid...")
+    planet_grid.write_grid(grid_path, time.time(), hours)
+    upload_file(s3, grid_path, bucket, key, "application/octet-stream")
+    grid_path.unlink()
+    print(f"Uploaded planet grid to s3://{bucket}/{key}")
+    return True
+
+
+def refresh_planet_grid() -> None:
+    config = load_env_file(CONFIG_PATH)
+    outputs = load_env_file(OUTPUTS_PATH)
+    bucket = get_setting(config, "TIF_BUCKET_NAME", outputs.get("TIF_BUCKET_NAME", ""))
+    if not bucket:
+        raise RuntimeError("TIF_BUCKET_NAME is not set. Run a full deploy first.")
+    region = get_setting(config, "AWS_REGION", "us-east-1")
+    profile = get_setting(config, "AWS_PROFILE", "").strip() or None
+    session = boto_session(region, profile)
+    publish_planet_grid(
+        session.client("s3"),
+        bucket,
+        get_setting(config, "PLANET_GRID_KEY", "planets/visible-planets-grid.bin"),
+        int(get_setting(config, "PLANET_GRID_HOURS", "48")),
+    )
+
+
 def deploy_all() -> None:
     ensure_artifacts_dir()
     config = load_env_file(CONFIG_PATH)
@@ -701,6 +1017,7 @@ def deploy_all() -> None:
     lambda_client = session.client("lambda")
     apigw = session.client("apigatewayv2")
     dynamodb = session.client("dynamodb")
+    events = session.client("events")
     cognito = session.client("cognito-idp")
     sts = session.client("sts")
     cloudfront = boto3.client("cloudfront")
@@ -801,13 +1118,67 @@ def deploy_all() -> None:
     py_runtime = get_setting(config, "PY_RUNTIME", "python3.12")
     node_runtime = get_setting(config, "NODE_RUNTIME", "nodejs20.x")
 
+    # vela_common (claims, responses, JSON and DynamoDB helpers) is published
+    # once as a layer and attached to every Python function packaged below.
+    # Optional wheels go in the layer too: codec.py uses orjson when present.
+    common_requirements = ["orjson"] if is_truthy(get_setting(config, "BUNDLE_ORJSON", "0")) else []
+    common_requirements += [
+        name.strip() for name in get_setting(config, "COMMON_LAYER_REQUIREMENTS", "").split(",") if name.strip()
+    ]
+    common_layer_zip = ARTIFACTS_DIR / "vela-common-layer.zip"
+    common_digest = build_common_layer(common_layer_zip, py_runtime, common_requirements)
+    common_layer_arn = publish_common_layer(
+        lambda_client,
+        get_setting(config, "COMMON_LAYER_NAME", "vela-common"),
+        common_layer_zip,
+        common_digest,
+        py_runtime,
+    )
+    set_output(outputs, "COMMON_LAYER_ARN", common_layer_arn)
+
+    planets_engine = get_setting(config, "PLANETS_ENGINE", "local").strip().lower()
     visible_zip = ARTIFACTS_DIR / "visible-planets-lambda.zip"
-    package_python_lambda("visible_planets_lambda", LAMBDA_SRC_DIR / "visible_planets_lambda.py", visible_zip)
+    if planets_engine == "local":
+        package_python_lambda(
+            "visible_planets_lambda",
+            LAMBDA_SRC_DIR / "visible_planets_lambda.py",
+            visible_zip,
+            extra_modules=["planet_ephemeris", "planet_grid"],
+            requirements=["numpy"],
+            runtime=py_runtime,
+        )
+    else:
+        package_python_lambda("visible_planets_lambda", LAMBDA_SRC_DIR / "visible_planets_lambda.py", visible_zip)
 
     visible_fn = get_setting(config, "VISIBLE_PLANETS_FUNCTION", "visible-planets-lambda")
     light_fn = get_setting(config, "LIGHTPOLLUTION_FUNCTION", "lightpollution-lambda")
     sky_fn = get_setting(config, "SKYQUALITY_FUNCTION", "skyquality-tiles-lambda")
 
+    visible_env = {
+        "PLANETS_ENGINE": planets_engine,
+        "PLANETS_LOCAL_TIME_BUCKET": get_setting(config, "PLANETS_LOCAL_TIME_BUCKET", "300"),
+    }
+    if planets_engine == "local" and is_truthy(get_setting(config, "BUILD_PLANET_GRID", "1")):
+        planet_grid_key = get_setting(config, "PLANET_GRID_KEY", "planets/visible-planets-grid.bin")
+        planet_grid_hours = int(get_setting(config, "PLANET_GRID_HOURS", "48"))
+        if publish_planet_grid(s3, tif_bucket, planet_grid_key, planet_grid_hours):
+            visible_env["PLANET_GRID_BUCKET"] = tif_bucket
+            visible_env["PLANET_GRID_KEY"] = planet_grid_key
+            set_output(outputs, "PLANET_GRID_KEY", planet_grid_key)
+    # The shared table only holds upstream bodies, so it is off by default for the local engine.
+    shared_cache_default = "0" if planets_engine == "local" else "1"
+    if is_truthy(get_setting(config, "PLANETS_SHARED_CACHE", shared_cache_default)):
+        planets_cache_table = get_setting(config, "PLANETS_CACHE_TABLE", "VisiblePlanetsCache")
+        ensure_table(
+            dynamodb,
+            planets_cache_table,
+            key_schema=[{"AttributeName": "cacheKey", "KeyType": "HASH"}],
+            attr_defs=[{"AttributeName": "cacheKey", "AttributeType": "S"}],
+        )
+        ensure_ttl(dynamodb, planets_cache_table, "expiresAt")
+        visible_env["PLANETS_CACHE_TABLE"] = planets_cache_table
+        set_output(outputs, "PLANETS_CACHE_TABLE", planets_cache_table)
+
     upsert_lambda(
         lambda_client,
         visible_fn,
@@ -815,8 +1186,59 @@ def deploy_all() -> None:
         "visible_planets_lambda.lambda_handler",
         role_arn,
         visible_zip,
+        env_vars=visible_env,
+        timeout=10,
+        layers=[common_layer_arn],
     )
 
+    if "PLANET_GRID_KEY" in visible_env:
+        # Rebuild the grid well before it runs out; the visible planets Lambda
+        # serves the live ephemeris (and logs the expiry) if a rebuild is missed.
+        grid_fn = get_setting(config, "PLANET_GRID_LAMBDA", "PlanetGridBuilder")
+        grid_role_arn = ensure_service_role(
+            iam,
+            get_setting(config, "PLANET_GRID_ROLE_NAME", "vela-planet-grid-role"),
+            "vela-planet-grid-access",
+            [{
+                "Sid": "PlanetGridWrite",
+                "Effect": "Allow",
+                "Action": "s3:PutObject",
+                "Resource": f"arn:aws:s3:::{tif_bucket}/{planet_grid_key}",
+            }],
+        )
+        package_python_lambda(
+            "planet_grid_builder",
+            LAMBDA_SRC_DIR / "planet_grid_builder.py",
+            ARTIFACTS_DIR / f"{grid_fn}.zip",
+            extra_modules=["planet_ephemeris", "planet_grid"],
+            requirements=["numpy"],
+            runtime=py_runtime,
+        )
+        upsert_lambda(
+            lambda_client,
+            grid_fn,
+            py_runtime,
+            "planet_grid_builder.lambda_handler",
+            grid_role_arn,
+            ARTIFACTS_DIR / f"{grid_fn}.zip",
+            env_vars={
+                "PLANET_GRID_BUCKET": tif_bucket,
+                "PLANET_GRID_KEY": planet_grid_key,
+                "PLANET_GRID_HOURS": str(planet_grid_hours),
+            },
+            timeout=300,
+            memory=2048,
+        )
+        ensure_schedule(
+            events,
+            lambda_client,
+            f"{grid_fn}-schedule",
+            get_setting(config, "PLANET_GRID_SCHEDULE", "rate(1 day)"),
+            grid_fn,
+        )
+        # Warm containers keep reading the version they loaded until it expires.
+        expire_noncurrent_versions(s3, tif_bucket, planet_grid_key, 2)
+
     light_zip = get_setting(config, "LIGHTPOLLUTION_ZIP", "")
     light_zip_path = Path(light_zip) if light_zip else find_artifact("lightpollution-lambda.zip")
     if not light_zip_path.exists():
@@ -851,10 +1273,25 @@ def deploy_all() -> None:
         memory=3008,
     )
 
-    visible_api = ensure_http_api(apigw, f"{prefix}-visible-planets-api", ["GET", "OPTIONS"])
+    visible_api = ensure_http_api(
+        apigw,
+        f"{prefix}-visible-planets-api",
+        ["GET", "POST", "OPTIONS"],
+        expose_headers=[
+            "X-Planets-Engine",
+            "X-Cache",
+            "X-Cache-Tier",
+            "X-Cache-Hits",
+            "X-Cache-Misses",
+            "X-Upstream-Breaker",
+            "X-Upstream-Latency-Ms",
+            "Retry-After",
+        ],
+    )
     visible_arn = get_lambda_arn(lambda_client, visible_fn)
     visible_integration = ensure_integration(apigw, visible_api, visible_arn)
     ensure_route(apigw, visible_api, "GET /visible-planets-lambda", visible_integration)
+    ensure_route(apigw, visible_api, "POST /visible-planets-lambda/batch", visible_integration)
     ensure_stage(apigw, visible_api, "default")
     add_lambda_permission(
         lambda_client,
@@ -901,6 +1338,10 @@ def deploy_all() -> None:
     users_table = get_setting(config, "USERS_TABLE", "Users")
     fav_table = get_setting(config, "FAV_TABLE", "UserFavorites")
     rec_table = get_setting(config, "REC_TABLE", "Recommendations")
+    rec_details_table = get_setting(config, "REC_DETAILS_TABLE", "RecommendationDetails")
+    meta_table = get_setting(config, "META_TABLE", "VelaMeta")
+    rec_clusters_table = get_setting(config, "REC_CLUSTERS_TABLE", "RecommendationClusters")
+    rec_search_table = get_setting(config, "REC_SEARCH_TABLE", "RecommendationSearch")
 
     ensure_table(
         dynamodb,
@@ -924,13 +1365,76 @@ def deploy_all() -> None:
         dynamodb,
         rec_table,
         key_schema=[{"AttributeName": "spotId", "KeyType": "HASH"}],
+        attr_defs=[
+            {"AttributeName": "spotId", "AttributeType": "S"},
+            {"AttributeName": "gh", "AttributeType": "S"},
+            {"AttributeName": "gh2", "AttributeType": "S"},
+            {"AttributeName": "gh4", "AttributeType": "S"},
+            {"AttributeName": "syncShard", "AttributeType": "S"},
+            {"AttributeName": "updatedAt", "AttributeType": "S"},
+        ],
+        indexes=[
+            gsi("gh2-index", "gh2", "gh"),
+            gsi("gh4-index", "gh4", "gh"),
+            gsi("sync-index", "syncShard", "updatedAt"),
+        ],
+    )
+    ensure_table(
+        dynamodb,
+        rec_details_table,
+        key_schema=[{"AttributeName": "spotId", "KeyType": "HASH"}],
         attr_defs=[{"AttributeName": "spotId", "AttributeType": "S"}],
     )
+    ensure_table(
+        dynamodb,
+        rec_clusters_table,
+        key_schema=[
+            {"AttributeName": "level", "KeyType": "HASH"},
+            {"AttributeName": "cell", "KeyType": "RANGE"},
+        ],
+        attr_defs=[
+            {"AttributeName": "level", "AttributeType": "N"},
+            {"AttributeName": "cell", "AttributeType": "S"},
+        ],
+    )
+    ensure_table(
+        dynamodb,
+        rec_search_table,
+        key_schema=[
+            {"AttributeName": "gram", "KeyType": "HASH"},
+            {"AttributeName": "key", "KeyType": "RANGE"},
+        ],
+        attr_defs=[
+            {"AttributeName": "gram", "AttributeType": "S"},
+            {"AttributeName": "key", "AttributeType": "S"},
+        ],
+    )
+    ensure_table(
+        dynamodb,
+        meta_table,
+        key_schema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+        attr_defs=[{"AttributeName": "pk", "AttributeType": "S"}],
+    )
 
-    def package_and_upsert(module: str, function_name: str, handler: str, env_vars: dict | None = None):
+    def package_and_upsert(
+        module: str,
+        function_name: str,
+        handler: str,
+        env_vars: dict | None = None,
+        extra_modules: list[str] | None = None,
+        timeout: int | None = None,
+        memory: int | None = None,
+        requirements: list[str] | None = None,
+    ):
         zip_path = ARTIFACTS_DIR / f"{function_name}.zip"
-        package_python_lambda(module, LAMBDA_SRC_DIR / f"{module}.py", zip_path)
-        upsert_lambda(lambda_client, function_name, py_runtime, handler, role_arn, zip_path, env_vars=env_vars)
+        package_python_lambda(
+            module, LAMBDA_SRC_DIR / f"{module}.py", zip_path,
+            extra_modules=extra_modules, requirements=requirements, runtime=py_runtime,
+        )
+        upsert_lambda(
+            lambda_client, function_name, py_runtime, handler, role_arn, zip_path,
+            env_vars=env_vars, timeout=timeout, memory=memory, layers=[common_layer_arn],
+        )
 
     auto_confirm_enabled = is_truthy(get_setting(config, "AUTO_CONFIRM_SIGNUP", "1"))
     auto_confirm_arn = None
@@ -970,42 +1474,140 @@ def deploy_all() -> None:
         f"arn:aws:cognito-idp:{region}:{account_id}:userpool/{pool_id}",
     )
 
+    # "split" deploys one function per handler; "router" serves the favorites
+    # and recommendations routes (bulk import aside) from a single function
+    # so they share warm containers.
+    lambda_mode = get_setting(config, "LAMBDA_MODE", "split").strip().lower()
+    if lambda_mode not in ("split", "router"):
+        raise RuntimeError(f"LAMBDA_MODE must be split or router, got {lambda_mode!r}")
+
     fav_fn = get_setting(config, "FAVORITES_LAMBDA", "FavoritesHandler")
     get_fav_fn = get_setting(config, "GET_FAVORITES_LAMBDA", "GetFavoritesHandler")
     del_fav_fn = get_setting(config, "DELETE_FAVORITES_LAMBDA", "DeleteFavoriteHandler")
-
-    package_and_upsert("favorites_handler", fav_fn, "favorites_handler.lambda_handler", env_vars={"FAV_TABLE": fav_table})
-    package_and_upsert("get_favorites_handler", get_fav_fn, "get_favorites_handler.lambda_handler", env_vars={"FAV_TABLE": fav_table})
-    package_and_upsert("delete_favorite_handler", del_fav_fn, "delete_favorite_handler.lambda_handler", env_vars={"FAV_TABLE": fav_table})
+    batch_fav_fn = get_setting(config, "BATCH_FAVORITES_LAMBDA", "FavoritesBatchHandler")
+
+    # Every favorites write bumps the user's version stamp in META_TABLE so
+    # GET /favorites can answer If-None-Match with a 304.
+    fav_env = {
+        "FAV_TABLE": fav_table,
+        "META_TABLE": meta_table,
+        "FAV_MAX_ALL_ITEMS": get_setting(config, "FAV_MAX_ALL_ITEMS", "2000"),
+    }
+    stamp_modules = ["version_stamps"]
+    if lambda_mode == "split":
+        package_and_upsert("favorites_handler", fav_fn, "favorites_handler.lambda_handler", env_vars=fav_env, extra_modules=stamp_modules)
+        package_and_upsert("get_favorites_handler", get_fav_fn, "get_favorites_handler.lambda_handler", env_vars=fav_env, extra_modules=stamp_modules)
+        package_and_upsert("delete_favorite_handler", del_fav_fn, "delete_favorite_handler.lambda_handler", env_vars=fav_env, extra_modules=stamp_modules)
+        package_and_upsert("favorites_batch_handler", batch_fav_fn, "favorites_batch_handler.lambda_handler", env_vars=fav_env, extra_modules=stamp_modules, timeout=30)
 
     post_rec_fn = get_setting(config, "POST_RECS_LAMBDA", "PostRecommendationHandler")
     get_rec_fn = get_setting(config, "GET_RECS_LAMBDA", "GetRecommendationsHandler")
     del_rec_fn = get_setting(config, "DELETE_RECS_LAMBDA", "DeleteRecommendationsHandler")
+    import_rec_fn = get_setting(config, "IMPORT_RECS_LAMBDA", "ImportRecommendationsHandler")
+
+    rec_env = {
+        "REC_TABLE": rec_table,
+        "REC_DETAILS_TABLE": rec_details_table,
+        "REC_CLUSTERS_TABLE": rec_clusters_table,
+        "REC_SEARCH_TABLE": rec_search_table,
+        "META_TABLE": meta_table,
+        # compact-tombstones purges with the same window, so a cursor either
+        # still sees a deletion or gets a 410.
+        "REC_TOMBSTONE_RETENTION_DAYS": get_setting(config, "REC_TOMBSTONE_RETENTION_DAYS", "30"),
+        "REC_MAX_CLUSTERS": get_setting(config, "REC_MAX_CLUSTERS", "1024"),
+    }
+    schema_modules = ["geo", "recommendation_schema", "version_stamps"]
+    write_modules = schema_modules + ["spatial_index", "cluster_pyramid", "search_index"]
+    if lambda_mode == "split":
+        package_and_upsert("post_recommendation_handler", post_rec_fn, "post_recommendation_handler.lambda_handler", env_vars=rec_env, extra_modules=write_modules)
+        package_and_upsert("get_recommendations_handler", get_rec_fn, "get_recommendations_handler.lambda_handler", env_vars=rec_env, extra_modules=write_modules)
+        package_and_upsert("delete_recommendation_handler", del_rec_fn, "delete_recommendation_handler.lambda_handler", env_vars=rec_env, extra_modules=write_modules)
+    else:
+        router_fn = get_setting(config, "ROUTER_LAMBDA", "RouterHandler")
+        router_modules = [
+            "favorites_handler",
+            "get_favorites_handler",
+            "delete_favorite_handler",
+            "favorites_batch_handler",
+            "post_recommendation_handler",
+            "get_recommendations_handler",
+            "delete_recommendation_handler",
+        ]
+        package_and_upsert(
+            "router_handler",
+            router_fn,
+            "router_handler.lambda_handler",
+            env_vars={**fav_env, **rec_env},
+            extra_modules=router_modules + write_modules,
+            timeout=30,
+            memory=int(get_setting(config, "ROUTER_MEMORY", "512")),
+        )
+        # Every route below then points at the router; the split functions
+        # from an earlier deploy are left in place but no longer invoked.
+        fav_fn = get_fav_fn = del_fav_fn = batch_fav_fn = router_fn
+        post_rec_fn = get_rec_fn = del_rec_fn = router_fn
+    # Bulk imports run for seconds rather than milliseconds; give them room.
+    package_and_upsert(
+        "import_recommendations_handler",
+        import_rec_fn,
+        "import_recommendations_handler.lambda_handler",
+        env_vars={
+            **rec_env,
+            "REC_IMPORT_MAX_ROWS": get_setting(config, "REC_IMPORT_MAX_ROWS", "10000"),
+            "REC_IMPORT_CONCURRENCY": get_setting(config, "REC_IMPORT_CONCURRENCY", "8"),
+        },
+        extra_modules=write_modules + ["recommendation_import"],
+        timeout=int(get_setting(config, "REC_IMPORT_TIMEOUT", "120")),
+        memory=int(get_setting(config, "REC_IMPORT_MEMORY", "1024")),
+    )
 
-    package_and_upsert("post_recommendation_handler", post_rec_fn, "post_recommendation_handler.lambda_handler", env_vars={"REC_TABLE": rec_table})
-    package_and_upsert("get_recommendations_handler", get_rec_fn, "get_recommendations_handler.lambda_handler", env_vars={"REC_TABLE": rec_table})
-    package_and_upsert("delete_recommendation_handler", del_rec_fn, "delete_recommendation_handler.lambda_handler", env_vars={"REC_TABLE": rec_table})
+    # GET /bootstrap runs the favorites, recommendations and planets reads
+    # in one function, so it ships all three handlers and their settings.
+    bootstrap_fn = get_setting(config, "BOOTSTRAP_LAMBDA", "BootstrapHandler")
+    bootstrap_modules = ["get_favorites_handler", "get_recommendations_handler", "visible_planets_lambda"] + write_modules
+    if planets_engine == "local":
+        bootstrap_modules += ["planet_ephemeris", "planet_grid"]
+    package_and_upsert(
+        "bootstrap_handler",
+        bootstrap_fn,
+        "bootstrap_handler.lambda_handler",
+        env_vars={**fav_env, **rec_env, **visible_env},
+        extra_modules=bootstrap_modules,
+        requirements=["numpy"] if planets_engine == "local" else None,
+        timeout=15,
+        memory=int(get_setting(config, "BOOTSTRAP_MEMORY", "512")),
+    )
 
-    favorites_api = ensure_http_api(apigw, "favoritesAPI", ["GET", "POST", "DELETE", "OPTIONS"])
+    favorites_api = ensure_http_api(apigw, "favoritesAPI", ["GET", "POST", "DELETE", "OPTIONS"], expose_headers=["ETag", "Server-Timing"])
     fav_stage = "$default"
     ensure_stage(apigw, favorites_api, fav_stage)
 
     fav_arn = get_lambda_arn(lambda_client, fav_fn)
     get_fav_arn = get_lambda_arn(lambda_client, get_fav_fn)
     del_fav_arn = get_lambda_arn(lambda_client, del_fav_fn)
+    batch_fav_arn = get_lambda_arn(lambda_client, batch_fav_fn)
+    bootstrap_arn = get_lambda_arn(lambda_client, bootstrap_fn)
 
     fav_post_integration = ensure_integration(apigw, favorites_api, fav_arn)
     fav_get_integration = ensure_integration(apigw, favorites_api, get_fav_arn)
     fav_del_integration = ensure_integration(apigw, favorites_api, del_fav_arn)
+    fav_batch_integration = ensure_integration(apigw, favorites_api, batch_fav_arn)
+    bootstrap_integration = ensure_integration(apigw, favorites_api, bootstrap_arn)
 
     ensure_route(apigw, favorites_api, "POST /favorites", fav_post_integration)
     ensure_route(apigw, favorites_api, "GET /favorites", fav_get_integration)
     ensure_route(apigw, favorites_api, "DELETE /favorites/{spotId}", fav_del_integration)
+    ensure_route(apigw, favorites_api, "POST /favorites/batch", fav_batch_integration)
+    ensure_route(apigw, favorites_api, "DELETE /favorites/batch", fav_batch_integration)
+    ensure_route(apigw, favorites_api, "GET /bootstrap", bootstrap_integration)
 
     fav_auth_id = ensure_authorizer(apigw, favorites_api, "JWT-FAV", cognito_issuer, client_id)
     attach_authorizer(apigw, favorites_api, "POST /favorites", fav_auth_id)
     attach_authorizer(apigw, favorites_api, "GET /favorites", fav_auth_id)
     attach_authorizer(apigw, favorites_api, "DELETE /favorites/{spotId}", fav_auth_id)
+    attach_authorizer(apigw, favorites_api, "POST /favorites/batch", fav_auth_id)
+    attach_authorizer(apigw, favorites_api, "DELETE /favorites/batch", fav_auth_id)
+    attach_authorizer(apigw, favorites_api, "GET /bootstrap", fav_auth_id)
 
     add_lambda_permission(
         lambda_client,
@@ -1028,26 +1630,48 @@ def deploy_all() -> None:
         "apigateway.amazonaws.com",
         f"arn:aws:execute-api:{region}:{account_id}:{favorites_api}/*/*",
     )
+    add_lambda_permission(
+        lambda_client,
+        batch_fav_fn,
+        "favorites-api-batch",
+        "apigateway.amazonaws.com",
+        f"arn:aws:execute-api:{region}:{account_id}:{favorites_api}/*/*",
+    )
+    add_lambda_permission(
+        lambda_client,
+        bootstrap_fn,
+        "favorites-api-bootstrap",
+        "apigateway.amazonaws.com",
+        f"arn:aws:execute-api:{region}:{account_id}:{favorites_api}/*/*",
+    )
 
-    recs_api = ensure_http_api(apigw, "recommendationsAPI", ["GET", "POST", "DELETE", "OPTIONS"])
+    recs_api = ensure_http_api(apigw, "recommendationsAPI", ["GET", "POST", "DELETE", "OPTIONS"], expose_headers=["ETag"])
     recs_stage = "$default"
     ensure_stage(apigw, recs_api, recs_stage)
 
     post_rec_arn = get_lambda_arn(lambda_client, post_rec_fn)
     get_rec_arn = get_lambda_arn(lambda_client, get_rec_fn)
     del_rec_arn = get_lambda_arn(lambda_client, del_rec_fn)
+    import_rec_arn = get_lambda_arn(lambda_client, import_rec_fn)
 
     post_rec_integration = ensure_integration(apigw, recs_api, post_rec_arn)
     get_rec_integration = ensure_integration(apigw, recs_api, get_rec_arn)
     del_rec_integration = ensure_integration(apigw, recs_api, del_rec_arn)
+    import_rec_integration = ensure_integration(apigw, recs_api, import_rec_arn)
 
     ensure_route(apigw, recs_api, "POST /recommendations", post_rec_integration)
     ensure_route(apigw, recs_api, "GET /recommendations", get_rec_integration)
+    ensure_route(apigw, recs_api, "GET /recommendations/nearest", get_rec_integration)
+    ensure_route(apigw, recs_api, "GET /recommendations/clusters", get_rec_integration)
+    ensure_route(apigw, recs_api, "GET /recommendations/search", get_rec_integration)
+    ensure_route(apigw, recs_api, "GET /recommendations/{spotId}", get_rec_integration)
     ensure_route(apigw, recs_api, "DELETE /recommendations/{spotId}", del_rec_integration)
+    ensure_route(apigw, recs_api, "POST /recommendations/import", import_rec_integration)
 
     recs_auth_id = ensure_authorizer(apigw, recs_api, "JWT-REC", cognito_issuer, client_id)
     attach_authorizer(apigw, recs_api, "POST /recommendations", recs_auth_id)
     attach_authorizer(apigw, recs_api, "DELETE /recommendations/{spotId}", recs_auth_id)
+    attach_authorizer(apigw, recs_api, "POST /recommendations/import", recs_auth_id)
 
     add_lambda_permission(
         lambda_client,
@@ -1070,12 +1694,22 @@ def deploy_all() -> None:
         "apigateway.amazonaws.com",
         f"arn:aws:execute-api:{region}:{account_id}:{recs_api}/*/*",
     )
+    add_lambda_permission(
+        lambda_client,
+        import_rec_fn,
+        "recommendations-api-import",
+        "apigateway.amazonaws.com",
+        f"arn:aws:execute-api:{region}:{account_id}:{recs_api}/*/*",
+    )
 
     set_output(outputs, "VITE_FAVORITES_API_BASE", f"https://{favorites_api}.execute-api.{region}.amazonaws.com")
     set_output(outputs, "VITE_RECOMMENDATIONS_API_BASE", f"https://{recs_api}.execute-api.{region}.amazonaws.com")
     set_output(outputs, "USERS_TABLE", users_table)
     set_output(outputs, "FAV_TABLE", fav_table)
     set_output(outputs, "REC_TABLE", rec_table)
+    set_output(outputs, "REC_DETAILS_TABLE", rec_details_table)
+    set_output(outputs, "REC_CLUSTERS_TABLE", rec_clusters_table)
+    set_output(outputs, "REC_SEARCH_TABLE", rec_search_table)
 
     # Frontend
     if not is_truthy(get_setting(config, "SKIP_FRONTEND", "")):
@@ -1100,6 +1734,12 @@ def deploy_all() -> None:
         put_site_bucket_policy(s3, site_bucket, account_id, dist_id)
 
         site_url = f"https://{dist_domain}"
+        snapshot_enabled = is_truthy(get_setting(config, "REC_SNAPSHOT", "1"))
+        snapshot_prefix = get_setting(config, "REC_SNAPSHOT_PREFIX", "data/recommendations").strip("/")
+        # Earlier deploys granted the snapshot's S3 and stream access to the shared role.
+        delete_role_policy_if_exists(iam, role_name, "vela-snapshot-access")
+        if snapshot_enabled:
+            set_output(outputs, "VITE_RECOMMENDATIONS_SNAPSHOT_URL", f"{site_url}/{snapshot_prefix}/latest.json")
         set_output(outputs, "SITE_BUCKET_NAME", site_bucket)
         set_output(outputs, "CLOUDFRONT_DISTRIBUTION_ID", dist_id)
         set_output(outputs, "CLOUDFRONT_DOMAIN", site_url)
@@ -1133,6 +1773,7 @@ def deploy_all() -> None:
                 "VITE_LIGHTMAP_API_BASE",
                 "VITE_FAVORITES_API_BASE",
                 "VITE_RECOMMENDATIONS_API_BASE",
+                "VITE_RECOMMENDATIONS_SNAPSHOT_URL",
                 "VITE_COGNITO_DOMAIN",
                 "VITE_COGNITO_CLIENT_ID",
                 "VITE_COGNITO_REDIRECT_URI",
@@ -1147,6 +1788,48 @@ def deploy_all() -> None:
             raise RuntimeError(f"Build output not found: {build_dir}")
         upload_directory(s3, build_dir, site_bucket)
 
+        if snapshot_enabled:
+            snapshot_fn = get_setting(config, "REC_SNAPSHOT_LAMBDA", "PublishRecommendationsSnapshot")
+            rec_stream_arn = ensure_stream(dynamodb, rec_table)
+            snapshot_role_arn = ensure_snapshot_role(
+                iam,
+                get_setting(config, "REC_SNAPSHOT_ROLE_NAME", "vela-snapshot-role"),
+                site_bucket,
+                snapshot_prefix,
+                [
+                    f"arn:aws:dynamodb:{region}:{account_id}:table/{name}"
+                    for name in (rec_table, rec_details_table, meta_table)
+                ],
+                rec_stream_arn,
+            )
+            package_python_lambda(
+                "publish_recommendations_snapshot",
+                LAMBDA_SRC_DIR / "publish_recommendations_snapshot.py",
+                ARTIFACTS_DIR / f"{snapshot_fn}.zip",
+                extra_modules=schema_modules,
+                requirements=["brotli"],
+                runtime=py_runtime,
+            )
+            upsert_lambda(
+                lambda_client,
+                snapshot_fn,
+                py_runtime,
+                "publish_recommendations_snapshot.lambda_handler",
+                snapshot_role_arn,
+                ARTIFACTS_DIR / f"{snapshot_fn}.zip",
+                env_vars={**rec_env, "SNAPSHOT_BUCKET": site_bucket, "SNAPSHOT_PREFIX": snapshot_prefix},
+                timeout=60,
+                memory=512,
+                layers=[common_layer_arn],
+            )
+            ensure_event_source_mapping(
+                lambda_client,
+                snapshot_fn,
+                rec_stream_arn,
+                int(get_setting(config, "REC_SNAPSHOT_BATCH_WINDOW", "20")),
+            )
+            lambda_client.invoke(FunctionName=snapshot_fn, InvocationType="Event", Payload=b"{}")
+
     cloudfront_domain = outputs.get("CLOUDFRONT_DOMAIN", "")
     print(f"Deploy complete. Outputs saved to {OUTPUTS_PATH}")
     print("Wait another minute or two for CloudFront to finish setting up.")
@@ -1155,4 +1838,7 @@ def deploy_all() -> None:
 
 
 if __name__ == "__main__":
-    deploy_all()
+    if len(sys.argv) > 1 and sys.argv[1] == "planet-grid":
+        refresh_planet_grid()
+    else:
+        deploy_all()
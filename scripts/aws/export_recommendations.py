@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+import argparse
+import gzip
+import queue
+import sys
+import threading
+import time
+
+from deploy import CONFIG_PATH, LAMBDA_SRC_DIR, boto_session, get_setting, load_env_file
+
+sys.path.insert(0, str(LAMBDA_SRC_DIR))
+
+from vela_common import codec  # noqa: E402
+
+BATCH_GET_SIZE = 100
+# S3 multipart parts must be at least 5 MiB (except the last one).
+S3_PART_SIZE = 8 * 1024 * 1024
+PROGRESS_EVERY = 10000
+
+
+class S3Writer:
+    """Write-only file object that streams into an S3 multipart upload."""
+
+    def __init__(self, s3, bucket: str, key: str):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.buffer = bytearray()
+        self.parts = []
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer.extend(data)
+        if len(self.buffer) >= S3_PART_SIZE:
+            self._flush_part()
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _flush_part(self) -> None:
+        number = len(self.parts) + 1
+        out = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=bytes(self.buffer)
+        )
+        self.parts.append({"ETag": out["ETag"], "PartNumber": number})
+        self.buffer.clear()
+
+    def close(self) -> None:
+        if self.buffer or not self.parts:
+            self._flush_part()
+        self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": self.parts}
+        )
+
+    def abort(self) -> None:
+        self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+
+
+def with_details(dynamodb, details_name: str, items: list) -> list:
+    missing = [item["spotId"] for item in items if "data" not in item and not item.get("deleted")]
+    details = {}
+    for start in range(0, len(missing), BATCH_GET_SIZE):
+        request = {details_name: {"Keys": [{"spotId": spot_id} for spot_id in missing[start:start + BATCH_GET_SIZE]]}}
+        attempt = 0
+        while request:
+            out = dynamodb.batch_get_item(RequestItems=request)
+            for detail in out.get("Responses", {}).get(details_name, []):
+                details[detail["spotId"]] = detail.get("data")
+            request = out.get("UnprocessedKeys") or None
+            if request:
+                attempt += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+    return [{**item, "data": details[item["spotId"]]} if item["spotId"] in details else item for item in items]
+
+
+def parallel_scan(session, table_name: str, segments: int, details_name: str | None = None, include_deleted: bool = False):
+    """Yield every item of ``table_name`` using ``segments`` concurrent Scan segments.
+
+    Each segment runs on its own thread with its own resource (resources are
+    not thread-safe) and hands pages over a bounded queue, so memory stays at
+    a few pages however large the table is.
+    """
+    pages = queue.Queue(maxsize=segments * 2)
+    done = object()
+    stop = threading.Event()
+    resources = [session.resource("dynamodb") for _ in range(segments)]
+
+    def scan_segment(segment: int) -> None:
+        try:
+            dynamodb = resources[segment]
+            table = dynamodb.Table(table_name)
+            kwargs = {"Segment": segment, "TotalSegments": segments}
+            while not stop.is_set():
+                out = table.scan(**kwargs)
+                items = out.get("Items", [])
+                if not include_deleted:
+                    items = [item for item in items if not item.get("deleted")]
+                if details_name and items:
+                    items = with_details(dynamodb, details_name, items)
+                pages.put(items)
+                if "LastEvaluatedKey" not in out:
+                    break
+                kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+            pages.put(done)
+        except Exception as exc:
+            pages.put(exc)
+
+    threads = [threading.Thread(target=scan_segment, args=(segment,), daemon=True) for segment in range(segments)]
+    for thread in threads:
+        thread.start()
+    finished = 0
+    try:
+        while finished < segments:
+            page = pages.get()
+            if page is done:
+                finished += 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        stop.set()
+        # Unblock producers stuck on a full queue so the threads can exit.
+        while any(thread.is_alive() for thread in threads):
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield codec.dumpb(item) + b"\n"
+
+
+def open_output(session, target: str, compress: bool):
+    """(binary file object, finish(ok)) for a local path, "-" (stdout) or s3://bucket/key."""
+    if target.startswith("s3://"):
+        bucket, _, key = target[len("s3://"):].partition("/")
+        if not bucket or not key:
+            raise ValueError("S3 output must look like s3://bucket/key")
+        raw = S3Writer(session.client("s3"), bucket, key)
+    elif target == "-":
+        raw = sys.stdout.buffer
+    else:
+        raw = open(target, "wb")
+    stream = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) if compress else raw
+
+    def finish(ok: bool) -> None:
+        if stream is not raw:
+            stream.close()
+        if isinstance(raw, S3Writer):
+            if ok:
+                raw.close()
+            else:
+                raw.abort()
+        elif raw is not sys.stdout.buffer:
+            raw.close()
+
+    return stream, finish
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export a recommendations table as NDJSON using a parallel scan.")
+    parser.add_argument("output", help="file path, '-' for stdout, or s3://bucket/key")
+    parser.add_argument("--table", help="table to export (default: REC_TABLE)")
+    parser.add_argument("--segments", type=int, default=8, help="Scan TotalSegments, one thread each")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output (implied by a .gz suffix)")
+    parser.add_argument("--with-details", action="store_true", help="join each summary with its posted body")
+    parser.add_argument("--include-deleted", action="store_true", help="also export delete tombstones")
+    args = parser.parse_args()
+    if args.segments < 1:
+        parser.error("--segments must be at least 1")
+
+    config = load_env_file(CONFIG_PATH)
+    region = get_setting(config, "AWS_REGION", "us-east-1")
+    profile = get_setting(config, "AWS_PROFILE", "").strip() or None
+    session = boto_session(region, profile)
+    table_name = args.table or get_setting(config, "REC_TABLE", "Recommendations")
+    details_name = get_setting(config, "REC_DETAILS_TABLE", "RecommendationDetails") if args.with_details else None
+
+    stream, finish = open_output(session, args.output, args.gzip or args.output.endswith(".gz"))
+    started = time.perf_counter()
+    count = 0
+    size = 0
+    ok = False
+    try:
+        items = parallel_scan(session, table_name, args.segments, details_name, args.include_deleted)
+        for line in ndjson_lines(items):
+            stream.write(line)
+            count += 1
+            size += len(line)
+            if count % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - started
+                print(f"{count} items, {count / elapsed:.0f} items/s", file=sys.stderr)
+        ok = True
+    finally:
+        finish(ok)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Exported {count} items ({size / 1e6:.1f} MB uncompressed) from {table_name} in {elapsed:.1f}s "
+        f"({count / elapsed if elapsed else 0:.0f} items/s, {args.segments} segments)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
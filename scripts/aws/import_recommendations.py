@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from pathlib import Path
+
+from deploy import CONFIG_PATH, LAMBDA_SRC_DIR, boto_session, get_setting, load_env_file
+
+sys.path.insert(0, str(LAMBDA_SRC_DIR))
+
+import recommendation_import  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import recommendations from a JSON, NDJSON or CSV file.")
+    parser.add_argument("path", type=Path, help="file to import")
+    parser.add_argument("--format", choices=recommendation_import.FORMATS, help="default: from the file extension")
+    parser.add_argument("--workers", type=int, default=recommendation_import.DEFAULT_WORKERS, help="concurrent chunks")
+    parser.add_argument("--created-by", help="createdBy stamped on imported rows")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check conflicts without writing")
+    args = parser.parse_args()
+
+    config = load_env_file(CONFIG_PATH)
+    text = args.path.read_text(encoding="utf-8-sig")
+    fmt = args.format or recommendation_import.detect_format(text, args.path.suffix.lstrip("."))
+    try:
+        rows = recommendation_import.parse_rows(text, fmt)
+    except ValueError as exc:
+        print(f"ERROR: {exc}")
+        return 1
+
+    region = get_setting(config, "AWS_REGION", "us-east-1")
+    profile = get_setting(config, "AWS_PROFILE", "").strip() or None
+    dynamodb = boto_session(region, profile).resource("dynamodb")
+
+    def optional_table(key: str, default: str):
+        name = get_setting(config, key, default).strip()
+        return dynamodb.Table(name) if name else None
+
+    report = recommendation_import.import_rows(
+        rows,
+        dynamodb.Table(get_setting(config, "REC_TABLE", "Recommendations")),
+        dynamodb.Table(get_setting(config, "REC_DETAILS_TABLE", "RecommendationDetails")),
+        clusters_table=optional_table("REC_CLUSTERS_TABLE", "RecommendationClusters"),
+        search_table=optional_table("REC_SEARCH_TABLE", "RecommendationSearch"),
+        meta_table=optional_table("META_TABLE", "VelaMeta"),
+        created_by=args.created_by,
+        workers=args.workers,
+        dry_run=args.dry_run,
+    )
+
+    for error in report["errors"]:
+        print(f"row {error['row']}: {error['message']}")
+    for conflict in report["conflicts"]:
+        print(f"row {conflict['row']}: {conflict['spotId']}: {conflict['message']}")
+    for failure in report["failed"]:
+        print(f"row {failure['row']}: {failure['spotId']}: not written: {failure['message']}")
+    for warning in report.get("warnings", []):
+        print(f"WARNING: {warning}")
+    rate = report["imported"] / report["seconds"] if report["seconds"] else 0.0
+    print(
+        f"{'Would import' if args.dry_run else 'Imported'} {report['imported']} of {report['received']} rows "
+        f"({len(report['conflicts'])} conflicts, {len(report['errors'])} invalid, {len(report['failed'])} failed) "
+        f"in {report['seconds']:.1f}s "
+        f"({rate:.0f} rows/s)"
+    )
+    if report["failed"]:
+        return 3
+    return 0 if not report["errors"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
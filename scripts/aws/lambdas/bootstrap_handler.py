@@ -0,0 +1,134 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import get_favorites_handler
+import get_recommendations_handler
+import visible_planets_lambda
+from vela_common.auth import get_claims
+from vela_common.responses import response
+
+# Each section must answer within this many seconds; a slow one comes back
+# as a 504 section instead of holding up the others.
+SECTION_TIMEOUT = float(os.environ.get("BOOTSTRAP_SECTION_TIMEOUT", "8"))
+# Time kept back from the invocation's own deadline to encode the response.
+RESPONSE_MARGIN = 0.5
+
+# The same queries the map issues on load: favorites as map markers, the
+# recommendation summaries (with a sync cursor) and the sky overhead.
+FAVORITES_PARAMS = {"view": "map", "all": "true"}
+RECOMMENDATIONS_PARAMS = {"all": "true", "view": "full"}
+
+
+class SectionContext:
+    """The part of a Lambda context the sections read: the time they have left."""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self.deadline - time.perf_counter()) * 1000))
+
+
+def parse_location(params):
+    lat = params.get("lat")
+    lon = params.get("lon")
+    if lat in (None, "") and lon in (None, ""):
+        return None
+    try:
+        lat = float(lat)
+        lon = float(lon)
+    except (TypeError, ValueError):
+        raise ValueError("lat and lon must both be numbers")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("lat/lon are out of range")
+    return lat, lon
+
+
+def section_events(event, location):
+    request_context = event.get("requestContext", {})
+    events = {
+        "favorites": (get_favorites_handler, {
+            "routeKey": "GET /favorites",
+            "requestContext": request_context,
+            "queryStringParameters": dict(FAVORITES_PARAMS),
+        }),
+        "recommendations": (get_recommendations_handler, {
+            "routeKey": "GET /recommendations",
+            "queryStringParameters": dict(RECOMMENDATIONS_PARAMS),
+        }),
+    }
+    if location is not None:
+        events["planets"] = (visible_planets_lambda, {
+            "routeKey": "GET /visible-planets-lambda",
+            "queryStringParameters": {"lat": str(location[0]), "lon": str(location[1])},
+        })
+    return events
+
+
+def run_section(module, section_event, section_context):
+    started = time.perf_counter()
+    out = module.lambda_handler(section_event, section_context)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    try:
+        body = json.loads(out.get("body") or "null")
+    except ValueError:
+        body = None
+    if out["statusCode"] == 200:
+        return {"status": 200, "data": body}, elapsed_ms
+    message = body.get("message") if isinstance(body, dict) else None
+    return {"status": out["statusCode"], "error": message or "Section failed"}, elapsed_ms
+
+
+def lambda_handler(event, context):
+    try:
+        claims = get_claims(event)
+        if not claims or not claims.get("sub"):
+            return response(401, {"message": "Unauthorized"})
+
+        params = event.get("queryStringParameters") or {}
+        try:
+            location = parse_location(params)
+        except ValueError as exc:
+            return response(400, {"message": str(exc)})
+
+        started = time.perf_counter()
+        budget = SECTION_TIMEOUT
+        if context is not None:
+            budget = min(budget, context.get_remaining_time_in_millis() / 1000 - RESPONSE_MARGIN)
+        deadline = started + max(0.0, budget)
+        events = section_events(event, location)
+
+        # A pool per invocation: a section that overruns keeps its thread,
+        # but only until this invocation gives up on it, and never delays
+        # the sections of the next request.
+        executor = ThreadPoolExecutor(max_workers=len(events))
+        try:
+            futures = {
+                name: executor.submit(run_section, module, section_event, SectionContext(deadline))
+                for name, (module, section_event) in events.items()
+            }
+
+            sections = {}
+            timings = {}
+            for name, future in futures.items():
+                try:
+                    sections[name], timings[name] = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                except TimeoutError:
+                    sections[name] = {"status": 504, "error": "Timed out"}
+                    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+                except Exception as exc:
+                    print("ERROR:", name, str(exc))
+                    sections[name] = {"status": 500, "error": "Server error"}
+                    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+
+        server_timing = ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
+        return response(200, {**sections, "timings": timings}, {"Server-Timing": server_timing})
+
+    except Exception as exc:
+        print("ERROR:", str(exc))
+        return response(500, {"message": "Server error"})
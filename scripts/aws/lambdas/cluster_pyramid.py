@@ -0,0 +1,165 @@
+import math
+from decimal import Decimal
+
+import geo
+import spatial_index
+
+# One cluster level per geohash precision. Each cluster item is keyed by
+# (level, cell) and keeps a member count, the sum of its members' unit
+# vectors (the centroid, once normalised) and one representative spotId.
+# Posts and deletes ADD into every level in the same transaction as the
+# summary write, so the pyramid never needs a full rebuild to stay current.
+CLUSTER_PRECISIONS = tuple(range(1, 8))
+MAX_ZOOM = 22
+
+
+def precision_for_zoom(zoom):
+    """Cluster level whose cells are about a quarter of a map tile wide."""
+    return min(max((zoom + 2) * 2 // 5, CLUSTER_PRECISIONS[0]), CLUSTER_PRECISIONS[-1])
+
+
+def cluster_cells(lat, lon):
+    cell = geo.encode(lat, lon, CLUSTER_PRECISIONS[-1])
+    return [(precision, cell[:precision]) for precision in CLUSTER_PRECISIONS]
+
+
+def number(value):
+    return Decimal(repr(round(value, 12)))
+
+
+def cluster_writes(clusters_table, spot_id, lat, lon, sign, drop_representative=()):
+    """TransactWriteItems-style (table, action) pairs adding or removing one spot.
+
+    ``sign`` is 1 for a new spot and -1 for a deleted one. Cells named in
+    ``drop_representative`` lose their representative (the deleted spot).
+    """
+    x, y, z = spatial_index.unit_vector(lat, lon)
+    writes = []
+    for precision, cell in cluster_cells(lat, lon):
+        values = {":n": sign, ":x": number(sign * x), ":y": number(sign * y), ":z": number(sign * z)}
+        expression = "ADD #count :n, sx :x, sy :y, sz :z"
+        if sign > 0:
+            expression += " SET rep = if_not_exists(rep, :spot)"
+            values[":spot"] = spot_id
+        elif cell in drop_representative:
+            expression += " REMOVE rep"
+        writes.append((clusters_table, {"Update": {
+            "Key": {"level": precision, "cell": cell},
+            "UpdateExpression": expression,
+            "ExpressionAttributeNames": {"#count": "count"},
+            "ExpressionAttributeValues": values,
+        }}))
+    return writes
+
+
+def represented_by(clusters_table, spot_id, lat, lon):
+    """Cells (at any level) whose representative is ``spot_id``."""
+    client = clusters_table.meta.client
+    keys = [{"level": precision, "cell": cell} for precision, cell in cluster_cells(lat, lon)]
+    out = client.batch_get_item(RequestItems={clusters_table.name: {
+        "Keys": keys,
+        "ProjectionExpression": "cell, rep",
+        "ConsistentRead": True,
+    }})
+    # Seven small keys never exceed the batch limits, so nothing is unprocessed.
+    items = out.get("Responses", {}).get(clusters_table.name, [])
+    return {item["cell"] for item in items if item.get("rep") == spot_id}
+
+
+def find_member(table, cell, exclude):
+    """spotId of a live recommendation inside ``cell`` other than ``exclude``, or None."""
+    prefixes = [cell] if len(cell) >= geo.INDEX_PRECISIONS[0] else [cell + c for c in geo.BASE32]
+    for prefix in prefixes:
+        index_precision = max(p for p in geo.INDEX_PRECISIONS if p <= len(prefix))
+        params = {
+            "IndexName": f"gh{index_precision}-index",
+            "KeyConditionExpression": "#index = :index",
+            "ExpressionAttributeNames": {"#index": f"gh{index_precision}"},
+            "ExpressionAttributeValues": {":index": prefix[:index_precision]},
+            "ProjectionExpression": "spotId",
+            "Limit": 2,
+        }
+        if len(prefix) > index_precision:
+            params["KeyConditionExpression"] += " AND begins_with(#gh, :prefix)"
+            params["ExpressionAttributeNames"]["#gh"] = "gh"
+            params["ExpressionAttributeValues"][":prefix"] = prefix
+        # The index is eventually consistent, so the deleted spot may still show.
+        out = table.query(**params)
+        for item in out.get("Items", []):
+            if item["spotId"] != exclude:
+                return item["spotId"]
+    return None
+
+
+def refill_representatives(table, clusters_table, cells, exclude):
+    for cell in sorted(cells):
+        spot_id = find_member(table, cell, exclude)
+        if spot_id is None:
+            continue
+        try:
+            clusters_table.update_item(
+                Key={"level": len(cell), "cell": cell},
+                UpdateExpression="SET rep = if_not_exists(rep, :spot)",
+                ConditionExpression="#count > :zero",
+                ExpressionAttributeNames={"#count": "count"},
+                ExpressionAttributeValues={":spot": spot_id, ":zero": 0},
+            )
+        except clusters_table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+
+def centroid(item):
+    x, y, z = (float(item.get(axis, 0)) for axis in ("sx", "sy", "sz"))
+    norm = math.sqrt(x * x + y * y + z * z)
+    if norm == 0:
+        return None
+    return math.degrees(math.asin(max(-1.0, min(1.0, z / norm)))), math.degrees(math.atan2(y, x))
+
+
+def cluster_view(item):
+    position = centroid(item)
+    if position is None:
+        return None
+    view = {
+        "cell": item["cell"],
+        "count": int(item["count"]),
+        "lat": round(position[0], 6),
+        "lon": round(position[1], 6),
+    }
+    if item.get("rep"):
+        view["spotId"] = item["rep"]
+    return view
+
+
+def merge_params(item):
+    """update_item arguments adding an aggregated cluster item into the stored one."""
+    return {
+        "Key": {"level": item["level"], "cell": item["cell"]},
+        "UpdateExpression": "ADD #count :n, sx :x, sy :y, sz :z SET rep = if_not_exists(rep, :spot)",
+        "ExpressionAttributeNames": {"#count": "count"},
+        "ExpressionAttributeValues": {
+            ":n": item["count"],
+            ":x": item["sx"],
+            ":y": item["sy"],
+            ":z": item["sz"],
+            ":spot": item["rep"],
+        },
+    }
+
+
+def aggregate(points):
+    """Cluster items for every level from [(spotId, lat, lon)], for rebuilds and bulk imports."""
+    clusters = {}
+    for spot_id, lat, lon in points:
+        x, y, z = spatial_index.unit_vector(lat, lon)
+        for precision, cell in cluster_cells(lat, lon):
+            entry = clusters.setdefault((precision, cell), [0, 0.0, 0.0, 0.0, spot_id])
+            entry[0] += 1
+            entry[1] += x
+            entry[2] += y
+            entry[3] += z
+            entry[4] = min(entry[4], spot_id)
+    return [
+        {"level": precision, "cell": cell, "count": n, "sx": number(sx), "sy": number(sy), "sz": number(sz), "rep": rep}
+        for (precision, cell), (n, sx, sy, sz, rep) in clusters.items()
+    ]
@@ -1,10 +1,7 @@
 import os
 from datetime import datetime, timezone
 
-import boto3
-from botocore.exceptions import ClientError
-
-dynamodb = boto3.resource("dynamodb")
+from vela_common import dynamo
 
 
 def lambda_handler(event, context):
@@ -25,7 +22,7 @@ def lambda_handler(event, context):
         return event
 
     table_name = os.environ["USERS_TABLE"]
-    table = dynamodb.Table(table_name)
+    table = dynamo.Table(table_name)
 
     item = {
         "userId": user_id,
@@ -39,8 +36,7 @@ def lambda_handler(event, context):
             Item=item,
             ConditionExpression="attribute_not_exists(userId)",
         )
-    except ClientError as exc:
-        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
-            raise
+    except dynamo.client().exceptions.ConditionalCheckFailedException:
+        pass
 
     return event
@@ -1,29 +1,14 @@
 import os
-import json
-import boto3
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ["FAV_TABLE"])
+import version_stamps
+from vela_common import dynamo
+from vela_common.auth import get_claims
+from vela_common.responses import response
 
+table = dynamo.Table(os.environ["FAV_TABLE"])
 
-def get_claims(event):
-    return (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("jwt", {})
-        .get("claims")
-    )
-
-
-def response(status, body):
-    return {
-        "statusCode": status,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-        },
-        "body": json.dumps(body),
-    }
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
 
 
 def lambda_handler(event, context):
@@ -44,12 +29,23 @@ def lambda_handler(event, context):
         if not spot_id:
             return response(400, {"message": "spotId required"})
 
-        table.delete_item(
-            Key={
-                "userId": user_id,
-                "spotId": spot_id,
-            }
-        )
+        key = {
+            "userId": user_id,
+            "spotId": spot_id,
+        }
+        if meta_table is not None:
+            # Only bump the user's stamp when something was actually removed.
+            try:
+                version_stamps.write_with_bump(
+                    meta_table,
+                    version_stamps.favorites_key(user_id),
+                    (table, {"Delete": {"Key": key, "ConditionExpression": "attribute_exists(spotId)"}}),
+                )
+            except dynamo.client().exceptions.TransactionCanceledException as exc:
+                if not version_stamps.condition_failed(exc):
+                    raise
+        else:
+            table.delete_item(Key=key)
 
         return response(200, {"message": "Deleted"})
 
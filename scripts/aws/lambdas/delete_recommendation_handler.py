@@ -1,61 +1,100 @@
 import os
-import json
-import boto3
+from datetime import datetime, timezone
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ["REC_TABLE"])
+import cluster_pyramid
+import geo
+import recommendation_schema
+import search_index
+import version_stamps
+from vela_common import dynamo, responses
+from vela_common.auth import get_claims, is_admin
 
+table = dynamo.Table(os.environ["REC_TABLE"])
+details_table = dynamo.Table(os.environ["REC_DETAILS_TABLE"])
 
-def get_claims(event):
-    claims = (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("jwt", {})
-        .get("claims")
-    )
-    if claims:
-        return claims
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
 
-    return (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("claims")
-    )
+CLUSTERS_TABLE = os.environ.get("REC_CLUSTERS_TABLE")
+clusters_table = dynamo.Table(CLUSTERS_TABLE) if CLUSTERS_TABLE else None
 
+SEARCH_TABLE = os.environ.get("REC_SEARCH_TABLE")
+search_table = dynamo.Table(SEARCH_TABLE) if SEARCH_TABLE else None
 
-def is_admin(claims):
-    groups = claims.get("cognito:groups")
-    if not groups:
-        return False
-
-    if isinstance(groups, list):
-        return any(str(g).strip().lower() == "admin" for g in groups)
-
-    if isinstance(groups, str):
-        s = groups.strip()
 
-        if s.startswith("[") and s.endswith("]"):
-            inner = s[1:-1].strip()
-            parts = [p.strip().strip('"').strip("'") for p in inner.split(",") if p.strip()]
-            return any(p.lower() == "admin" for p in parts)
+# Reads and conditional writes tried before a delete racing edits gives up.
+DELETE_ATTEMPTS = 3
 
-        parts = [p.strip() for p in s.split(",") if p.strip()]
-        return any(p.lower() == "admin" for p in parts)
-
-    return False
+CORS_HEADERS = {
+    "Access-Control-Allow-Headers": "Content-Type,Authorization",
+    "Access-Control-Allow-Methods": "DELETE,OPTIONS",
+}
 
 
 def response(status, body):
-    return {
-        "statusCode": status,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type,Authorization",
-            "Access-Control-Allow-Methods": "DELETE,OPTIONS",
+    return responses.response(status, body, CORS_HEADERS)
+
+
+def tombstone(item, deleted_by):
+    """Replace ``item`` with a tombstone; False when it changed since it was read."""
+    spot_id = item["spotId"]
+    # Replace the item with a tombstone so delta sync clients learn about
+    # the deletion; old tombstones are purged by compact-tombstones. It keeps
+    # the spot's geohash so area-scoped deltas can place the deletion, and
+    # the clusters and postings are removed using the stored position and
+    # text.
+    now = datetime.now(timezone.utc)
+    put = {
+        "Item": {
+            "spotId": spot_id,
+            "deleted": True,
+            "deletedAt": now.isoformat(),
+            "deletedBy": deleted_by,
+            **version_stamps.change_stamp(now),
+            **{name: item[name] for name in geo.INDEX_ATTRIBUTES if name in item},
         },
-        "body": json.dumps(body),
+        "ConditionExpression": "attribute_exists(spotId) AND attribute_not_exists(#deleted)",
+        "ExpressionAttributeNames": {"#deleted": "deleted"},
     }
+    if "updatedAt" in item:
+        put["ConditionExpression"] += " AND updatedAt = :stamp"
+        put["ExpressionAttributeValues"] = {":stamp": item["updatedAt"]}
+
+    clusters = []
+    drop = set()
+    body = None
+    position = recommendation_schema.position(item)
+    if clusters_table is not None and position is not None:
+        drop = cluster_pyramid.represented_by(clusters_table, spot_id, *position)
+        clusters = cluster_pyramid.cluster_writes(clusters_table, spot_id, *position, -1, drop)
+    if search_table is not None:
+        body = item.get("data") or (details_table.get_item(Key={"spotId": spot_id}).get("Item") or {}).get("data")
+    try:
+        if meta_table is not None:
+            version_stamps.write_with_bump(
+                meta_table,
+                version_stamps.CATALOGUE_KEY,
+                (table, {"Put": put}),
+                (details_table, {"Delete": {"Key": {"spotId": spot_id}}}),
+                *clusters,
+            )
+        else:
+            table.put_item(**put)
+            details_table.delete_item(Key={"spotId": spot_id})
+            for target, action in clusters:
+                target.update_item(**action["Update"])
+    except dynamo.client().exceptions.ConditionalCheckFailedException:
+        return False
+    except dynamo.client().exceptions.TransactionCanceledException as exc:
+        if not version_stamps.condition_failed(exc):
+            raise
+        return False
+
+    if drop:
+        cluster_pyramid.refill_representatives(table, clusters_table, drop, spot_id)
+    if body:
+        search_index.remove_postings(search_table, spot_id, body)
+    return True
 
 
 def lambda_handler(event, context):
@@ -71,9 +110,17 @@ def lambda_handler(event, context):
         if not spot_id:
             return response(400, {"message": "spotId path parameter is required"})
 
-        table.delete_item(Key={"spotId": spot_id})
-
-        return response(200, {"message": "Deleted", "spotId": spot_id})
+        # The tombstone is written only if the item is unchanged since it was
+        # read. An edit in between makes the read stale, so read it again.
+        for _ in range(DELETE_ATTEMPTS):
+            item = table.get_item(Key={"spotId": spot_id}, ConsistentRead=True).get("Item")
+            if not item or item.get("deleted"):
+                # Missing or already deleted: deleting stays idempotent.
+                return response(200, {"message": "Deleted", "spotId": spot_id})
+            if tombstone(item, claims.get("sub")):
+                return response(200, {"message": "Deleted", "spotId": spot_id})
+
+        return response(409, {"message": "The spot changed while it was being deleted; try again"})
 
     except Exception as exc:
         print("ERROR:", str(exc))
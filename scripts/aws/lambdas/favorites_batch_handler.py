@@ -0,0 +1,190 @@
+import os
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import version_stamps
+from vela_common import dynamo
+from vela_common.auth import get_claims
+from vela_common.responses import response
+
+table = dynamo.Table(os.environ["FAV_TABLE"])
+client = table.meta.client
+
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
+
+MAX_ITEMS = int(os.environ.get("FAV_BATCH_MAX_ITEMS", "500"))
+CONCURRENCY = int(os.environ.get("FAV_BATCH_CONCURRENCY", "4"))
+TRANSACT_SIZE = 100
+MAX_ATTEMPTS = 8
+
+executor = ThreadPoolExecutor(max_workers=CONCURRENCY)
+
+
+class BadRequest(Exception):
+    pass
+
+
+def to_fixed6(x):
+    return f"{float(x):.6f}"
+
+
+def is_number(value):
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    # json.loads accepts NaN and Infinity; neither is a coordinate.
+    if not math.isfinite(value):
+        raise BadRequest("lat and lon must be finite numbers")
+    return True
+
+
+def parse_entries(body, deleting):
+    """[(spotId or None, lat, lon)] in request order; POST needs coordinates, DELETE accepts spotIds."""
+    if not isinstance(body, dict):
+        raise BadRequest("Body must be a JSON object")
+    entries = []
+    for item in body.get("items") or []:
+        if isinstance(item, dict) and is_number(item.get("lat")) and is_number(item.get("lon")):
+            entries.append((f"{to_fixed6(item['lat'])},{to_fixed6(item['lon'])}", item["lat"], item["lon"]))
+        elif deleting and isinstance(item, dict) and isinstance(item.get("spotId"), str) and item["spotId"]:
+            entries.append((item["spotId"], None, None))
+        else:
+            entries.append((None, None, None))
+    if deleting:
+        for spot_id in body.get("spotIds") or []:
+            entries.append((spot_id, None, None) if isinstance(spot_id, str) and spot_id else (None, None, None))
+    if not entries:
+        raise BadRequest("items (or spotIds for DELETE) must be a non-empty list")
+    if len(entries) > MAX_ITEMS:
+        raise BadRequest(f"At most {MAX_ITEMS} favorites per request")
+    return entries
+
+
+def write_chunk(actions):
+    """Apply [(spotId, action)] as one transaction; returns the spot ids written.
+
+    Actions whose condition fails (already a favorite, or not one) are left
+    out and the rest retried, so every spot id is classified exactly.
+    """
+    pending = list(actions)
+    attempt = 0
+    while pending:
+        try:
+            client.transact_write_items(TransactItems=[action for _, action in pending])
+            return {spot_id for spot_id, _ in pending}
+        except dynamo.client().exceptions.TransactionCanceledException as exc:
+            reasons = exc.response.get("CancellationReasons") or []
+            failed = {i for i, reason in enumerate(reasons) if reason.get("Code") == "ConditionalCheckFailed"}
+            if failed:
+                pending = [entry for i, entry in enumerate(pending) if i not in failed]
+                continue
+            # Throttled or racing another transaction on the same keys.
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS:
+                raise
+            time.sleep(min(0.05 * 2 ** attempt, 1.0))
+    return set()
+
+
+def write_all(actions, written, failed):
+    """Write ``actions`` in transactions, adding spot ids to ``written`` or ``failed``.
+
+    Each transaction is all or nothing, so a chunk that gives up leaves its
+    spot ids unwritten and the other chunks still count.
+    """
+    chunks = [actions[start:start + TRANSACT_SIZE] for start in range(0, len(actions), TRANSACT_SIZE)]
+    futures = [(chunk, executor.submit(write_chunk, chunk)) for chunk in chunks]
+    for chunk, future in futures:
+        try:
+            written |= future.result()
+        except Exception as exc:
+            print("ERROR:", str(exc))
+            failed.update(spot_id for spot_id, _ in chunk)
+
+
+def lambda_handler(event, context):
+    try:
+        claims = get_claims(event)
+        if not claims:
+            return response(401, {"message": "Unauthorized"})
+
+        user_id = claims.get("sub")
+        if not user_id:
+            return response(401, {"message": "Unauthorized (no sub claim)"})
+
+        method = event.get("requestContext", {}).get("http", {}).get("method", "POST").upper()
+        deleting = method == "DELETE"
+        entries = parse_entries(json.loads(event.get("body") or "{}"), deleting)
+
+        # Every write is conditional on the favorite's current state, so the
+        # condition result tells created from exists (and deleted from
+        # missing) even when another request races this one.
+        created_at = datetime.now(timezone.utc).isoformat()
+        results = []
+        actions = []
+        seen = set()
+        for spot_id, lat, lon in entries:
+            if spot_id is None:
+                results.append({"spotId": None, "status": "invalid"})
+                continue
+            if spot_id in seen:
+                results.append({"spotId": spot_id, "status": "duplicate"})
+                continue
+            seen.add(spot_id)
+            results.append({"spotId": spot_id, "status": None})
+            if deleting:
+                actions.append((spot_id, {"Delete": {
+                    "TableName": table.name,
+                    "Key": {"userId": user_id, "spotId": spot_id},
+                    "ConditionExpression": "attribute_exists(spotId)",
+                }}))
+            else:
+                actions.append((spot_id, {"Put": {
+                    "TableName": table.name,
+                    "Item": {
+                        "userId": user_id,
+                        "spotId": spot_id,
+                        "createdAt": created_at,
+                        "lat": Decimal(str(lat)),
+                        "lon": Decimal(str(lon)),
+                    },
+                    "ConditionExpression": "attribute_not_exists(spotId)",
+                }}))
+
+        written = set()
+        failed = set()
+        try:
+            write_all(actions, written, failed)
+        finally:
+            # Whatever was written must reach the version stamp, or a cached
+            # GET /favorites would keep answering 304.
+            if written and meta_table is not None:
+                version_stamps.bump(meta_table, version_stamps.favorites_key(user_id))
+
+        for result in results:
+            if result["status"] is None:
+                if result["spotId"] in failed:
+                    result["status"] = "failed"
+                elif deleting:
+                    result["status"] = "deleted" if result["spotId"] in written else "missing"
+                else:
+                    result["status"] = "created" if result["spotId"] in written else "exists"
+
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        return response(200, {"results": results, "counts": counts})
+
+    except BadRequest as exc:
+        return response(400, {"message": str(exc)})
+
+    except json.JSONDecodeError:
+        return response(400, {"message": "Body must be valid JSON"})
+
+    except Exception as exc:
+        print("ERROR:", str(exc))
+        return response(500, {"message": "Server error"})
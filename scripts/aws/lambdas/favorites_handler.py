@@ -1,44 +1,23 @@
 import os
 import json
-import boto3
 from datetime import datetime, timezone
 from decimal import Decimal
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ["FAV_TABLE"])
+import version_stamps
+from vela_common import dynamo
+from vela_common.auth import get_claims
+from vela_common.responses import response
 
+table = dynamo.Table(os.environ["FAV_TABLE"])
 
-def get_claims(event: dict):
-    jwt = (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("jwt", {})
-    )
-    claims = jwt.get("claims")
-    if claims:
-        return claims
-
-    return (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("claims")
-    )
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
 
 
 def to_fixed6(x):
     return f"{float(x):.6f}"
 
 
-def response(status_code: int, body: dict):
-    return {
-        "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-        },
-        "body": json.dumps(body),
-    }
-
-
 def lambda_handler(event, context):
     try:
         claims = get_claims(event)
@@ -61,16 +40,20 @@ def lambda_handler(event, context):
         spot_id = f"{to_fixed6(lat)},{to_fixed6(lon)}"
         created_at = datetime.now(timezone.utc).isoformat()
 
-        table.put_item(
-            Item={
+        put = {
+            "Item": {
                 "userId": user_id,
                 "spotId": spot_id,
                 "createdAt": created_at,
                 "lat": Decimal(str(lat)),
                 "lon": Decimal(str(lon)),
             },
-            ConditionExpression="attribute_not_exists(userId) AND attribute_not_exists(spotId)",
-        )
+            "ConditionExpression": "attribute_not_exists(userId) AND attribute_not_exists(spotId)",
+        }
+        if meta_table is not None:
+            version_stamps.write_with_bump(meta_table, version_stamps.favorites_key(user_id), (table, {"Put": put}))
+        else:
+            table.put_item(**put)
 
         return response(201, {
             "userId": user_id,
@@ -78,8 +61,13 @@ def lambda_handler(event, context):
             "createdAt": created_at,
         })
 
-    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+    except dynamo.client().exceptions.ConditionalCheckFailedException:
         return response(409, {"message": "Already favorited"})
+    except dynamo.client().exceptions.TransactionCanceledException as exc:
+        if version_stamps.condition_failed(exc):
+            return response(409, {"message": "Already favorited"})
+        print("ERROR:", str(exc))
+        return response(500, {"message": "Server error"})
     except Exception as exc:
         print("ERROR:", str(exc))
         return response(500, {"message": "Server error"})
@@ -0,0 +1,134 @@
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+
+# Precision stored on every recommendation, and the prefix lengths that are
+# copied into their own attributes so a GSI can partition on them.
+GEOHASH_PRECISION = 9
+INDEX_PRECISIONS = (2, 4)
+# Geohash attributes written by index_attributes; tombstones keep them.
+INDEX_ATTRIBUTES = ("gh",) + tuple(f"gh{precision}" for precision in INDEX_PRECISIONS)
+MAX_COVER_CELLS = 32
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = value * 2 + 1
+                lon_lo = mid
+            else:
+                value *= 2
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = value * 2 + 1
+                lat_lo = mid
+            else:
+                value *= 2
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """Height and width in degrees of a geohash cell at ``precision``."""
+    lat_bits = (5 * precision) // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def index_attributes(lat, lon):
+    """Geohash attributes written alongside a recommendation."""
+    full = encode(lat, lon)
+    attrs = {"gh": full}
+    for precision in INDEX_PRECISIONS:
+        attrs[f"gh{precision}"] = full[:precision]
+    return attrs
+
+
+def split_bbox(min_lat, min_lon, max_lat, max_lon):
+    """Split a box crossing the antimeridian (min_lon > max_lon) in two."""
+    if min_lon <= max_lon:
+        return [(min_lat, min_lon, max_lat, max_lon)]
+    return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+
+
+def cover_cells(min_lat, min_lon, max_lat, max_lon, precision):
+    height, width = cell_size(precision)
+    cells = set()
+    for box in split_bbox(min_lat, min_lon, max_lat, max_lon):
+        lat0 = max(math.floor((box[0] + 90.0) / height), 0)
+        lat1 = min(math.floor((box[2] + 90.0) / height), int(180.0 / height) - 1)
+        lon0 = max(math.floor((box[1] + 180.0) / width), 0)
+        lon1 = min(math.floor((box[3] + 180.0) / width), int(360.0 / width) - 1)
+        for i in range(lat0, lat1 + 1):
+            for j in range(lon0, lon1 + 1):
+                cells.add(encode(-90.0 + (i + 0.5) * height, -180.0 + (j + 0.5) * width, precision))
+    return cells
+
+
+def estimate_cells(min_lat, min_lon, max_lat, max_lon, precision):
+    """Upper bound on the number of cells at ``precision`` touching the box."""
+    height, width = cell_size(precision)
+    estimate = 0
+    for box in split_bbox(min_lat, min_lon, max_lat, max_lon):
+        estimate += (int((box[2] - box[0]) / height) + 2) * (int((box[3] - box[1]) / width) + 2)
+    return estimate
+
+
+def covering(min_lat, min_lon, max_lat, max_lon, max_cells=MAX_COVER_CELLS, min_precision=INDEX_PRECISIONS[0]):
+    """Finest set of geohash cells (at most ``max_cells``) covering the box, or None."""
+    for precision in range(6, min_precision - 1, -1):
+        if estimate_cells(min_lat, min_lon, max_lat, max_lon, precision) > max_cells * 4:
+            continue
+        cells = cover_cells(min_lat, min_lon, max_lat, max_lon, precision)
+        if len(cells) <= max_cells:
+            return cells
+    return None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat, lon, radius_km):
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) enclosing a circle."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = lat - d_lat
+    max_lat = lat + d_lat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    d_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+    if d_lon >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    min_lon = (lon - d_lon + 540.0) % 360.0 - 180.0
+    max_lon = (lon + d_lon + 540.0) % 360.0 - 180.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def in_bbox(lat, lon, min_lat, min_lon, max_lat, max_lon):
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    return lon >= min_lon or lon <= max_lon
@@ -1,45 +1,97 @@
 import os
 import json
-import boto3
-from decimal import Decimal
-from boto3.dynamodb.conditions import Key
+import base64
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ["FAV_TABLE"])
+import version_stamps
+from vela_common import codec, dynamo
+from vela_common.auth import get_claims
 
+table = dynamo.Table(os.environ["FAV_TABLE"], number=codec.number)
 
-def get_claims(event):
-    claims = (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("jwt", {})
-        .get("claims")
-    )
-    if claims:
-        return claims
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
 
-    return (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("claims")
-    )
+DEFAULT_LIMIT = int(os.environ.get("FAV_PAGE_LIMIT", "100"))
+MAX_LIMIT = int(os.environ.get("FAV_PAGE_MAX_LIMIT", "500"))
+# Hard cap for all=true; users past it get a nextToken like any other page
+# and a truncated flag.
+MAX_ALL_ITEMS = int(os.environ.get("FAV_MAX_ALL_ITEMS", "2000"))
+# all=true also stops following pages this close to the invocation's
+# deadline (the bootstrap section's, when called from there).
+DEADLINE_MARGIN_MS = 1000
 
+MAP_PROJECTION = "spotId, lat, lon"
+# Browsers keep the body and revalidate with If-None-Match on every use.
+ETAG_CACHE_CONTROL = "private, no-cache"
 
-def resp(status, body):
+
+class BadRequest(Exception):
+    pass
+
+
+def resp(status, body, tag=None):
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+    }
+    if tag:
+        headers["ETag"] = tag
+        headers["Cache-Control"] = ETAG_CACHE_CONTROL
+    if status == 304:
+        del headers["Content-Type"]
+        return {"statusCode": 304, "headers": headers, "body": ""}
     return {
         "statusCode": status,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-        },
-        "body": json.dumps(body, default=decimal_default),
+        "headers": headers,
+        "body": codec.dumps(body),
     }
 
 
-def decimal_default(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    raise TypeError
+def encode_token(last_key):
+    raw = codec.dumps(last_key)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token, user_id):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        last_key = json.loads(raw)
+    except Exception:
+        raise BadRequest("Invalid nextToken")
+    if not isinstance(last_key, dict) or last_key.get("userId") != user_id or not isinstance(last_key.get("spotId"), str):
+        raise BadRequest("Invalid nextToken")
+    return last_key
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    if limit < 1:
+        raise BadRequest("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def query_page(user_id, limit, start_key, forward, projected):
+    kwargs = {
+        "KeyConditionExpression": "userId = :user",
+        "ExpressionAttributeValues": {":user": user_id},
+        "Limit": limit,
+        "ScanIndexForward": forward,
+    }
+    if projected:
+        kwargs["ProjectionExpression"] = MAP_PROJECTION
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+    out = table.query(**kwargs)
+    return out.get("Items", []), out.get("LastEvaluatedKey")
+
+
+def out_of_time(context):
+    return context is not None and context.get_remaining_time_in_millis() < DEADLINE_MARGIN_MS
 
 
 def lambda_handler(event, context):
@@ -52,12 +104,58 @@ def lambda_handler(event, context):
         if not user_id:
             return resp(401, {"message": "Invalid token"})
 
-        out = table.query(
-            KeyConditionExpression=Key("userId").eq(user_id)
-        )
+        params = event.get("queryStringParameters") or {}
+
+        tag = None
+        if meta_table is not None:
+            version = version_stamps.current(meta_table, version_stamps.favorites_key(user_id))
+            tag = version_stamps.etag(version, user_id, params)
+            if version_stamps.not_modified(event, tag):
+                return resp(304, None, tag)
+
+        limit = parse_limit(params.get("limit"))
+        token = params.get("nextToken")
+        last_key = decode_token(token, user_id) if token else None
+        projected = params.get("view") == "map"
+        follow = str(params.get("all", "")).lower() in ("1", "true", "yes")
+        order = (params.get("order") or "asc").lower()
+        if order not in ("asc", "desc"):
+            raise BadRequest("order must be asc or desc")
+        sort = params.get("sort") or "spotId"
+        if sort not in ("spotId", "createdAt"):
+            raise BadRequest("sort must be spotId or createdAt")
+        if sort == "createdAt" and (projected or not follow):
+            # Only the key is ordered by DynamoDB; createdAt is sorted here,
+            # which is only meaningful over a whole list.
+            raise BadRequest("sort=createdAt needs all=true and the full view")
+
+        forward = order == "asc"
+        if not follow:
+            items, last_key = query_page(user_id, limit, last_key, forward, projected)
+        else:
+            items = []
+            while True:
+                page, last_key = query_page(user_id, min(MAX_LIMIT, MAX_ALL_ITEMS - len(items)), last_key, forward, projected)
+                items.extend(page)
+                if not last_key or len(items) >= MAX_ALL_ITEMS or out_of_time(context):
+                    break
+            if last_key and not query_page(user_id, 1, last_key, forward, True)[0]:
+                # A page that ends exactly at the cap still returns a key.
+                last_key = None
+            if last_key and sort == "createdAt":
+                raise BadRequest(f"sort=createdAt is only available for up to {MAX_ALL_ITEMS} favorites")
+
+        if sort == "createdAt":
+            items.sort(key=lambda item: item.get("createdAt") or "", reverse=not forward)
+        body = {"items": items}
+        if last_key:
+            body["nextToken"] = encode_token(last_key)
+            if follow:
+                body["truncated"] = True
+        return resp(200, body, tag)
 
-        items = out.get("Items", [])
-        return resp(200, {"items": items})
+    except BadRequest as exc:
+        return resp(400, {"message": str(exc)})
 
     except Exception as exc:
         print("ERROR:", str(exc))
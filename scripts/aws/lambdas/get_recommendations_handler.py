@@ -1,35 +1,647 @@
 import os
 import json
-import boto3
-from decimal import Decimal
+import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ["REC_TABLE"])
+import cluster_pyramid
+import geo
+import recommendation_schema
+import search_index
+import spatial_index
+import version_stamps
+from vela_common import codec, dynamo
+from vela_common.responses import response
 
+TABLE_NAME = os.environ["REC_TABLE"]
 
-def decimal_default(obj):
-    if isinstance(obj, Decimal):
-        return int(obj) if obj % 1 == 0 else float(obj)
-    raise TypeError
+table = dynamo.Table(TABLE_NAME, number=codec.number)
+DETAILS_TABLE = os.environ["REC_DETAILS_TABLE"]
+details_table = dynamo.Table(DETAILS_TABLE, number=codec.number)
 
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
 
-def response(status, body):
+CLUSTERS_TABLE = os.environ.get("REC_CLUSTERS_TABLE")
+clusters_table = dynamo.Table(CLUSTERS_TABLE, number=codec.number) if CLUSTERS_TABLE else None
+SEARCH_TABLE = os.environ.get("REC_SEARCH_TABLE")
+search_table = dynamo.Table(SEARCH_TABLE, number=codec.number) if SEARCH_TABLE else None
+
+DEFAULT_LIMIT = int(os.environ.get("REC_PAGE_LIMIT", "100"))
+MAX_LIMIT = int(os.environ.get("REC_PAGE_MAX_LIMIT", "500"))
+# Upper bound for all=true so a single response stays bounded as the
+# catalogue grows; callers past it get a nextToken like any other page
+# and a truncated flag.
+MAX_ALL_ITEMS = int(os.environ.get("REC_MAX_ALL_ITEMS", "5000"))
+# all=true also stops following pages this close to the invocation's
+# deadline (the bootstrap section's, when called from there).
+DEADLINE_MARGIN_MS = 1000
+
+MAX_RADIUS_KM = float(os.environ.get("REC_MAX_RADIUS_KM", "1000"))
+CELL_QUERY_CONCURRENCY = int(os.environ.get("REC_CELL_QUERY_CONCURRENCY", "8"))
+
+NEAREST_ROUTE = "GET /recommendations/nearest"
+DETAIL_ROUTE = "GET /recommendations/{spotId}"
+CLUSTERS_ROUTE = "GET /recommendations/clusters"
+SEARCH_ROUTE = "GET /recommendations/search"
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+MAX_QUERY_TERMS = 5
+# Postings read per query term; very short prefixes of common words stop
+# here and the response is flagged as truncated.
+MAX_POSTINGS = int(os.environ.get("REC_MAX_POSTINGS", "5000"))
+# Cap on the cells a cluster response may cover; wide boxes at high zoom
+# fall back to a coarser level so the response size stays bounded.
+MAX_CLUSTERS = int(os.environ.get("REC_MAX_CLUSTERS", "1024"))
+BATCH_GET_SIZE = 100
+DEFAULT_K = 10
+MAX_K = 100
+# Upper bound on the age of anything cached per catalogue version, so a
+# deploy without a metadata table only serves stale data for this long.
+CACHE_MAX_AGE_SECONDS = int(os.environ.get("REC_CACHE_MAX_AGE_SECONDS", "300"))
+BODY_CACHE_SIZE = 16
+# Browsers keep the body and revalidate with If-None-Match on every use.
+ETAG_CACHE_CONTROL = "public, no-cache"
+
+# Delta sync: tombstones older than this are purged, so older cursors must
+# do a full reload. Cursors handed out lag "now" by SYNC_SAFETY_SECONDS to
+# cover clock skew between writers and the eventually consistent index.
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get("REC_TOMBSTONE_RETENTION_DAYS", "30"))
+SYNC_SAFETY_SECONDS = int(os.environ.get("REC_SYNC_SAFETY_SECONDS", "30"))
+SYNC_INDEX = "sync-index"
+
+LIST_PROJECTION = recommendation_schema.SUMMARY_PROJECTION
+LIST_PROJECTION_NAMES = recommendation_schema.SUMMARY_PROJECTION_NAMES
+
+
+class BadRequest(Exception):
+    pass
+
+
+class ResyncRequired(Exception):
+    pass
+
+
+# The shared low-level client is thread-safe, so pool threads query with it directly.
+cell_executor = ThreadPoolExecutor(max_workers=CELL_QUERY_CONCURRENCY)
+
+nearest_state = {"index": None, "version": None, "built_at": 0.0}
+nearest_lock = threading.Lock()
+
+# Encoded response bodies for list requests that start from the first page,
+# keyed by (view, all, limit) and tagged with the catalogue version they show.
+body_cache = {}
+
+
+def not_modified(tag):
     return {
-        "statusCode": status,
+        "statusCode": 304,
         "headers": {
-            "Content-Type": "application/json",
+            "ETag": tag,
+            "Cache-Control": ETAG_CACHE_CONTROL,
             "Access-Control-Allow-Origin": "*",
         },
-        "body": json.dumps(body, default=decimal_default),
+        "body": "",
     }
 
 
-def lambda_handler(event, context):
+def encode_token(last_key):
+    raw = codec.dumps(last_key)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        last_key = json.loads(raw)
+    except Exception:
+        raise BadRequest("Invalid nextToken")
+    if not isinstance(last_key, dict) or not isinstance(last_key.get("spotId"), str):
+        raise BadRequest("Invalid nextToken")
+    return last_key
+
+
+def parse_limit(value):
+    if value in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    if limit < 1:
+        raise BadRequest("limit must be positive")
+    return min(limit, MAX_LIMIT)
+
+
+def scan_page(limit, start_key, projected):
+    """One page of live (non-tombstone) items, projected to summary fields if asked."""
+    kwargs = {
+        "Limit": limit,
+        "FilterExpression": "attribute_not_exists(#deleted)",
+        "ExpressionAttributeNames": {"#deleted": "deleted"},
+    }
+    if projected:
+        kwargs["ProjectionExpression"] = LIST_PROJECTION
+        kwargs["ExpressionAttributeNames"].update(LIST_PROJECTION_NAMES)
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+    out = table.scan(**kwargs)
+    return out.get("Items", []), out.get("LastEvaluatedKey")
+
+
+def more_items(start_key):
+    """True when a live item follows ``start_key``.
+
+    A scan that ends exactly at a cap still returns a key, and the pages
+    after it may hold only tombstones.
+    """
+    while start_key:
+        page, start_key = scan_page(MAX_LIMIT, start_key, True)
+        if page:
+            return True
+    return False
+
+
+def batch_get(table_name, spot_ids, **options):
+    found = {}
+    for start in range(0, len(spot_ids), BATCH_GET_SIZE):
+        keys = [{"spotId": spot_id} for spot_id in spot_ids[start:start + BATCH_GET_SIZE]]
+        request = {table_name: {"Keys": keys, **options}}
+        attempt = 0
+        while request:
+            out = table.meta.client.batch_get_item(RequestItems=request)
+            for item in out.get("Responses", {}).get(table_name, []):
+                found[item["spotId"]] = item
+            request = out.get("UnprocessedKeys") or None
+            if request:
+                attempt += 1
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+    return found
+
+
+def fetch_details(spot_ids):
+    return batch_get(DETAILS_TABLE, spot_ids)
+
+
+def present(items, full):
+    """Client shape for raw items: summaries, or items joined with their details."""
+    if not full:
+        return [recommendation_schema.summary_view(item) for item in items]
+    details = fetch_details([item["spotId"] for item in items if "data" not in item])
+    return [recommendation_schema.with_detail(item, details.get(item["spotId"])) for item in items]
+
+
+def parse_float(params, name):
+    try:
+        return float(params[name])
+    except (KeyError, TypeError, ValueError):
+        raise BadRequest(f"{name} must be a number")
+
+
+def parse_area(params):
+    """Returns (bbox, center, radius_km) for a spatial request, or None."""
+    if params.get("bbox"):
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(v) for v in params["bbox"].split(","))
+        except ValueError:
+            raise BadRequest("bbox must be minLon,minLat,maxLon,maxLat")
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+            raise BadRequest("bbox is out of range")
+        return (min_lat, min_lon, max_lat, max_lon), None, None
+
+    if params.get("radiusKm") or params.get("lat") or params.get("lon"):
+        lat = parse_float(params, "lat")
+        lon = parse_float(params, "lon")
+        radius_km = parse_float(params, "radiusKm")
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise BadRequest("lat/lon are out of range")
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise BadRequest(f"radiusKm must be between 0 and {MAX_RADIUS_KM:g}")
+        return geo.radius_bbox(lat, lon, radius_km), (lat, lon), radius_km
+
+    return None
+
+
+def query_cell(cell, full):
+    precision = len(cell)
+    index_precision = max(p for p in geo.INDEX_PRECISIONS if p <= precision)
+    kwargs = {
+        "IndexName": f"gh{index_precision}-index",
+        "KeyConditionExpression": "#index = :index",
+        "ExpressionAttributeNames": {"#index": f"gh{index_precision}"},
+        "ExpressionAttributeValues": {":index": cell[:index_precision]},
+    }
+    if precision > index_precision:
+        kwargs["KeyConditionExpression"] += " AND begins_with(#gh, :cell)"
+        kwargs["ExpressionAttributeNames"]["#gh"] = "gh"
+        kwargs["ExpressionAttributeValues"][":cell"] = cell
+    if not full:
+        kwargs["ProjectionExpression"] = LIST_PROJECTION
+        kwargs["ExpressionAttributeNames"].update(LIST_PROJECTION_NAMES)
+
+    items = []
+    while True:
+        out = table.query(**kwargs)
+        items.extend(out.get("Items", []))
+        if "LastEvaluatedKey" not in out:
+            return items
+        kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+
+
+def spatial_body(bbox, center, radius_km, full):
+    """The response body for an area query, nearest first when a center is given."""
+    cells = geo.covering(*bbox)
+    if cells is None:
+        # Too large for the index to help (e.g. a world view); filter a scan.
+        candidates = []
+        last_key = None
+        while True:
+            page, last_key = scan_page(MAX_LIMIT, last_key, not full)
+            candidates.extend(page)
+            if not last_key:
+                break
+    else:
+        candidates = []
+        for page in cell_executor.map(lambda cell: query_cell(cell, full), sorted(cells)):
+            candidates.extend(page)
+
+    matches = []
+    for item in candidates:
+        position = recommendation_schema.position(item)
+        if position is None or not geo.in_bbox(*position, *bbox):
+            continue
+        if center is not None:
+            distance = geo.haversine_km(*center, *position)
+            if distance > radius_km:
+                continue
+            matches.append((distance, item))
+        else:
+            matches.append((0.0, item))
+
+    matches.sort(key=lambda pair: pair[0])
+    total = len(matches)
+    matches = matches[:MAX_ALL_ITEMS]
+    items = present([item for _, item in matches], full)
+    if center is not None:
+        items = [{**item, "distanceKm": round(distance, 3)} for (distance, _), item in zip(matches, items)]
+    body = {"items": items}
+    if total > MAX_ALL_ITEMS:
+        # Narrow the area (or radius) to see the rest.
+        body["truncated"] = True
+        body["total"] = total
+    return body
+
+
+def query_clusters(precision, prefix):
+    kwargs = {
+        "KeyConditionExpression": "#level = :level AND begins_with(#cell, :prefix)",
+        "ExpressionAttributeNames": {"#level": "level", "#cell": "cell"},
+        "ExpressionAttributeValues": {":level": precision, ":prefix": prefix},
+    }
+    items = []
+    while True:
+        out = clusters_table.query(**kwargs)
+        items.extend(out.get("Items", []))
+        if "LastEvaluatedKey" not in out:
+            return items
+        kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+
+
+def handle_clusters(params):
+    if clusters_table is None:
+        return response(404, {"message": "Clustering is not enabled"})
+    try:
+        zoom = int(params.get("z", ""))
+    except ValueError:
+        raise BadRequest("z must be an integer")
+    if not 0 <= zoom <= cluster_pyramid.MAX_ZOOM:
+        raise BadRequest(f"z must be between 0 and {cluster_pyramid.MAX_ZOOM}")
+    if not params.get("bbox"):
+        raise BadRequest("bbox is required")
+    bbox, _, _ = parse_area({"bbox": params["bbox"]})
+
+    precision = cluster_pyramid.precision_for_zoom(zoom)
+    while precision > cluster_pyramid.CLUSTER_PRECISIONS[0] and geo.estimate_cells(*bbox, precision) > MAX_CLUSTERS:
+        precision -= 1
+    # Query the level through a handful of coarser prefixes covering the box.
+    cells = geo.covering(*bbox, min_precision=1)
+    prefixes = sorted({cell[:precision] for cell in cells})
+
+    clusters = []
+    for page in cell_executor.map(lambda prefix: query_clusters(precision, prefix), prefixes):
+        for item in page:
+            if item.get("count", 0) <= 0:
+                continue
+            view = cluster_pyramid.cluster_view(item)
+            if view is not None and geo.in_bbox(view["lat"], view["lon"], *bbox):
+                clusters.append(view)
+    clusters.sort(key=lambda view: view["cell"])
+    return response(200, {"zoom": zoom, "precision": precision, "clusters": clusters})
+
+
+def query_postings(term):
+    kwargs = {
+        "KeyConditionExpression": "#gram = :gram AND begins_with(#key, :term)",
+        "ProjectionExpression": "#key, w",
+        "ExpressionAttributeNames": {"#gram": "gram", "#key": "key"},
+        "ExpressionAttributeValues": {":gram": term[:search_index.GRAM_LENGTH], ":term": term},
+    }
+    rows = []
+    while True:
+        out = search_table.query(**kwargs)
+        rows.extend((item["key"], item["w"]) for item in out.get("Items", []))
+        if "LastEvaluatedKey" not in out:
+            return rows, False
+        if len(rows) >= MAX_POSTINGS:
+            return rows, True
+        kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+
+
+def handle_search(params):
+    if search_table is None:
+        return response(404, {"message": "Search is not enabled"})
+    query = search_index.query_terms(params.get("q") or "", MAX_QUERY_TERMS)
+    if not query:
+        raise BadRequest(f"q must contain a word of at least {search_index.GRAM_LENGTH} characters")
+    limit = params.get("limit")
     try:
-        out = table.scan()
-        items = out.get("Items", [])
-        return response(200, {"items": items})
+        limit = DEFAULT_SEARCH_LIMIT if limit in (None, "") else int(limit)
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        raise BadRequest(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+
+    results = list(cell_executor.map(query_postings, query))
+    ranked = search_index.rank(query, [rows for rows, _ in results])
+
+    # Over-fetch a little: postings of a spot deleted mid-request may linger.
+    top = ranked[:limit + 5]
+    summaries = batch_get(
+        TABLE_NAME,
+        [spot_id for _, spot_id in top],
+        ProjectionExpression=LIST_PROJECTION + ", #deleted",
+        ExpressionAttributeNames={**LIST_PROJECTION_NAMES, "#deleted": "deleted"},
+    )
+    items = []
+    for score, spot_id in top:
+        item = summaries.get(spot_id)
+        if item and not item.get("deleted"):
+            items.append({**recommendation_schema.summary_view(item), "score": score})
+    body = {"items": items[:limit], "total": len(ranked)}
+    if any(truncated for _, truncated in results):
+        body["truncated"] = True
+    return response(200, body)
+
 
+def catalogue_version():
+    if meta_table is None:
+        return None
+    return version_stamps.current(meta_table, version_stamps.CATALOGUE_KEY)
+
+
+def nearest_index(version):
+    with nearest_lock:
+        index = nearest_state["index"]
+        fresh = time.time() - nearest_state["built_at"] < CACHE_MAX_AGE_SECONDS
+        if index is not None and fresh and version == nearest_state["version"]:
+            return index, version
+
+        points = []
+        payloads = []
+        last_key = None
+        while True:
+            page, last_key = scan_page(MAX_LIMIT, last_key, True)
+            for item in page:
+                position = recommendation_schema.position(item)
+                if position is not None:
+                    points.append(position)
+                    payloads.append(recommendation_schema.summary_view(item))
+            if not last_key:
+                break
+
+        index = spatial_index.NearestIndex(points, payloads)
+        nearest_state.update(index=index, version=version, built_at=time.time())
+        return index, version
+
+
+def handle_nearest(params, version):
+    lat = parse_float(params, "lat")
+    lon = parse_float(params, "lon")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise BadRequest("lat/lon are out of range")
+    k = params.get("k")
+    try:
+        k = DEFAULT_K if k in (None, "") else int(k)
+    except ValueError:
+        raise BadRequest("k must be an integer")
+    if not 1 <= k <= MAX_K:
+        raise BadRequest(f"k must be between 1 and {MAX_K}")
+
+    index, version = nearest_index(version)
+    items = [
+        {**item, "distanceKm": round(distance, 3)}
+        for distance, item in index.nearest(lat, lon, k)
+    ]
+    body = {"items": items}
+    if version is not None:
+        body["version"] = version
+    return response(200, body)
+
+
+def sync_cursor():
+    now = datetime.now(timezone.utc) - timedelta(seconds=SYNC_SAFETY_SECONDS)
+    return now.strftime(version_stamps.CHANGE_TIME_FORMAT)
+
+
+def parse_since(value):
+    try:
+        since = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise BadRequest("since must be an ISO 8601 timestamp")
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    since = since.astimezone(timezone.utc)
+    if since < datetime.now(timezone.utc) - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        raise ResyncRequired()
+    return since
+
+
+def sync_shards(since):
+    month = since.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = datetime.now(timezone.utc) + timedelta(days=1)
+    while month <= end:
+        yield month.strftime("%Y-%m")
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def in_area(item, bbox, center, radius_km):
+    position = recommendation_schema.position(item)
+    if position is None or not geo.in_bbox(*position, *bbox):
+        return False
+    return center is None or geo.haversine_km(*center, *position) <= radius_km
+
+
+def handle_since(value, full, area=None):
+    cursor = sync_cursor()
+    since = parse_since(value)
+    since_text = since.strftime(version_stamps.CHANGE_TIME_FORMAT)
+
+    kwargs = {
+        "IndexName": SYNC_INDEX,
+        "KeyConditionExpression": "syncShard = :shard AND updatedAt > :since",
+    }
+    if not full:
+        kwargs["ProjectionExpression"] = LIST_PROJECTION + ", #deleted, gh"
+        kwargs["ExpressionAttributeNames"] = {**LIST_PROJECTION_NAMES, "#deleted": "deleted"}
+
+    changed = []
+    deleted = []
+    tombstones = []
+    for shard in sync_shards(since):
+        kwargs["ExpressionAttributeValues"] = {":shard": shard, ":since": since_text}
+        kwargs.pop("ExclusiveStartKey", None)
+        while True:
+            out = table.query(**kwargs)
+            for item in out.get("Items", []):
+                if item.get("deleted"):
+                    deleted.append(item["spotId"])
+                    tombstones.append(item)
+                else:
+                    changed.append(item)
+            if len(changed) + len(deleted) > MAX_ALL_ITEMS:
+                # Cheaper for the client to reload everything at this point.
+                raise ResyncRequired()
+            if "LastEvaluatedKey" not in out:
+                break
+            kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+
+    if area is not None:
+        # Tombstones carry only the spot's geohash, so deletions are matched
+        # against the cells covering the area and may reach a little past it.
+        # Ones written before tombstones kept a geohash are always listed.
+        cells = geo.covering(*area[0])
+        changed = [item for item in changed if in_area(item, *area)]
+        deleted = [
+            item["spotId"]
+            for item in tombstones
+            if cells is None or "gh" not in item or item["gh"].startswith(tuple(cells))
+        ]
+    return response(200, {"items": present(changed, full), "deleted": deleted, "cursor": cursor})
+
+
+def handle_detail(spot_id):
+    item = table.get_item(Key={"spotId": spot_id}).get("Item")
+    if not item or item.get("deleted"):
+        return response(404, {"message": "Recommendation not found"})
+    if "data" not in item:
+        detail = details_table.get_item(Key={"spotId": spot_id}).get("Item")
+        item = recommendation_schema.with_detail(item, detail)
+    return response(200, item)
+
+
+def out_of_time(context):
+    return context is not None and context.get_remaining_time_in_millis() < DEADLINE_MARGIN_MS
+
+
+def handle(event, params, version, context=None):
+    try:
+        if event.get("routeKey") == NEAREST_ROUTE:
+            return handle_nearest(params, version)
+        if event.get("routeKey") == SEARCH_ROUTE:
+            return handle_search(params)
+        if event.get("routeKey") == CLUSTERS_ROUTE:
+            return handle_clusters(params)
+        if event.get("routeKey") == DETAIL_ROUTE:
+            spot_id = (event.get("pathParameters") or {}).get("spotId")
+            if not spot_id:
+                return response(400, {"message": "spotId path parameter is required"})
+            return handle_detail(spot_id)
+
+        full = params.get("view") == "full"
+
+        if params.get("since"):
+            return handle_since(params["since"], full, parse_area(params))
+
+        area = parse_area(params)
+        if area is not None:
+            return response(200, spatial_body(*area, full))
+
+        limit = parse_limit(params.get("limit"))
+        token = params.get("nextToken")
+        start_key = decode_token(token) if token else None
+        follow = str(params.get("all", "")).lower() in ("1", "true", "yes")
+
+        cache_key = None
+        if not token:
+            cache_key = (full, follow, None if follow else limit)
+            # The version was read before the scan: a write racing the scan
+            # then leaves the entry tagged older than its contents, never newer.
+            cached = body_cache.get(cache_key)
+            if cached and cached[0] == version and time.time() - cached[1] < CACHE_MAX_AGE_SECONDS:
+                return response(200, cached[2])
+        cursor = sync_cursor()
+
+        if not follow:
+            raw, last_key = scan_page(limit, start_key, not full)
+        else:
+            raw = []
+            last_key = start_key
+            while True:
+                page, last_key = scan_page(min(MAX_LIMIT, MAX_ALL_ITEMS - len(raw)), last_key, not full)
+                raw.extend(page)
+                if not last_key or len(raw) >= MAX_ALL_ITEMS:
+                    break
+                if out_of_time(context):
+                    # A short page is not the list for this version.
+                    cache_key = None
+                    break
+            if last_key and len(raw) >= MAX_ALL_ITEMS and not more_items(last_key):
+                last_key = None
+
+        body = {"items": present(raw, full)}
+        if last_key:
+            body["nextToken"] = encode_token(last_key)
+            if follow:
+                body["truncated"] = True
+        elif follow:
+            body["cursor"] = cursor
+        encoded = codec.dumps(body)
+        if cache_key is not None:
+            if len(body_cache) >= BODY_CACHE_SIZE and cache_key not in body_cache:
+                body_cache.clear()
+            body_cache[cache_key] = (version, time.time(), encoded)
+        return response(200, encoded)
+
+    except BadRequest as exc:
+        return response(400, {"message": str(exc)})
+
+    except ResyncRequired:
+        return response(410, {"message": "Cursor expired, reload the full list"})
+
+    except Exception as exc:
+        print("ERROR:", str(exc))
+        return response(500, {"message": "Server error"})
+
+
+def lambda_handler(event, context):
+    params = event.get("queryStringParameters") or {}
+    try:
+        # Delta sync answers are tiny and carry a moving cursor; everything
+        # else is a function of the catalogue version and the request.
+        version = catalogue_version() if not params.get("since") else None
     except Exception as exc:
         print("ERROR:", str(exc))
         return response(500, {"message": "Server error"})
+
+    tag = None
+    if version is not None:
+        tag = version_stamps.etag(version, event.get("routeKey"), event.get("pathParameters"), params)
+        if version_stamps.not_modified(event, tag):
+            return not_modified(tag)
+
+    out = handle(event, params, version, context)
+    if tag and out["statusCode"] == 200:
+        out["headers"].update({"ETag": tag, "Cache-Control": ETAG_CACHE_CONTROL})
+    return out
@@ -0,0 +1,74 @@
+import base64
+import json
+import os
+
+import recommendation_import
+from vela_common import dynamo
+from vela_common.auth import get_claims, is_admin
+from vela_common.responses import response
+
+TABLE_NAME = os.environ.get("REC_TABLE")
+if not TABLE_NAME:
+    raise Exception("Missing env var: set REC_TABLE")
+
+table = dynamo.Table(TABLE_NAME)
+details_table = dynamo.Table(os.environ["REC_DETAILS_TABLE"])
+
+CLUSTERS_TABLE = os.environ.get("REC_CLUSTERS_TABLE")
+clusters_table = dynamo.Table(CLUSTERS_TABLE) if CLUSTERS_TABLE else None
+
+SEARCH_TABLE = os.environ.get("REC_SEARCH_TABLE")
+search_table = dynamo.Table(SEARCH_TABLE) if SEARCH_TABLE else None
+
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
+
+MAX_ROWS = int(os.environ.get("REC_IMPORT_MAX_ROWS", "10000"))
+WORKERS = int(os.environ.get("REC_IMPORT_CONCURRENCY", str(recommendation_import.DEFAULT_WORKERS)))
+
+
+def lambda_handler(event, context):
+    try:
+        claims = get_claims(event)
+        if not claims:
+            return response(401, {"message": "Unauthorized"})
+
+        if not is_admin(claims):
+            return response(403, {"message": "Admin only"})
+
+        text = event.get("body") or ""
+        if event.get("isBase64Encoded"):
+            text = base64.b64decode(text).decode("utf-8-sig")
+        params = event.get("queryStringParameters") or {}
+        headers = {key.lower(): value for key, value in (event.get("headers") or {}).items()}
+        fmt = params.get("format") or recommendation_import.detect_format(text, headers.get("content-type", ""))
+
+        try:
+            rows = recommendation_import.parse_rows(text, fmt)
+        except ValueError as exc:
+            return response(400, {"message": str(exc)})
+        if not rows:
+            return response(400, {"message": "No rows to import"})
+        if len(rows) > MAX_ROWS:
+            return response(413, {"message": f"At most {MAX_ROWS} rows per import"})
+
+        report = recommendation_import.import_rows(
+            rows,
+            table,
+            details_table,
+            clusters_table=clusters_table,
+            search_table=search_table,
+            meta_table=meta_table,
+            created_by=claims.get("sub"),
+            workers=WORKERS,
+            dry_run=str(params.get("dryRun", "")).lower() in ("1", "true", "yes"),
+        )
+        summary = {key: report[key] for key in ("received", "imported", "seconds")}
+        summary["failed"] = len(report["failed"])
+        print(json.dumps(summary))
+        # Some rows were written and some were not: report both, never a bare 500.
+        return response(207 if report["failed"] else 200, report)
+
+    except Exception as exc:
+        print("ERROR:", str(exc))
+        return response(500, {"message": "Server error"})
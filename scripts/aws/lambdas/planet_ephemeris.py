@@ -0,0 +1,431 @@
+import numpy as np
+
+# Keplerian elements (J2000 ecliptic) and their rates per Julian century,
+# from Standish, "Approximate Positions of the Planets" (valid 1800-2050):
+# a [au], e, I [deg], L [deg], longitude of perihelion [deg], longitude of node [deg].
+PLANET_ELEMENTS = {
+    "Mercury": (
+        (0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593),
+        (0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081),
+    ),
+    "Venus": (
+        (0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255),
+        (0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418),
+    ),
+    "Earth": (
+        (1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0),
+        (0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0),
+    ),
+    "Mars": (
+        (1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891),
+        (0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343),
+    ),
+    "Jupiter": (
+        (5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909),
+        (-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106),
+    ),
+    "Saturn": (
+        (9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448),
+        (-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794),
+    ),
+    "Uranus": (
+        (19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503),
+        (-0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589),
+    ),
+    "Neptune": (
+        (30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574),
+        (0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.01262724),
+    ),
+}
+
+BODIES = ("Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune")
+
+# Absolute magnitude and phase-angle polynomial coefficients (deg^n).
+MAGNITUDE_TERMS = {
+    "Moon": (0.23, ((1, 0.026), (4, 4.0e-9))),
+    "Mercury": (-0.36, ((1, 0.027), (6, 2.2e-13))),
+    "Venus": (-4.34, ((1, 0.013), (3, 4.2e-7))),
+    "Mars": (-1.51, ((1, 0.016),)),
+    "Jupiter": (-9.25, ((1, 0.014),)),
+    "Saturn": (-9.0, ((1, 0.044),)),
+    "Uranus": (-7.15, ((1, 0.001),)),
+    "Neptune": (-6.90, ((1, 0.001),)),
+}
+
+# Ecliptic longitude (J2000) where each zodiacal constellation begins. Planets
+# stay close to the ecliptic, so this band is used instead of the full IAU
+# boundary table.
+ZODIAC = (
+    (29.09, "Aries"),
+    (53.47, "Taurus"),
+    (90.43, "Gemini"),
+    (118.26, "Cancer"),
+    (138.18, "Leo"),
+    (174.16, "Virgo"),
+    (218.02, "Libra"),
+    (241.14, "Scorpius"),
+    (247.68, "Ophiuchus"),
+    (266.28, "Sagittarius"),
+    (299.71, "Capricornus"),
+    (327.89, "Aquarius"),
+    (351.57, "Pisces"),
+)
+
+# Geometric altitude of the centre at rise/set: refraction plus, for the Sun
+# and Moon, the apparent semi-diameter.
+HORIZON_ALTITUDE = {"Sun": -0.833, "Moon": -0.833}
+DEFAULT_HORIZON_ALTITUDE = -0.567
+REFINE_SAMPLES = 16
+
+EARTH_RADIUS_AU = 6378.137 / 149597870.7
+NAKED_EYE_LIMIT = 6.0
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+_zodiac_starts = np.array([start for start, _ in ZODIAC])
+_zodiac_names = [name for _, name in ZODIAC]
+
+
+def julian_day(timestamps):
+    return np.asarray(timestamps, dtype=float) / 86400.0 + UNIX_EPOCH_JD
+
+
+def solve_kepler(mean_anomaly, eccentricity):
+    ecc_anomaly = mean_anomaly + eccentricity * np.sin(mean_anomaly)
+    for _ in range(6):
+        ecc_anomaly = ecc_anomaly - (
+            ecc_anomaly - eccentricity * np.sin(ecc_anomaly) - mean_anomaly
+        ) / (1.0 - eccentricity * np.cos(ecc_anomaly))
+    return ecc_anomaly
+
+
+def heliocentric_j2000(name, centuries):
+    base, rates = PLANET_ELEMENTS[name]
+    a, e, inc, mean_lon, peri, node = (b + r * centuries for b, r in zip(base, rates))
+    arg_peri = np.radians(peri - node)
+    mean_anomaly = np.radians(np.mod(mean_lon - peri, 360.0))
+    inc, node = np.radians(inc), np.radians(node)
+
+    ecc_anomaly = solve_kepler(mean_anomaly, e)
+    xp = a * (np.cos(ecc_anomaly) - e)
+    yp = a * np.sqrt(1.0 - e * e) * np.sin(ecc_anomaly)
+
+    cw, sw = np.cos(arg_peri), np.sin(arg_peri)
+    cn, sn = np.cos(node), np.sin(node)
+    ci, si = np.cos(inc), np.sin(inc)
+    x = (cw * cn - sw * sn * ci) * xp + (-sw * cn - cw * sn * ci) * yp
+    y = (cw * sn + sw * cn * ci) * xp + (-sw * sn + cw * cn * ci) * yp
+    z = (sw * si) * xp + (cw * si) * yp
+    return np.stack([x, y, z])
+
+
+def moon_geocentric_of_date(jd):
+    # Schlyter's lunar theory with the main perturbation terms; ~1' accuracy.
+    d = jd - 2451543.5
+    node = np.radians(125.1228 - 0.0529538083 * d)
+    inc = np.radians(5.1454)
+    arg_peri = np.radians(318.0634 + 0.1643573223 * d)
+    a, e = 60.2666, 0.054900
+    mean_anomaly = np.radians(np.mod(115.3654 + 13.0649929509 * d, 360.0))
+
+    ecc_anomaly = solve_kepler(mean_anomaly, e)
+    xv = a * (np.cos(ecc_anomaly) - e)
+    yv = a * np.sqrt(1.0 - e * e) * np.sin(ecc_anomaly)
+    v = np.arctan2(yv, xv)
+    r = np.hypot(xv, yv)
+
+    xh = r * (np.cos(node) * np.cos(v + arg_peri) - np.sin(node) * np.sin(v + arg_peri) * np.cos(inc))
+    yh = r * (np.sin(node) * np.cos(v + arg_peri) + np.cos(node) * np.sin(v + arg_peri) * np.cos(inc))
+    zh = r * np.sin(v + arg_peri) * np.sin(inc)
+    lon = np.arctan2(yh, xh)
+    lat = np.arctan2(zh, np.hypot(xh, yh))
+
+    sun_mean = np.radians(356.0470 + 0.9856002585 * d)
+    sun_lon = sun_mean + np.radians(282.9404 + 4.70935e-5 * d)
+    moon_lon = node + arg_peri + mean_anomaly
+    elong = moon_lon - sun_lon
+    arg_lat = moon_lon - node
+    mm = mean_anomaly
+
+    lon = lon + np.radians(
+        -1.274 * np.sin(mm - 2 * elong)
+        + 0.658 * np.sin(2 * elong)
+        - 0.186 * np.sin(sun_mean)
+        - 0.059 * np.sin(2 * mm - 2 * elong)
+        - 0.057 * np.sin(mm - 2 * elong + sun_mean)
+        + 0.053 * np.sin(mm + 2 * elong)
+        + 0.046 * np.sin(2 * elong - sun_mean)
+        + 0.041 * np.sin(mm - sun_mean)
+        - 0.035 * np.sin(elong)
+        - 0.031 * np.sin(mm + sun_mean)
+        - 0.015 * np.sin(2 * arg_lat - 2 * elong)
+        + 0.011 * np.sin(mm - 4 * elong)
+    )
+    lat = lat + np.radians(
+        -0.173 * np.sin(arg_lat - 2 * elong)
+        - 0.055 * np.sin(mm - arg_lat - 2 * elong)
+        - 0.046 * np.sin(mm + arg_lat - 2 * elong)
+        + 0.033 * np.sin(arg_lat + 2 * elong)
+        + 0.017 * np.sin(2 * mm + arg_lat)
+    )
+    r = r - 0.58 * np.cos(mm - 2 * elong) - 0.46 * np.cos(2 * elong)
+
+    r_au = r * EARTH_RADIUS_AU
+    return np.stack([
+        r_au * np.cos(lat) * np.cos(lon),
+        r_au * np.cos(lat) * np.sin(lon),
+        r_au * np.sin(lat),
+    ])
+
+
+def rotate_z(vec, angle):
+    c, s = np.cos(angle), np.sin(angle)
+    return np.stack([c * vec[0] - s * vec[1], s * vec[0] + c * vec[1], vec[2]])
+
+
+def phase_angle(helio_dist, geo_dist, sun_dist):
+    cos_fv = (helio_dist ** 2 + geo_dist ** 2 - sun_dist ** 2) / (2.0 * helio_dist * geo_dist)
+    return np.degrees(np.arccos(np.clip(cos_fv, -1.0, 1.0)))
+
+
+def magnitude(name, helio_dist, geo_dist, fv, ecl_lon=None, ecl_lat=None, centuries=None):
+    if name == "Sun":
+        return -26.74 + 5.0 * np.log10(geo_dist)
+    base, terms = MAGNITUDE_TERMS[name]
+    mag = base + 5.0 * np.log10(helio_dist * geo_dist)
+    for power, coeff in terms:
+        mag = mag + coeff * fv ** power
+    if name == "Saturn":
+        # Ring brightening depends on the tilt of the rings towards Earth.
+        ring_inc = np.radians(28.06)
+        ring_node = np.radians(169.51 + 3.82e-5 * centuries * 36525.0)
+        tilt = np.arcsin(
+            np.sin(ecl_lat) * np.cos(ring_inc)
+            - np.cos(ecl_lat) * np.sin(ring_inc) * np.sin(ecl_lon - ring_node)
+        )
+        mag = mag - 2.6 * np.abs(np.sin(tilt)) + 1.2 * np.sin(tilt) ** 2
+    return mag
+
+
+def constellation_names(ecl_lon_j2000):
+    idx = np.searchsorted(_zodiac_starts, np.mod(ecl_lon_j2000, 360.0), side="right") - 1
+    return [_zodiac_names[i] for i in np.atleast_1d(idx)]
+
+
+def equatorial(timestamps):
+    """Geocentric apparent places of every body, vectorized over time.
+
+    Returns ``{name: {"ra", "dec", "distance", "magnitude", "ecliptic_longitude"}}``
+    where ``ra``/``dec`` are degrees (equinox of date) and each value is an
+    array shaped like ``timestamps``.
+    """
+    jd = julian_day(timestamps)
+    centuries = (jd - J2000_JD) / 36525.0
+    precession = np.radians(1.396971 * centuries + 0.0003086 * centuries ** 2)
+    obliquity = np.radians(23.439291 - 0.0130042 * centuries)
+
+    earth = heliocentric_j2000("Earth", centuries)
+    sun_geo = rotate_z(-earth, precession)
+    sun_dist = np.linalg.norm(sun_geo, axis=0)
+
+    geocentric = {"Sun": sun_geo, "Moon": moon_geocentric_of_date(jd)}
+    for name in BODIES[2:]:
+        geocentric[name] = rotate_z(heliocentric_j2000(name, centuries) - earth, precession)
+
+    out = {}
+    for name, vec in geocentric.items():
+        x, y, z = vec
+        geo_dist = np.linalg.norm(vec, axis=0)
+        ecl_lon = np.arctan2(y, x)
+        ecl_lat = np.arcsin(z / geo_dist)
+
+        xe = x
+        ye = y * np.cos(obliquity) - z * np.sin(obliquity)
+        ze = y * np.sin(obliquity) + z * np.cos(obliquity)
+        ra = np.mod(np.degrees(np.arctan2(ye, xe)), 360.0)
+        dec = np.degrees(np.arcsin(ze / geo_dist))
+
+        if name == "Sun":
+            helio_dist = geo_dist
+            fv = np.zeros_like(geo_dist)
+        else:
+            helio_dist = np.linalg.norm(vec - sun_geo, axis=0)
+            fv = phase_angle(helio_dist, geo_dist, sun_dist)
+
+        out[name] = {
+            "ra": ra,
+            "dec": dec,
+            "distance": geo_dist,
+            "magnitude": magnitude(name, helio_dist, geo_dist, fv, ecl_lon, ecl_lat, centuries),
+            "ecliptic_longitude": np.degrees(ecl_lon - precession),
+        }
+    return out
+
+
+def local_sidereal_degrees(timestamps, lon):
+    d = julian_day(timestamps) - J2000_JD
+    gmst = 280.46061837 + 360.98564736629 * d
+    return np.mod(gmst + np.asarray(lon, dtype=float), 360.0)
+
+
+def horizontal(ra, dec, distance, timestamps, lat, lon, moon=False):
+    """Altitude/azimuth in degrees; inputs broadcast against each other."""
+    phi = np.radians(np.asarray(lat, dtype=float))
+    hour_angle = np.radians(local_sidereal_degrees(timestamps, lon) - ra)
+    dec = np.radians(dec)
+
+    sin_alt = np.sin(phi) * np.sin(dec) + np.cos(phi) * np.cos(dec) * np.cos(hour_angle)
+    alt = np.arcsin(np.clip(sin_alt, -1.0, 1.0))
+    az = np.arctan2(
+        -np.cos(dec) * np.sin(hour_angle),
+        np.sin(dec) * np.cos(phi) - np.cos(dec) * np.cos(hour_angle) * np.sin(phi),
+    )
+    if moon:
+        # Topocentric parallax is up to ~1 degree for the Moon.
+        alt = alt - np.arcsin(EARTH_RADIUS_AU / distance) * np.cos(alt)
+    return np.degrees(alt), np.mod(np.degrees(az), 360.0)
+
+
+def sexagesimal(value):
+    negative = bool(value < 0)
+    value = abs(float(value))
+    whole = int(value)
+    minutes_f = (value - whole) * 60.0
+    minutes = int(minutes_f)
+    seconds = round((minutes_f - minutes) * 60.0, 1)
+    if seconds >= 60.0:
+        seconds = 0.0
+        minutes += 1
+    if minutes >= 60:
+        minutes = 0
+        whole += 1
+    return negative, whole, minutes, seconds
+
+
+def format_right_ascension(ra_degrees):
+    hours = float(ra_degrees) / 15.0
+    _, h, m, s = sexagesimal(hours)
+    return {"negative": False, "hours": h % 24, "minutes": m, "seconds": s, "raw": round(hours, 6)}
+
+
+def format_declination(dec_degrees):
+    negative, d, m, s = sexagesimal(dec_degrees)
+    return {
+        "negative": negative,
+        "degrees": d,
+        "arcminutes": m,
+        "arcseconds": s,
+        "raw": round(float(dec_degrees), 6),
+    }
+
+
+def body_entries(positions, alt, az, index=()):
+    """Build upstream-shaped ``data`` entries for one observer/time slot."""
+    entries = []
+    for name in BODIES:
+        pos = positions[name]
+        mag = float(pos["magnitude"][index])
+        altitude = float(alt[name][index])
+        entries.append({
+            "name": name,
+            "constellation": constellation_names(pos["ecliptic_longitude"][index])[0],
+            "rightAscension": format_right_ascension(pos["ra"][index]),
+            "declination": format_declination(pos["dec"][index]),
+            "altitude": round(altitude, 2),
+            "azimuth": round(float(az[name][index]), 2),
+            "aboveHorizon": altitude > 0.0,
+            "magnitude": round(mag, 2),
+            "nakedEyeObject": mag <= NAKED_EYE_LIMIT,
+        })
+    return entries
+
+
+def observe(timestamps, lat, lon):
+    """Alt/az for every body; arrays broadcast over ``timestamps``/``lat``/``lon``."""
+    positions = equatorial(timestamps)
+    alt, az = {}, {}
+    for name in BODIES:
+        pos = positions[name]
+        alt[name], az[name] = horizontal(
+            pos["ra"], pos["dec"], pos["distance"], timestamps, lat, lon, moon=name == "Moon"
+        )
+    return positions, alt, az
+
+
+def visible_planets(timestamp, lat, lon, above_horizon_only=True):
+    positions, alt, az = observe(np.array([timestamp], dtype=float), lat, lon)
+    entries = body_entries(positions, alt, az, index=0)
+    if above_horizon_only:
+        entries = [entry for entry in entries if entry["aboveHorizon"]]
+    return entries
+
+
+def visible_planets_batch(timestamps, lats, lons, above_horizon_only=True):
+    """One vectorized evaluation for many (time, lat, lon) triples."""
+    positions, alt, az = observe(np.asarray(timestamps, dtype=float), np.asarray(lats), np.asarray(lons))
+    results = []
+    for i in range(len(timestamps)):
+        entries = body_entries(positions, alt, az, index=i)
+        if above_horizon_only:
+            entries = [entry for entry in entries if entry["aboveHorizon"]]
+        results.append(entries)
+    return results
+
+
+def horizon_crossings(timestamps, alt):
+    """First rising and setting bracket ``(index, kind)`` for each body."""
+    brackets = []
+    for name in BODIES:
+        above = alt[name] > HORIZON_ALTITUDE.get(name, DEFAULT_HORIZON_ALTITUDE)
+        seen = set()
+        for i in np.nonzero(above[1:] != above[:-1])[0]:
+            kind = "rise" if above[i + 1] else "set"
+            if kind not in seen:
+                seen.add(kind)
+                brackets.append((name, int(i), kind))
+    return brackets
+
+
+def peak_time(timestamps, altitudes):
+    idx = int(np.argmax(altitudes))
+    if idx == 0 or idx == len(altitudes) - 1:
+        return float(timestamps[idx]), float(altitudes[idx])
+    y0, y1, y2 = altitudes[idx - 1:idx + 2]
+    denom = y0 - 2.0 * y1 + y2
+    if denom == 0:
+        return float(timestamps[idx]), float(y1)
+    # Fit a parabola through the three samples around the maximum.
+    offset = 0.5 * (y0 - y2) / denom
+    step = timestamps[idx + 1] - timestamps[idx]
+    return float(timestamps[idx] + offset * step), float(y1 - 0.25 * (y0 - y2) * offset)
+
+
+def timeline(timestamps, lat, lon):
+    """Altitudes for every body over evenly spaced ``timestamps`` plus rise/set/peak.
+
+    The whole window is evaluated in one vectorized pass; rise/set brackets are
+    then refined together in a second pass.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    positions, alt, az = observe(timestamps, lat, lon)
+
+    events = {name: {"rise": None, "set": None} for name in BODIES}
+    brackets = horizon_crossings(timestamps, alt)
+    if brackets:
+        fractions = np.linspace(0.0, 1.0, REFINE_SAMPLES)
+        fine_t = np.concatenate([
+            timestamps[i] + (timestamps[i + 1] - timestamps[i]) * fractions for _, i, _ in brackets
+        ])
+        _, fine_alt, _ = observe(fine_t, lat, lon)
+        for k, (name, _, kind) in enumerate(brackets):
+            seg = slice(k * REFINE_SAMPLES, (k + 1) * REFINE_SAMPLES)
+            seg_t = fine_t[seg]
+            seg_h = fine_alt[name][seg] - HORIZON_ALTITUDE.get(name, DEFAULT_HORIZON_ALTITUDE)
+            changes = np.nonzero((seg_h[1:] > 0) != (seg_h[:-1] > 0))[0]
+            j = int(changes[0]) if changes.size else REFINE_SAMPLES - 2
+            frac = seg_h[j] / (seg_h[j] - seg_h[j + 1]) if seg_h[j] != seg_h[j + 1] else 0.0
+            events[name][kind] = float(seg_t[j] + frac * (seg_t[j + 1] - seg_t[j]))
+
+    for name in BODIES:
+        events[name]["peak"] = peak_time(timestamps, alt[name])
+    return positions, alt, az, events
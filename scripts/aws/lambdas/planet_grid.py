@@ -0,0 +1,221 @@
+import json
+import math
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import planet_ephemeris
+
+# File layout: MAGIC, uint32 header length, JSON header, zero padding to a
+# multiple of 8, then int16 little-endian values ordered
+# [lat][lon][hour][body][altitude, azimuth], scaled by ``scale``. All hours
+# of one grid cell are contiguous, so a lookup reads two short byte ranges.
+MAGIC = b"VELAGRD1"
+PREFIX = struct.Struct("<8sI")
+HEADER_PROBE_BYTES = 64 * 1024
+VALUE_SCALE = 100
+CELL_CACHE_SIZE = 512
+SIDEREAL_DEG_PER_SECOND = 360.98564736629 / 86400.0
+
+
+def build_grid(start, hours=48, lat_step=1.0, lon_step=1.0):
+    """Compute the grid for ``hours`` hourly samples after ``start`` (unix seconds)."""
+    start = float(int(start // 3600) * 3600)
+    times = start + 3600.0 * np.arange(hours + 1)
+    lats = np.arange(-90.0, 90.0 + lat_step / 2, lat_step)
+    lons = np.arange(-180.0, 180.0, lon_step)
+
+    positions = planet_ephemeris.equatorial(times)
+    bodies = planet_ephemeris.BODIES
+    values = np.empty((lats.size, lons.size, times.size, len(bodies), 2), dtype="<i2")
+    for b, name in enumerate(bodies):
+        pos = positions[name]
+        alt, az = planet_ephemeris.horizontal(
+            pos["ra"][None, None, :],
+            pos["dec"][None, None, :],
+            pos["distance"][None, None, :],
+            times[None, None, :],
+            lats[:, None, None],
+            lons[None, :, None],
+            moon=name == "Moon",
+        )
+        values[:, :, :, b, 0] = np.round(alt * VALUE_SCALE)
+        values[:, :, :, b, 1] = np.round((az - 180.0) * VALUE_SCALE)
+
+    header = {
+        "start": start,
+        "stepSeconds": 3600,
+        "hours": int(times.size),
+        "latMin": float(lats[0]),
+        "latStep": lat_step,
+        "latCount": int(lats.size),
+        "lonMin": float(lons[0]),
+        "lonStep": lon_step,
+        "lonCount": int(lons.size),
+        "bodies": list(bodies),
+        "scale": VALUE_SCALE,
+        "geocentric": {
+            name: {
+                "ra": np.round(positions[name]["ra"], 5).tolist(),
+                "dec": np.round(positions[name]["dec"], 5).tolist(),
+                "magnitude": np.round(positions[name]["magnitude"], 3).tolist(),
+                "eclipticLongitude": np.round(positions[name]["ecliptic_longitude"], 4).tolist(),
+            }
+            for name in bodies
+        },
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    padding = -(PREFIX.size + len(header_bytes)) % 8
+    return PREFIX.pack(MAGIC, len(header_bytes)) + header_bytes + b"\0" * padding, values
+
+
+def write_grid(path, start, hours=48):
+    head, values = build_grid(start, hours)
+    with open(path, "wb") as fh:
+        fh.write(head)
+        values.tofile(fh)
+
+
+def parse_prefix(raw):
+    magic, header_len = PREFIX.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError("Not a planet grid artifact")
+    return header_len
+
+
+def interpolate_angle(values, weights):
+    rad = np.radians(values)
+    return math.degrees(math.atan2(float(np.dot(weights, np.sin(rad))), float(np.dot(weights, np.cos(rad))))) % 360.0
+
+
+class PlanetGrid:
+    def __init__(self, header, data_offset, read_range):
+        self.header = header
+        self.data_offset = data_offset
+        self._read_range = read_range
+        self._cells = OrderedDict()
+        self._lock = threading.Lock()
+        self.start = header["start"]
+        self.step = header["stepSeconds"]
+        self.hours = header["hours"]
+        self.bodies = header["bodies"]
+        self.end = self.start + (self.hours - 1) * self.step
+        self.cell_size = self.hours * len(self.bodies) * 2 * 2
+
+    @classmethod
+    def from_path(cls, path):
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        header_len = parse_prefix(mapped[:PREFIX.size])
+        header = json.loads(mapped[PREFIX.size:PREFIX.size + header_len])
+        data_offset = PREFIX.size + header_len + (-(PREFIX.size + header_len) % 8)
+        return cls(header, data_offset, lambda offset, length: mapped[offset:offset + length])
+
+    @classmethod
+    def from_s3(cls, s3, bucket, key):
+        first = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{HEADER_PROBE_BYTES - 1}")
+        # Pin every later range read to this object version so a grid rebuilt
+        # under the same key is never mixed with the header read here.
+        version = first.get("VersionId")
+        raw = first["Body"].read()
+        header_len = parse_prefix(raw)
+        end = PREFIX.size + header_len
+        if end > len(raw):
+            extra = {"VersionId": version} if version else {}
+            rest = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={len(raw)}-{end - 1}", **extra)
+            raw += rest["Body"].read()
+        header = json.loads(raw[PREFIX.size:end])
+        data_offset = end + (-end % 8)
+
+        def read_range(offset, length):
+            extra = {"VersionId": version} if version else {}
+            resp = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={offset}-{offset + length - 1}", **extra)
+            return resp["Body"].read()
+
+        return cls(header, data_offset, read_range)
+
+    def covers(self, timestamp):
+        return self.start <= timestamp <= self.end
+
+    def _cells_at(self, i, j, j1):
+        key = (i, j)
+        with self._lock:
+            cached = self._cells.get(key)
+            if cached is not None:
+                self._cells.move_to_end(key)
+                return cached
+
+        row = i * self.header["lonCount"]
+        if j1 == j + 1:
+            raw = self._read_range(self.data_offset + (row + j) * self.cell_size, 2 * self.cell_size)
+        else:
+            raw = self._read_range(self.data_offset + (row + j) * self.cell_size, self.cell_size)
+            raw += self._read_range(self.data_offset + (row + j1) * self.cell_size, self.cell_size)
+        cells = np.frombuffer(raw, dtype="<i2").reshape(2, self.hours, len(self.bodies), 2)
+
+        with self._lock:
+            self._cells[key] = cells
+            while len(self._cells) > CELL_CACHE_SIZE:
+                self._cells.popitem(last=False)
+        return cells
+
+    def _sample(self, hour, lat, lon):
+        """Bilinear altitude and azimuth unit vectors for every body at one grid hour."""
+        h = self.header
+        fi = min(max((lat - h["latMin"]) / h["latStep"], 0.0), h["latCount"] - 1.0)
+        i = min(int(fi), h["latCount"] - 2)
+        wy = fi - i
+        fj = ((lon - h["lonMin"]) % 360.0) / h["lonStep"]
+        j = int(fj) % h["lonCount"]
+        j1 = (j + 1) % h["lonCount"]
+        wx = fj - int(fj)
+
+        lower = self._cells_at(i, j, j1)
+        upper = self._cells_at(i + 1, j, j1)
+        corners = np.stack([lower[0], lower[1], upper[0], upper[1]])[:, hour].astype(float) / h["scale"]
+        weights = np.array([(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx])
+        alt = weights @ corners[:, :, 0]
+        az = np.radians(corners[:, :, 1] + 180.0)
+        return alt, np.stack([weights @ np.sin(az), weights @ np.cos(az)], axis=-1)
+
+    def lookup(self, timestamp, lat, lon):
+        """Upstream-shaped entries for every body, interpolated from the grid."""
+        h = self.header
+        ft = (timestamp - self.start) / self.step
+        t = min(int(ft), self.hours - 2)
+        wt = ft - t
+        # Between samples the sky mostly turns with the Earth, so each
+        # neighbouring hour is read at the longitude that has the same local
+        # sidereal time; blending the two then only absorbs the bodies' own motion.
+        before = timestamp - (self.start + t * self.step)
+        after = self.start + (t + 1) * self.step - timestamp
+        alt0, az0 = self._sample(t, lat, lon + SIDEREAL_DEG_PER_SECOND * before)
+        alt1, az1 = self._sample(t + 1, lat, lon - SIDEREAL_DEG_PER_SECOND * after)
+        altitudes = (1 - wt) * alt0 + wt * alt1
+        az_vec = (1 - wt) * az0 + wt * az1
+        azimuths = np.mod(np.degrees(np.arctan2(az_vec[:, 0], az_vec[:, 1])), 360.0)
+
+        entries = []
+        for b, name in enumerate(self.bodies):
+            geo = h["geocentric"][name]
+            altitude = float(altitudes[b])
+            azimuth = float(azimuths[b])
+            ra = interpolate_angle(np.array(geo["ra"][t:t + 2]), np.array([1 - wt, wt]))
+            dec = (1 - wt) * geo["dec"][t] + wt * geo["dec"][t + 1]
+            mag = (1 - wt) * geo["magnitude"][t] + wt * geo["magnitude"][t + 1]
+            ecl_lon = interpolate_angle(np.array(geo["eclipticLongitude"][t:t + 2]), np.array([1 - wt, wt]))
+            entries.append({
+                "name": name,
+                "constellation": planet_ephemeris.constellation_names(ecl_lon)[0],
+                "rightAscension": planet_ephemeris.format_right_ascension(ra),
+                "declination": planet_ephemeris.format_declination(dec),
+                "altitude": round(altitude, 2),
+                "azimuth": round(azimuth, 2),
+                "aboveHorizon": altitude > 0.0,
+                "magnitude": round(mag, 2),
+                "nakedEyeObject": mag <= planet_ephemeris.NAKED_EYE_LIMIT,
+            })
+        return entries
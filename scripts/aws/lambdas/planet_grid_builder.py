@@ -0,0 +1,35 @@
+import json
+import os
+import time
+
+import boto3
+
+import planet_grid
+
+s3 = boto3.client("s3")
+
+BUCKET = os.environ["PLANET_GRID_BUCKET"]
+KEY = os.environ.get("PLANET_GRID_KEY", "planets/visible-planets-grid.bin")
+HOURS = int(os.environ.get("PLANET_GRID_HOURS", "48"))
+GRID_PATH = "/tmp/visible-planets-grid.bin"
+
+
+def lambda_handler(event, context):
+    # Invoked on the EventBridge schedule deploy.py creates. The visible
+    # planets Lambda picks up the new object the next time a request falls
+    # outside the grid it has loaded.
+    started = time.perf_counter()
+    now = time.time()
+    planet_grid.write_grid(GRID_PATH, now, HOURS)
+    s3.upload_file(GRID_PATH, BUCKET, KEY, ExtraArgs={"ContentType": "application/octet-stream"})
+    size = os.path.getsize(GRID_PATH)
+    os.remove(GRID_PATH)
+    result = {
+        "key": KEY,
+        "start": int(now // 3600) * 3600,
+        "hours": HOURS,
+        "bytes": size,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+    print(json.dumps(result))
+    return result
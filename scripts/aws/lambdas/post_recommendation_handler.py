@@ -1,73 +1,30 @@
 import json
 import os
-import boto3
 from datetime import datetime, timezone
-from decimal import Decimal
 
-dynamodb = boto3.resource("dynamodb")
+import cluster_pyramid
+import recommendation_schema
+import search_index
+import version_stamps
+from vela_common import dynamo
+from vela_common.auth import get_claims, is_admin
+from vela_common.responses import response
 
 TABLE_NAME = os.environ.get("REC_TABLE")
 if not TABLE_NAME:
     raise Exception("Missing env var: set REC_TABLE")
 
-table = dynamodb.Table(TABLE_NAME)
+table = dynamo.Table(TABLE_NAME)
+details_table = dynamo.Table(os.environ["REC_DETAILS_TABLE"])
 
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
 
-def get_claims(event):
-    return (
-        event.get("requestContext", {})
-        .get("authorizer", {})
-        .get("jwt", {})
-        .get("claims")
-    )
+CLUSTERS_TABLE = os.environ.get("REC_CLUSTERS_TABLE")
+clusters_table = dynamo.Table(CLUSTERS_TABLE) if CLUSTERS_TABLE else None
 
-
-def is_admin(claims):
-    groups = claims.get("cognito:groups")
-    if not groups:
-        return False
-
-    if isinstance(groups, list):
-        return any(str(g).strip().lower() == "admin" for g in groups)
-
-    if isinstance(groups, str):
-        s = groups.strip()
-
-        if s.startswith("[") and s.endswith("]"):
-            try:
-                parsed = json.loads(s)
-                if isinstance(parsed, list):
-                    return any(str(g).strip().lower() == "admin" for g in parsed)
-            except Exception:
-                inner = s[1:-1].strip()
-                parts = [p.strip() for p in inner.split(",") if p.strip()]
-                return any(p.lower() == "admin" for p in parts)
-
-        parts = [p.strip() for p in s.split(",") if p.strip()]
-        return any(p.lower() == "admin" for p in parts)
-
-    return False
-
-
-def to_dynamo(obj):
-    if isinstance(obj, float):
-        return Decimal(str(obj))
-    if isinstance(obj, list):
-        return [to_dynamo(x) for x in obj]
-    if isinstance(obj, dict):
-        return {k: to_dynamo(v) for k, v in obj.items()}
-    return obj
-
-
-def response(status, body):
-    return {
-        "statusCode": status,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-        },
-        "body": json.dumps(body, default=str),
-    }
+SEARCH_TABLE = os.environ.get("REC_SEARCH_TABLE")
+search_table = dynamo.Table(SEARCH_TABLE) if SEARCH_TABLE else None
 
 
 def lambda_handler(event, context):
@@ -81,38 +38,57 @@ def lambda_handler(event, context):
 
         body = json.loads(event.get("body", "{}"))
 
-        coords = body.get("coordinates") or {}
-        lat = coords.get("lat")
-        lon = coords.get("lon")
-
-        if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
-            return response(400, {
-                "message": "coordinates.lat and coordinates.lon must be numbers",
-            })
+        try:
+            spot_id, lat, lon = recommendation_schema.validate(body)
+        except ValueError as exc:
+            return response(400, {"message": str(exc)})
 
-        rec_id = body.get("id")
-        if isinstance(rec_id, str) and rec_id.strip():
-            spot_id = rec_id.strip()
-        else:
-            spot_id = f"{float(lat):.6f},{float(lon):.6f}"
+        summary, detail = recommendation_schema.build_items(
+            spot_id, body, lat, lon, datetime.now(timezone.utc), created_by=claims.get("sub")
+        )
 
-        item = {
-            "spotId": spot_id,
-            "createdAt": datetime.now(timezone.utc).isoformat(),
-            "createdBy": claims.get("sub"),
-            "data": to_dynamo(body),
+        # A tombstone left by a delete may be overwritten by a new spot.
+        put = {
+            "Item": summary,
+            "ConditionExpression": "attribute_not_exists(spotId) OR #deleted = :true",
+            "ExpressionAttributeNames": {"#deleted": "deleted"},
+            "ExpressionAttributeValues": {":true": True},
         }
+        clusters = []
+        if clusters_table is not None:
+            clusters = cluster_pyramid.cluster_writes(clusters_table, spot_id, float(lat), float(lon), 1)
+        if meta_table is not None:
+            version_stamps.write_with_bump(
+                meta_table,
+                version_stamps.CATALOGUE_KEY,
+                (table, {"Put": put}),
+                (details_table, {"Put": {"Item": detail}}),
+                *clusters,
+            )
+        else:
+            table.put_item(**put)
+            details_table.put_item(Item=detail)
+            for target, action in clusters:
+                target.update_item(**action["Update"])
 
-        table.put_item(
-            Item=item,
-            ConditionExpression="attribute_not_exists(spotId)",
-        )
+        if search_table is not None:
+            try:
+                search_index.add_postings(search_table, spot_id, body)
+            except Exception as exc:
+                # The spot is stored; rebuild-search can index it later.
+                print("ERROR: indexing", spot_id, str(exc))
 
         return response(201, {"message": "Created", "spotId": spot_id})
 
-    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+    except dynamo.client().exceptions.ConditionalCheckFailedException:
         return response(409, {"message": "Recommendation already exists"})
 
+    except dynamo.client().exceptions.TransactionCanceledException as exc:
+        if version_stamps.condition_failed(exc):
+            return response(409, {"message": "Recommendation already exists"})
+        print("ERROR:", str(exc))
+        return response(500, {"message": "Server error"})
+
     except Exception as exc:
         print("ERROR:", str(exc))
         return response(500, {"message": "Server error"})
@@ -0,0 +1,151 @@
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import boto3
+from botocore.exceptions import ClientError
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import recommendation_schema
+import version_stamps
+from vela_common import codec, dynamo
+
+table = dynamo.Table(os.environ["REC_TABLE"], number=codec.number)
+details_table = dynamo.Table(os.environ["REC_DETAILS_TABLE"], number=codec.number)
+
+META_TABLE = os.environ.get("META_TABLE")
+meta_table = dynamo.Table(META_TABLE) if META_TABLE else None
+
+s3 = boto3.client("s3")
+
+BUCKET = os.environ["SNAPSHOT_BUCKET"]
+PREFIX = os.environ.get("SNAPSHOT_PREFIX", "data/recommendations").strip("/")
+POINTER_KEY = f"{PREFIX}/latest.json"
+POINTER_MAX_AGE = int(os.environ.get("SNAPSHOT_POINTER_MAX_AGE", "30"))
+# Old snapshots stay readable this long for clients holding a stale pointer.
+RETENTION_SECONDS = int(os.environ.get("SNAPSHOT_RETENTION_HOURS", "24")) * 3600
+IMMUTABLE = "public, max-age=31536000, immutable"
+SYNC_SAFETY_SECONDS = int(os.environ.get("REC_SYNC_SAFETY_SECONDS", "30"))
+
+
+def scan_all(source, **kwargs):
+    items = []
+    while True:
+        out = source.scan(**kwargs)
+        items.extend(out.get("Items", []))
+        if "LastEvaluatedKey" not in out:
+            return items
+        kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+
+
+def scan_catalogue():
+    # The snapshot is the full view, so join every summary with its detail;
+    # scanning both tables is far cheaper than a BatchGetItem per summary.
+    details = {detail["spotId"]: detail for detail in scan_all(details_table)}
+    items = [
+        recommendation_schema.with_detail(item, details.get(item["spotId"]))
+        for item in scan_all(
+            table,
+            FilterExpression="attribute_not_exists(#deleted)",
+            ExpressionAttributeNames={"#deleted": "deleted"},
+        )
+    ]
+    # Stable order so an unchanged catalogue hashes to the same key.
+    items.sort(key=lambda item: item["spotId"])
+    return items
+
+
+def current_pointer():
+    try:
+        return json.loads(s3.get_object(Bucket=BUCKET, Key=POINTER_KEY)["Body"].read())
+    except ClientError as exc:
+        # The role may only list the snapshot prefix, so S3 answers a missing
+        # pointer with 403 AccessDenied rather than 404 NoSuchKey.
+        if exc.response["Error"]["Code"] in {"NoSuchKey", "404", "AccessDenied", "403"}:
+            return None
+        raise
+
+
+def put_snapshot(key, body, encoding):
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=key,
+        Body=body,
+        ContentType="application/json",
+        ContentEncoding=encoding,
+        CacheControl=IMMUTABLE,
+    )
+
+
+def prune(keep):
+    cutoff = time.time() - RETENTION_SECONDS
+    paginator = s3.get_paginator("list_objects_v2")
+    stale = []
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=f"{PREFIX}/"):
+        for obj in page.get("Contents", []):
+            if obj["Key"] == POINTER_KEY or obj["Key"] in keep:
+                continue
+            if obj["LastModified"].timestamp() < cutoff:
+                stale.append({"Key": obj["Key"]})
+    for start in range(0, len(stale), 1000):
+        s3.delete_objects(Bucket=BUCKET, Delete={"Objects": stale[start:start + 1000], "Quiet": True})
+    return len(stale)
+
+
+def publish():
+    # Read the version first: a write racing the scan then yields a pointer
+    # that looks older than its contents and is replaced on the next batch.
+    version = version_stamps.current(meta_table, version_stamps.CATALOGUE_KEY, consistent=True) if meta_table else None
+    cursor = (datetime.now(timezone.utc) - timedelta(seconds=SYNC_SAFETY_SECONDS)).strftime(
+        version_stamps.CHANGE_TIME_FORMAT
+    )
+    items = scan_catalogue()
+    body = codec.dumpb({"items": items})
+    digest = hashlib.sha256(body).hexdigest()[:20]
+
+    pointer = current_pointer()
+    if pointer and pointer.get("hash") == digest and pointer.get("version") == version:
+        return pointer, False
+
+    pointer = {
+        "hash": digest,
+        "version": version,
+        "count": len(items),
+        "bytes": len(body),
+        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        # Delta sync (GET /recommendations?since=) can resume from here.
+        "cursor": cursor,
+    }
+    gzip_key = f"{PREFIX}/{digest}.json.gz"
+    put_snapshot(gzip_key, gzip.compress(body, compresslevel=9, mtime=0), "gzip")
+    pointer["gzip"] = f"/{gzip_key}"
+    if brotli is not None:
+        br_key = f"{PREFIX}/{digest}.json.br"
+        put_snapshot(br_key, brotli.compress(body, quality=11), "br")
+        pointer["br"] = f"/{br_key}"
+
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=POINTER_KEY,
+        Body=json.dumps(pointer).encode("utf-8"),
+        ContentType="application/json",
+        CacheControl=f"public, max-age={POINTER_MAX_AGE}",
+    )
+    prune({pointer["gzip"].lstrip("/"), pointer.get("br", "").lstrip("/")})
+    return pointer, True
+
+
+def lambda_handler(event, context):
+    # Invoked by the Recommendations stream (batched, so bursts of writes
+    # publish once) or directly by deploy.py; the records themselves are not
+    # needed because every run republishes the whole catalogue.
+    pointer, changed = publish()
+    print(json.dumps({"published": changed, **pointer}))
+    return {"published": changed, "hash": pointer["hash"], "count": pointer["count"]}
@@ -0,0 +1,262 @@
+import csv
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import cluster_pyramid
+import recommendation_schema
+import search_index
+import version_stamps
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+MAX_ATTEMPTS = 8
+DEFAULT_WORKERS = 8
+
+# CSV columns map onto the JSON body; lat/lon (or lng) become coordinates
+# and list columns hold "|"-separated values.
+CSV_LIST_FIELDS = ("photo_urls", "source_urls")
+CSV_LIST_SEPARATOR = "|"
+FORMATS = ("json", "ndjson", "csv")
+
+
+def detect_format(text, hint=""):
+    """json, ndjson or csv from a file name / content type hint, else from the text."""
+    hint = (hint or "").lower()
+    if "csv" in hint:
+        return "csv"
+    if "ndjson" in hint or "jsonl" in hint or "json-seq" in hint:
+        return "ndjson"
+    if hint.endswith("json"):
+        return "json"
+    start = text.lstrip()[:1]
+    if start == "[":
+        return "json"
+    if start == "{":
+        try:
+            json.loads(text)
+            return "json"
+        except ValueError:
+            return "ndjson"
+    return "csv"
+
+
+def csv_body(row):
+    body = {}
+    coordinates = {}
+    for key, value in row.items():
+        if key is None or value is None:
+            continue
+        key = key.strip()
+        value = value.strip()
+        if not value:
+            continue
+        if key in ("lat", "lon", "lng"):
+            try:
+                coordinates["lon" if key == "lng" else key] = float(value)
+            except ValueError:
+                coordinates["lon" if key == "lng" else key] = value
+        elif key in CSV_LIST_FIELDS:
+            body[key] = [part.strip() for part in value.split(CSV_LIST_SEPARATOR) if part.strip()]
+        else:
+            body[key] = value
+    if coordinates:
+        body["coordinates"] = coordinates
+    return body
+
+
+def parse_rows(text, fmt):
+    """List of recommendation bodies; ValueError if the batch itself is malformed."""
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise ValueError("Body is not valid JSON")
+        if isinstance(data, dict):
+            data = data.get("items")
+        if not isinstance(data, list):
+            raise ValueError('JSON batch must be an array or {"items": [...]}')
+        return data
+    if fmt == "ndjson":
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"Line {number} is not valid JSON")
+        return rows
+    if fmt == "csv":
+        return [csv_body(row) for row in csv.DictReader(io.StringIO(text))]
+    raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+
+class UnprocessedWrites(RuntimeError):
+    """BatchWriteItem gave up; ``requests`` (the rest of the call included) were not written."""
+
+    def __init__(self, table_name, requests, attempts):
+        super().__init__(f"{table_name}: {len(requests)} writes still unprocessed after {attempts} attempts")
+        self.requests = requests
+
+
+def batch_write(client, table_name, requests):
+    """BatchWriteItem in 25-request slices, retrying UnprocessedItems with backoff."""
+    for start in range(0, len(requests), BATCH_WRITE_SIZE):
+        pending = {table_name: requests[start:start + BATCH_WRITE_SIZE]}
+        attempt = 0
+        while pending:
+            out = client.batch_write_item(RequestItems=pending)
+            pending = out.get("UnprocessedItems") or None
+            if pending:
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    rest = requests[start + BATCH_WRITE_SIZE:]
+                    raise UnprocessedWrites(table_name, pending[table_name] + rest, attempt)
+                time.sleep(min(0.05 * 2 ** attempt, 2.0))
+
+
+def put_spot_ids(requests):
+    return {request["PutRequest"]["Item"]["spotId"] for request in requests}
+
+
+def live_spot_ids(client, table_name, spot_ids):
+    live = set()
+    request = {table_name: {
+        "Keys": [{"spotId": spot_id} for spot_id in spot_ids],
+        "ProjectionExpression": "spotId, #deleted",
+        "ExpressionAttributeNames": {"#deleted": "deleted"},
+    }}
+    attempt = 0
+    while request:
+        out = client.batch_get_item(RequestItems=request)
+        for item in out.get("Responses", {}).get(table_name, []):
+            if not item.get("deleted"):
+                live.add(item["spotId"])
+        request = out.get("UnprocessedKeys") or None
+        if request:
+            attempt += 1
+            time.sleep(min(0.05 * 2 ** attempt, 2.0))
+    return live
+
+
+def import_rows(
+    rows,
+    table,
+    details_table,
+    clusters_table=None,
+    search_table=None,
+    meta_table=None,
+    created_by=None,
+    workers=DEFAULT_WORKERS,
+    dry_run=False,
+):
+    """Validate and write ``rows`` like POST /recommendations would, in bulk.
+
+    Returns a report with per-row ``errors`` (invalid rows), ``conflicts``
+    (spot ids that already exist or repeat earlier rows) and ``failed`` (rows
+    DynamoDB did not accept, safe to import again). BatchWriteItem has no
+    conditions, so existence is checked right before each chunk is written;
+    a spot posted concurrently in that window is overwritten.
+    """
+    started = time.perf_counter()
+    client = table.meta.client
+    now = datetime.now(timezone.utc)
+    errors = []
+    conflicts = []
+    failed = []
+    warnings = []
+    prepared = []
+    seen = {}
+    for number, body in enumerate(rows, start=1):
+        try:
+            spot_id, lat, lon = recommendation_schema.validate(body)
+        except ValueError as exc:
+            errors.append({"row": number, "message": str(exc)})
+            continue
+        if spot_id in seen:
+            conflicts.append({"row": number, "spotId": spot_id, "message": f"Duplicate of row {seen[spot_id]}"})
+            continue
+        seen[spot_id] = number
+        summary, detail = recommendation_schema.build_items(spot_id, body, lat, lon, now, created_by=created_by)
+        prepared.append((number, spot_id, body, float(lat), float(lon), summary, detail))
+
+    def write_chunk(chunk):
+        live = live_spot_ids(client, table.name, [entry[1] for entry in chunk])
+        fresh = [entry for entry in chunk if entry[1] not in live]
+        clashes = [
+            {"row": entry[0], "spotId": entry[1], "message": "Recommendation already exists"}
+            for entry in chunk if entry[1] in live
+        ]
+        unwritten = []
+        if not dry_run:
+            # Details first, so a reader never sees a summary without one.
+            for target, column in ((details_table, 6), (table, 5)):
+                try:
+                    batch_write(client, target.name, [{"PutRequest": {"Item": entry[column]}} for entry in fresh])
+                except UnprocessedWrites as exc:
+                    missing = put_spot_ids(exc.requests)
+                    unwritten += [(entry, str(exc)) for entry in fresh if entry[1] in missing]
+                    fresh = [entry for entry in fresh if entry[1] not in missing]
+                except Exception as exc:
+                    unwritten += [(entry, str(exc)) for entry in fresh]
+                    fresh = []
+        return fresh, clashes, unwritten
+
+    def write_postings(requests):
+        try:
+            batch_write(client, search_table.name, requests)
+        except UnprocessedWrites as exc:
+            return len(exc.requests)
+        return 0
+
+    written = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        chunks = [prepared[start:start + BATCH_GET_SIZE] for start in range(0, len(prepared), BATCH_GET_SIZE)]
+        for fresh, clashes, unwritten in executor.map(write_chunk, chunks):
+            written.extend(fresh)
+            conflicts.extend(clashes)
+            failed.extend({"row": entry[0], "spotId": entry[1], "message": message} for entry, message in unwritten)
+
+        if written and not dry_run:
+            if search_table is not None:
+                postings = [
+                    {"PutRequest": {"Item": row}}
+                    for entry in written
+                    for row in search_index.posting_rows(entry[1], entry[2])
+                ]
+                slices = [postings[start:start + BATCH_WRITE_SIZE] for start in range(0, len(postings), BATCH_WRITE_SIZE)]
+                dropped = sum(executor.map(write_postings, slices))
+                if dropped:
+                    warnings.append(
+                        f"{dropped} search postings not written; run manage_recommendations.py rebuild-search"
+                    )
+            if clusters_table is not None:
+                # One ADD per touched cell instead of seven per spot.
+                merged = cluster_pyramid.aggregate([(entry[1], entry[3], entry[4]) for entry in written])
+                try:
+                    list(executor.map(lambda item: client.update_item(
+                        TableName=clusters_table.name, **cluster_pyramid.merge_params(item)
+                    ), merged))
+                except Exception as exc:
+                    warnings.append(f"Cluster counts not updated ({exc}); run manage_recommendations.py rebuild-clusters")
+            if meta_table is not None:
+                version_stamps.bump(meta_table, version_stamps.CATALOGUE_KEY)
+
+    conflicts.sort(key=lambda conflict: conflict["row"])
+    failed.sort(key=lambda failure: failure["row"])
+    elapsed = time.perf_counter() - started
+    report = {
+        "received": len(rows),
+        "imported": len(written),
+        "conflicts": conflicts,
+        "errors": errors,
+        "failed": failed,
+        "dryRun": dry_run,
+        "seconds": round(elapsed, 3),
+    }
+    if warnings:
+        report["warnings"] = warnings
+    return report
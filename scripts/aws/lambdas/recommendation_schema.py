@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+import geo
+import version_stamps
+
+# Recommendations holds one compact, map-ready summary per spot; everything
+# else a spot was posted with lives in RecommendationDetails under the same
+# spotId. Rows written before the split keep the whole body under "data"
+# until manage_recommendations.py migrate-schema rewrites them.
+SUMMARY_PROJECTION = "spotId, #name, #type, lat, lon, #d.#name, #d.coordinates, #d.#type"
+SUMMARY_PROJECTION_NAMES = {"#name": "name", "#type": "type", "#d": "data"}
+
+
+def to_dynamo(obj):
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, list):
+        return [to_dynamo(x) for x in obj]
+    if isinstance(obj, dict):
+        return {k: to_dynamo(v) for k, v in obj.items()}
+    return obj
+
+
+def text_field(body, name):
+    value = body.get(name)
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def validate(body):
+    """(spot_id, lat, lon) for a posted body; ValueError with the client message if invalid."""
+    if not isinstance(body, dict):
+        raise ValueError("Recommendation must be a JSON object")
+    coords = body.get("coordinates") or {}
+    lat = coords.get("lat") if isinstance(coords, dict) else None
+    lon = coords.get("lon") if isinstance(coords, dict) else None
+    if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+        raise ValueError("coordinates.lat and coordinates.lon must be numbers")
+
+    rec_id = body.get("id")
+    if isinstance(rec_id, str) and rec_id.strip():
+        spot_id = rec_id.strip()
+    else:
+        spot_id = f"{float(lat):.6f},{float(lon):.6f}"
+    return spot_id, lat, lon
+
+
+def build_items(spot_id, body, lat, lon, now, created_by=None, created_at=None):
+    """Summary and detail items for one recommendation body."""
+    summary = {
+        "spotId": spot_id,
+        "lat": to_dynamo(float(lat)),
+        "lon": to_dynamo(float(lon)),
+        "createdAt": created_at or now.isoformat(),
+        "createdBy": created_by,
+    }
+    for field in ("name", "type"):
+        value = text_field(body, field)
+        if value:
+            summary[field] = value
+    summary.update(geo.index_attributes(float(lat), float(lon)))
+    summary.update(version_stamps.change_stamp(now))
+
+    detail = {
+        "spotId": spot_id,
+        "data": to_dynamo(body),
+        "updatedAt": summary["updatedAt"],
+    }
+    return summary, detail
+
+
+def position(item):
+    """(lat, lon) of a summary or legacy item, or None."""
+    if "lat" in item and "lon" in item:
+        try:
+            return float(item["lat"]), float(item["lon"])
+        except (TypeError, ValueError):
+            return None
+    coords = (item.get("data") or {}).get("coordinates") or item.get("coordinates") or {}
+    try:
+        return float(coords["lat"]), float(coords["lon"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def summary_view(item):
+    """List shape served to clients: spotId, name, coordinates, type."""
+    legacy = item.get("data") or {}
+    out = {"spotId": item.get("spotId")}
+    name = item.get("name", legacy.get("name"))
+    if name is not None:
+        out["name"] = name
+    if "lat" in item and "lon" in item:
+        out["coordinates"] = {"lat": item["lat"], "lon": item["lon"]}
+    elif "coordinates" in legacy:
+        out["coordinates"] = legacy["coordinates"]
+    kind = item.get("type", legacy.get("type"))
+    if kind is not None:
+        out["type"] = kind
+    return out
+
+
+def with_detail(item, detail):
+    """Full shape served to clients: the stored item with its posted body under "data"."""
+    if "data" in item or detail is None:
+        return item
+    return {**item, "data": detail.get("data")}
@@ -0,0 +1,46 @@
+import importlib
+
+from vela_common.responses import response
+
+# One function behind every favorites and recommendations route, so all of
+# them share a warm container pool. Handler modules are imported on the
+# first request for one of their routes: a cold start pays only for the
+# route being served, and every handler shares the container's DynamoDB
+# client (see vela_common/dynamo.py).
+ROUTES = {
+    "POST /favorites": "favorites_handler",
+    "GET /favorites": "get_favorites_handler",
+    "DELETE /favorites/{spotId}": "delete_favorite_handler",
+    "POST /favorites/batch": "favorites_batch_handler",
+    "DELETE /favorites/batch": "favorites_batch_handler",
+    "POST /recommendations": "post_recommendation_handler",
+    "GET /recommendations": "get_recommendations_handler",
+    "GET /recommendations/nearest": "get_recommendations_handler",
+    "GET /recommendations/clusters": "get_recommendations_handler",
+    "GET /recommendations/search": "get_recommendations_handler",
+    "GET /recommendations/{spotId}": "get_recommendations_handler",
+    "DELETE /recommendations/{spotId}": "delete_recommendation_handler",
+}
+
+handlers = {}
+
+
+def handler_for(route_key):
+    module_name = ROUTES.get(route_key)
+    if module_name is None:
+        return None
+    if module_name not in handlers:
+        handlers[module_name] = importlib.import_module(module_name).lambda_handler
+    return handlers[module_name]
+
+
+def lambda_handler(event, context):
+    route_key = event.get("routeKey")
+    try:
+        handler = handler_for(route_key)
+    except Exception as exc:
+        print("ERROR:", route_key, str(exc))
+        return response(500, {"message": "Server error"})
+    if handler is None:
+        return response(404, {"message": f"No handler for {route_key}"})
+    return handler(event, context)
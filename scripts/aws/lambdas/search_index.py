@@ -0,0 +1,91 @@
+import re
+import unicodedata
+
+# Inverted index over recommendation text. Every (term, spot) pair is one
+# posting row keyed by (gram, key): gram is the term's first two characters
+# and key is "term#spotId", so all postings for terms starting with a query
+# prefix come back from a single Query on gram with begins_with(key, prefix).
+# Rows are tiny and write through BatchWriteItem, unlike one growing item per
+# term, which needs read-modify-write and caps out at 400 KB.
+FIELD_WEIGHTS = (("name", 8), ("region", 4), ("country", 4), ("type", 2), ("description", 1))
+GRAM_LENGTH = 2
+MAX_TERMS = 100
+# Terms matched only by prefix score this fraction of an exact match.
+PREFIX_FACTOR = 0.5
+STOP_WORDS = frozenset(
+    "an and are as at be by for from in is it of on or the to with".split()
+)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return [
+        token for token in TOKEN_RE.findall(normalize(text))
+        if len(token) >= GRAM_LENGTH and token not in STOP_WORDS
+    ]
+
+
+def terms(body):
+    """{term: weight} for a recommendation body, best field first, at most MAX_TERMS."""
+    weights = {}
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(body.get(field)):
+            if token in weights:
+                weights[token] = max(weights[token], weight)
+            elif len(weights) < MAX_TERMS:
+                weights[token] = weight
+    return weights
+
+
+def posting_rows(spot_id, body):
+    return [
+        {"gram": term[:GRAM_LENGTH], "key": f"{term}#{spot_id}", "w": weight}
+        for term, weight in terms(body).items()
+    ]
+
+
+def add_postings(search_table, spot_id, body):
+    with search_table.batch_writer() as batch:
+        for row in posting_rows(spot_id, body):
+            batch.put_item(Item=row)
+
+
+def remove_postings(search_table, spot_id, body):
+    with search_table.batch_writer() as batch:
+        for row in posting_rows(spot_id, body):
+            batch.delete_item(Key={"gram": row["gram"], "key": row["key"]})
+
+
+def query_terms(text, max_terms):
+    """Distinct search terms of a query string, in order."""
+    return list(dict.fromkeys(tokenize(text)))[:max_terms]
+
+
+def rank(query, postings):
+    """[(score, spotId)] best first for spots matching every query term.
+
+    ``postings[i]`` holds the (key, weight) rows returned for ``query[i]``.
+    """
+    totals = None
+    for term, rows in zip(query, postings):
+        best = {}
+        for key, weight in rows:
+            token, _, spot_id = key.partition("#")
+            score = float(weight) * (1.0 if token == term else PREFIX_FACTOR)
+            if score > best.get(spot_id, 0.0):
+                best[spot_id] = score
+        if totals is None:
+            totals = best
+        else:
+            totals = {spot_id: totals[spot_id] + score for spot_id, score in best.items() if spot_id in totals}
+        if not totals:
+            return []
+    return sorted(((score, spot_id) for spot_id, score in (totals or {}).items()), key=lambda pair: (-pair[0], pair[1]))
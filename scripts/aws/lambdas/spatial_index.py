@@ -0,0 +1,105 @@
+import heapq
+import math
+from array import array
+
+import geo
+
+LEAF_SIZE = 8
+
+
+def unit_vector(lat, lon):
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi)
+
+
+def chord_to_km(chord):
+    return 2 * geo.EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class NearestIndex:
+    """KD-tree over unit-sphere vectors, stored implicitly in flat arrays.
+
+    Points are reordered so every range [lo, hi) is split at its midpoint on
+    the axis in ``axes[mid]``; no node objects are allocated. Euclidean
+    (chord) order on the sphere is the same as great-circle order.
+    """
+
+    def __init__(self, points, payloads):
+        order = list(range(len(points)))
+        vectors = [unit_vector(lat, lon) for lat, lon in points]
+        self.axes = array("b", bytes(len(order)))
+        self._build(order, vectors, 0, len(order))
+        self.xs = array("d", (vectors[i][0] for i in order))
+        self.ys = array("d", (vectors[i][1] for i in order))
+        self.zs = array("d", (vectors[i][2] for i in order))
+        self.payloads = [payloads[i] for i in order]
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def _build(self, order, vectors, lo, hi):
+        stack = [(lo, hi)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            segment = order[lo:hi]
+            spreads = [
+                max(vectors[i][axis] for i in segment) - min(vectors[i][axis] for i in segment)
+                for axis in range(3)
+            ]
+            axis = spreads.index(max(spreads))
+            segment.sort(key=lambda i: vectors[i][axis])
+            order[lo:hi] = segment
+            mid = (lo + hi) // 2
+            self.axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+    def nearest(self, lat, lon, k):
+        """Return [(distance_km, payload)] for the ``k`` closest points."""
+        if k <= 0 or not self.payloads:
+            return []
+        qx, qy, qz = unit_vector(lat, lon)
+        query = (qx, qy, qz)
+        coords = (self.xs, self.ys, self.zs)
+        xs, ys, zs = coords
+        best = []  # max-heap of (-squared chord, index)
+
+        def consider(i):
+            dx = xs[i] - qx
+            dy = ys[i] - qy
+            dz = zs[i] - qz
+            d2 = dx * dx + dy * dy + dz * dz
+            if len(best) < k:
+                heapq.heappush(best, (-d2, i))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, i))
+
+        # Each entry carries a lower bound on the squared distance to its
+        # range; the far side of a split is skipped once the heap is full
+        # and the splitting plane is further away than the current k-th best.
+        stack = [(0, len(self.payloads), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if len(best) == k and bound >= -best[0][0]:
+                continue
+            if hi - lo <= LEAF_SIZE:
+                for i in range(lo, hi):
+                    consider(i)
+                continue
+            mid = (lo + hi) // 2
+            axis = self.axes[mid]
+            diff = query[axis] - coords[axis][mid]
+            consider(mid)
+            if diff < 0:
+                stack.append((mid + 1, hi, max(bound, diff * diff)))
+                stack.append((lo, mid, bound))
+            else:
+                stack.append((lo, mid, max(bound, diff * diff)))
+                stack.append((mid + 1, hi, bound))
+
+        found = sorted((-neg, i) for neg, i in best)
+        return [(chord_to_km(math.sqrt(d2)), self.payloads[i]) for d2, i in found]
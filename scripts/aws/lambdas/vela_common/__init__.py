@@ -0,0 +1,7 @@
+"""Code shared by every Python handler, deployed once as the vela-common layer.
+
+deploy.py builds the layer from this package (with precompiled bytecode and
+any optional wheels) and attaches it to each function it packages, so the
+function zips only carry their own modules. Importing the package is free:
+submodules load when a handler imports them.
+"""
@@ -0,0 +1,37 @@
+import json
+
+
+def get_claims(event):
+    """JWT claims from an HTTP API authorizer, or from a REST API Cognito authorizer."""
+    authorizer = event.get("requestContext", {}).get("authorizer", {})
+    claims = authorizer.get("jwt", {}).get("claims")
+    if claims:
+        return claims
+    return authorizer.get("claims")
+
+
+def group_names(groups):
+    """The ``cognito:groups`` claim as a list, whichever shape the authorizer passed."""
+    if not groups:
+        return []
+    if isinstance(groups, list):
+        return [str(g).strip() for g in groups]
+    if not isinstance(groups, str):
+        return []
+
+    s = groups.strip()
+    if s.startswith("[") and s.endswith("]"):
+        try:
+            parsed = json.loads(s)
+            if isinstance(parsed, list):
+                return [str(g).strip() for g in parsed]
+        except ValueError:
+            pass
+        # HTTP APIs flatten the list to "[admin other]" or "[admin, other]".
+        s = s[1:-1].replace(",", " ")
+        return [p.strip().strip('"').strip("'") for p in s.split() if p.strip()]
+    return [p.strip() for p in s.split(",") if p.strip()]
+
+
+def is_admin(claims):
+    return any(name.lower() == "admin" for name in group_names(claims.get("cognito:groups")))
@@ -0,0 +1,68 @@
+"""JSON encoding for API responses built from DynamoDB items.
+
+DynamoDB numbers come back as ``Decimal``, which ``json`` can only encode
+through a Python callback per number. Read-only handlers deserialize numbers
+straight to ``int``/``float`` with ``number``
+(``dynamo.Table(name, number=codec.number)``), so a page of items is
+JSON-ready in the same pass that decodes it; ``default`` still covers
+Decimals from anywhere else.
+
+``dumps`` and ``dumpb`` write compact JSON (``","``/``":"``) for response
+bodies, page tokens, the snapshot and exports alike. They go through orjson
+when the vela-common layer bundles it (``BUNDLE_ORJSON``), which writes UTF-8
+and spells non-finite floats as ``null``. Values orjson refuses (integers
+beyond 64 bits, non-string keys, str/int subclasses) and every value when
+orjson is missing are encoded by the stdlib, ASCII only. Both are valid JSON
+for the same data, but not the same bytes: the snapshot hash changes once when
+the layer gains or loses orjson.
+"""
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Subclasses and datetimes go to ``default`` like they do with json, which
+# raises for them and so hands the value to the stdlib encoder.
+ORJSON_OPTIONS = 0
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+
+def number(text):
+    """A DynamoDB number string as the int or float the API has always returned."""
+    if "." not in text and "e" not in text and "E" not in text:
+        return int(text)
+    value = Decimal(text)
+    return int(value) if value % 1 == 0 else float(value)
+
+
+def default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), default=default)
+
+
+def dumpb(value):
+    """``value`` as compact JSON bytes (UTF-8)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    return _encoder.encode(value).encode("ascii")
+
+
+def dumps(value):
+    """``value`` as a compact JSON string."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=default, option=ORJSON_OPTIONS).decode("utf-8")
+        except orjson.JSONEncodeError:
+            pass
+    return _encoder.encode(value)
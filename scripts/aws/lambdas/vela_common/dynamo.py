@@ -0,0 +1,276 @@
+"""DynamoDB access on the low-level client, for cold-start sensitive Lambdas.
+
+``boto3.resource("dynamodb")`` loads the resource model on import and walks
+every request and response shape to convert attribute values. Here boto3 is
+only imported when the first call is made, one thread-safe client is shared
+by every table in the container, and attribute values are converted by hand.
+
+``Table`` and ``Client`` accept and return plain Python values like the
+resource API does, for the subset of calls these handlers make. Numbers come
+back as ``Decimal``, or through a table's ``number`` hook (see codec.py).
+Shared helpers therefore work with either these or real resource tables,
+which the maintenance scripts still pass in.
+"""
+import threading
+import time
+from decimal import Decimal
+
+BATCH_WRITE_SIZE = 25
+MAX_ATTEMPTS = 8
+
+# Request members that hold a key, an item or attribute values.
+ITEM_PARAMS = ("Key", "Item", "ExclusiveStartKey", "ExpressionAttributeValues")
+# Response members that hold a single item.
+ITEM_RESULTS = ("Item", "Attributes", "LastEvaluatedKey")
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client():
+    """The container's low-level DynamoDB client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import boto3
+
+                _client = boto3.client("dynamodb")
+    return _client
+
+
+def serialize(value):
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, float):
+        if value != value or value in (float("inf"), float("-inf")):
+            raise TypeError(f"DynamoDB cannot store {value!r}")
+        return {"N": repr(value)}
+    if isinstance(value, dict):
+        return {"M": {key: serialize(member) for key, member in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [serialize(member) for member in value]}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            raise TypeError("DynamoDB cannot store an empty set")
+        if all(isinstance(member, str) for member in value):
+            return {"SS": list(value)}
+        if all(isinstance(member, (bytes, bytearray)) for member in value):
+            return {"BS": [bytes(member) for member in value]}
+        return {"NS": [serialize(member)["N"] for member in value]}
+    raise TypeError(f"Unsupported DynamoDB type: {type(value).__name__}")
+
+
+def deserialize(value, number=Decimal):
+    (kind, data), = value.items()
+    if kind == "S":
+        return data
+    if kind == "N":
+        return number(data)
+    if kind == "M":
+        return {key: deserialize(member, number) for key, member in data.items()}
+    if kind == "L":
+        return [deserialize(member, number) for member in data]
+    if kind == "BOOL":
+        return data
+    if kind == "NULL":
+        return None
+    if kind == "SS":
+        return set(data)
+    if kind == "NS":
+        return {number(member) for member in data}
+    if kind == "B":
+        return data
+    if kind == "BS":
+        return set(data)
+    raise TypeError(f"Unsupported DynamoDB type: {kind}")
+
+
+def to_item(item):
+    return {key: serialize(value) for key, value in item.items()}
+
+
+def from_item(item, number=Decimal):
+    return {key: deserialize(value, number) for key, value in item.items()}
+
+
+def to_params(params):
+    params = dict(params)
+    for name in ITEM_PARAMS:
+        if name in params:
+            params[name] = to_item(params[name])
+    return params
+
+
+def from_result(out, number=Decimal):
+    for name in ITEM_RESULTS:
+        if name in out:
+            out[name] = from_item(out[name], number)
+    if "Items" in out:
+        out["Items"] = [from_item(item, number) for item in out["Items"]]
+    return out
+
+
+def to_write_requests(requests):
+    converted = []
+    for request in requests:
+        if "PutRequest" in request:
+            converted.append({"PutRequest": {"Item": to_item(request["PutRequest"]["Item"])}})
+        else:
+            converted.append({"DeleteRequest": {"Key": to_item(request["DeleteRequest"]["Key"])}})
+    return converted
+
+
+def from_write_requests(requests, number=Decimal):
+    converted = []
+    for request in requests:
+        if "PutRequest" in request:
+            converted.append({"PutRequest": {"Item": from_item(request["PutRequest"]["Item"], number)}})
+        else:
+            converted.append({"DeleteRequest": {"Key": from_item(request["DeleteRequest"]["Key"], number)}})
+    return converted
+
+
+class Client:
+    """The resource client's interface (``table.meta.client``) on the low-level client."""
+
+    def __init__(self, number=Decimal):
+        self.number = number
+
+    @property
+    def exceptions(self):
+        return client().exceptions
+
+    def get_item(self, **params):
+        return from_result(client().get_item(**to_params(params)), self.number)
+
+    def put_item(self, **params):
+        return from_result(client().put_item(**to_params(params)), self.number)
+
+    def update_item(self, **params):
+        return from_result(client().update_item(**to_params(params)), self.number)
+
+    def delete_item(self, **params):
+        return from_result(client().delete_item(**to_params(params)), self.number)
+
+    def query(self, **params):
+        return from_result(client().query(**to_params(params)), self.number)
+
+    def scan(self, **params):
+        return from_result(client().scan(**to_params(params)), self.number)
+
+    def batch_get_item(self, RequestItems, **params):
+        request = {
+            name: {**spec, "Keys": [to_item(key) for key in spec["Keys"]]}
+            for name, spec in RequestItems.items()
+        }
+        out = client().batch_get_item(RequestItems=request, **params)
+        out["Responses"] = {
+            name: [from_item(item, self.number) for item in items]
+            for name, items in out.get("Responses", {}).items()
+        }
+        out["UnprocessedKeys"] = {
+            name: {**spec, "Keys": [from_item(key, self.number) for key in spec["Keys"]]}
+            for name, spec in (out.get("UnprocessedKeys") or {}).items()
+        }
+        return out
+
+    def batch_write_item(self, RequestItems, **params):
+        request = {name: to_write_requests(requests) for name, requests in RequestItems.items()}
+        out = client().batch_write_item(RequestItems=request, **params)
+        out["UnprocessedItems"] = {
+            name: from_write_requests(requests, self.number)
+            for name, requests in (out.get("UnprocessedItems") or {}).items()
+        }
+        return out
+
+    def transact_write_items(self, TransactItems, **params):
+        items = []
+        for entry in TransactItems:
+            (kind, action), = entry.items()
+            items.append({kind: to_params(action)})
+        return client().transact_write_items(TransactItems=items, **params)
+
+
+class Meta:
+    def __init__(self, client):
+        self.client = client
+
+
+class BatchWriter:
+    """``Table.batch_writer()``: buffers puts/deletes into 25-item BatchWriteItem calls."""
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.requests = []
+
+    def put_item(self, Item):
+        self.requests.append({"PutRequest": {"Item": to_item(Item)}})
+        if len(self.requests) >= BATCH_WRITE_SIZE:
+            self.flush()
+
+    def delete_item(self, Key):
+        self.requests.append({"DeleteRequest": {"Key": to_item(Key)}})
+        if len(self.requests) >= BATCH_WRITE_SIZE:
+            self.flush()
+
+    def flush(self):
+        pending = {self.table_name: self.requests[:BATCH_WRITE_SIZE]}
+        self.requests = self.requests[BATCH_WRITE_SIZE:]
+        attempt = 0
+        while pending:
+            out = client().batch_write_item(RequestItems=pending)
+            pending = out.get("UnprocessedItems") or None
+            if pending:
+                attempt += 1
+                if attempt >= MAX_ATTEMPTS:
+                    raise RuntimeError(f"{self.table_name}: writes still unprocessed after {attempt} attempts")
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        while self.requests:
+            self.flush()
+
+
+class Table:
+    """A named table with the resource ``Table`` methods used by the handlers.
+
+    Creating one costs nothing: no client exists until the first call.
+    ``number`` converts the table's number strings, ``Decimal`` by default.
+    """
+
+    def __init__(self, name, number=Decimal):
+        self.name = name
+        self.meta = Meta(Client(number))
+
+    def get_item(self, **params):
+        return self.meta.client.get_item(TableName=self.name, **params)
+
+    def put_item(self, **params):
+        return self.meta.client.put_item(TableName=self.name, **params)
+
+    def update_item(self, **params):
+        return self.meta.client.update_item(TableName=self.name, **params)
+
+    def delete_item(self, **params):
+        return self.meta.client.delete_item(TableName=self.name, **params)
+
+    def query(self, **params):
+        return self.meta.client.query(TableName=self.name, **params)
+
+    def scan(self, **params):
+        return self.meta.client.scan(TableName=self.name, **params)
+
+    def batch_writer(self):
+        return BatchWriter(self.name)
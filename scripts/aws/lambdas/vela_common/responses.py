@@ -0,0 +1,18 @@
+from vela_common import codec
+
+JSON_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+}
+
+
+def response(status, body, extra_headers=None):
+    """An API Gateway proxy response; ``body`` may already be encoded JSON."""
+    headers = dict(JSON_HEADERS)
+    if extra_headers:
+        headers.update(extra_headers)
+    return {
+        "statusCode": status,
+        "headers": headers,
+        "body": body if isinstance(body, str) else codec.dumps(body),
+    }
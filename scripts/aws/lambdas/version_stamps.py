@@ -0,0 +1,100 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+# Keys of the counters kept in the metadata table. Writers bump a counter
+# with every change so warm containers can tell when their copy is stale.
+CATALOGUE_KEY = "recommendations"
+FAVORITES_KEY_PREFIX = "favorites#"
+
+# Fixed-width UTC timestamps so the sync index's range key sorts as text.
+CHANGE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def favorites_key(user_id):
+    return f"{FAVORITES_KEY_PREFIX}{user_id}"
+
+
+def bump(table, key):
+    out = table.update_item(
+        Key={"pk": key},
+        UpdateExpression="ADD #version :one SET updatedAt = :now",
+        ExpressionAttributeNames={"#version": "version"},
+        ExpressionAttributeValues={":one": 1, ":now": datetime.now(timezone.utc).isoformat()},
+        ReturnValues="UPDATED_NEW",
+    )
+    return int(out["Attributes"]["version"])
+
+
+def change_stamp(now=None):
+    """Attributes that place an item in the sync index (month shard + time)."""
+    now = now or datetime.now(timezone.utc)
+    return {"updatedAt": now.strftime(CHANGE_TIME_FORMAT), "syncShard": now.strftime("%Y-%m")}
+
+
+def current(table, key, consistent=False):
+    out = table.get_item(
+        Key={"pk": key},
+        ProjectionExpression="#version",
+        ExpressionAttributeNames={"#version": "version"},
+        ConsistentRead=consistent,
+    )
+    return int((out.get("Item") or {}).get("version", 0))
+
+
+def write_with_bump(meta_table, key, *writes):
+    """Apply ``writes`` and bump the counter ``key`` in one transaction.
+
+    Each write is a (table, action) pair where action is a TransactWriteItems
+    entry without its TableName, e.g. (table, {"Put": {"Item": {...}}}).
+    Items, keys and values are plain Python values: ``meta_table.meta.client``
+    is the vela_common.dynamo client, which serializes them (and the ones
+    inside each write) before the call. Raises the client's
+    TransactionCanceledException when a condition fails.
+    """
+    items = []
+    for table, action in writes:
+        (kind, params), = action.items()
+        items.append({kind: dict(params, TableName=table.name)})
+    items.append({
+        "Update": {
+            "TableName": meta_table.name,
+            "Key": {"pk": key},
+            "UpdateExpression": "ADD #version :one SET updatedAt = :now",
+            "ExpressionAttributeNames": {"#version": "version"},
+            "ExpressionAttributeValues": {
+                ":one": 1,
+                ":now": datetime.now(timezone.utc).isoformat(),
+            },
+        }
+    })
+    meta_table.meta.client.transact_write_items(TransactItems=items)
+
+
+def condition_failed(exc):
+    """True when a cancelled transaction failed on a condition check."""
+    reasons = exc.response.get("CancellationReasons") or []
+    return any(reason.get("Code") == "ConditionalCheckFailed" for reason in reasons)
+
+
+def etag(version, *parts):
+    """Weak ETag for a response derived from counter ``version`` and the request ``parts``."""
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+    return f'W/"v{version}-{digest}"'
+
+
+def not_modified(event, tag):
+    """True when the request's If-None-Match already names ``tag``."""
+    headers = event.get("headers") or {}
+    header = next((value for key, value in headers.items() if key.lower() == "if-none-match"), None)
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" name the same representation.
+    wanted = tag[2:] if tag.startswith("W/") else tag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == wanted:
+            return True
+    return False
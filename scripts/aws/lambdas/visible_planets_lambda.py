@@ -1,77 +1,747 @@
+import base64
+import http.client
 import json
+import math
+import os
+import random
+import ssl
+import threading
+import time
 import urllib.parse
-import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from vela_common import codec, dynamo
+
+try:
+    import planet_ephemeris
+except ImportError:
+    planet_ephemeris = None
+
+try:
+    import planet_grid
+except ImportError:
+    planet_grid = None
+
+PLANETS_ENGINE = os.environ.get("PLANETS_ENGINE", "local").strip().lower()
+CACHE_TABLE = os.environ.get("PLANETS_CACHE_TABLE", "")
+CACHE_TTL_SECONDS = int(os.environ.get("PLANETS_CACHE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.environ.get("PLANETS_CACHE_MAX_ENTRIES", "1024"))
+TIME_BUCKET_SECONDS = int(os.environ.get("PLANETS_TIME_BUCKET", "3600"))
+# Grid and local-engine results are cheap to recompute, so they are cached
+# in memory only, over short buckets that keep positions within ~1 deg.
+LOCAL_TIME_BUCKET_SECONDS = int(os.environ.get("PLANETS_LOCAL_TIME_BUCKET", "300"))
+BATCH_MAX_LOCATIONS = int(os.environ.get("PLANETS_BATCH_MAX_LOCATIONS", "100"))
+BATCH_CONCURRENCY = int(os.environ.get("PLANETS_BATCH_CONCURRENCY", "8"))
+BATCH_ROUTE = "POST /visible-planets-lambda/batch"
+TIMELINE_DEFAULT_WINDOW = 12 * 3600
+TIMELINE_MAX_WINDOW = 72 * 3600
+TIMELINE_MAX_STEPS = int(os.environ.get("PLANETS_TIMELINE_MAX_STEPS", "2000"))
+TIMELINE_MIN_STEP_MINUTES = 1
+TIMELINE_MAX_STEP_MINUTES = 24 * 60
+COORD_PRECISION = 2
+
+UPSTREAM_HOST = "api.visibleplanets.dev"
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("PLANETS_UPSTREAM_CONNECT_TIMEOUT", "1.5"))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("PLANETS_UPSTREAM_READ_TIMEOUT", "3"))
+UPSTREAM_DEADLINE = float(os.environ.get("PLANETS_UPSTREAM_DEADLINE", "5"))
+UPSTREAM_RETRIES = int(os.environ.get("PLANETS_UPSTREAM_RETRIES", "2"))
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 1.0
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("PLANETS_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("PLANETS_BREAKER_RESET", "30"))
+STALE_TTL_SECONDS = int(os.environ.get("PLANETS_STALE_TTL", "21600"))
+METRICS_NAMESPACE = "VELA/VisiblePlanets"
+
+GRID_BUCKET = os.environ.get("PLANET_GRID_BUCKET", "")
+GRID_KEY = os.environ.get("PLANET_GRID_KEY", "")
+GRID_PATH = os.environ.get("PLANET_GRID_PATH", "")
+GRID_RELOAD_SECONDS = 300
+
+# Tiers that answer without computing or calling upstream.
+CACHE_HIT_TIERS = ("memory", "shared", "stale")
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+}
+
+
+class TTLCache:
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        expires_at = min(expires_at or float("inf"), time.time() + self.ttl_seconds)
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.time() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0
+        return max(0, int(self.opened_at + self.reset_seconds - time.time()) + 1)
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            # Half-open lets a single trial request through.
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+
+
+class ConnectionPool:
+    def __init__(self, host, max_idle):
+        self.host = host
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._context = ssl.create_default_context()
+
+    def _connect(self):
+        return http.client.HTTPSConnection(self.host, timeout=UPSTREAM_CONNECT_TIMEOUT, context=self._context)
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @staticmethod
+    def _send(conn, path):
+        try:
+            if conn.sock is None:
+                conn.connect()
+                conn.sock.settimeout(UPSTREAM_READ_TIMEOUT)
+            conn.request("GET", path, headers={"Accept": "application/json"})
+            resp = conn.getresponse()
+            return resp, resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+    def request(self, path):
+        conn, reused = self._acquire()
+        try:
+            resp, body = self._send(conn, path)
+        except (OSError, http.client.HTTPException):
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive socket; retry once on a
+            # fresh connection rather than on the next pooled one.
+            conn = self._connect()
+            resp, body = self._send(conn, path)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return resp.status, body
+
+
+memory_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+stale_cache = TTLCache(CACHE_MAX_ENTRIES, STALE_TTL_SECONDS)
+cache_stats = {"hits": 0, "misses": 0}
+# Batch requests resolve locations on several threads at once.
+stats_lock = threading.Lock()
+upstream_stats = {"latency_ms": None}
+breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+upstream_pool = ConnectionPool(UPSTREAM_HOST, BATCH_CONCURRENCY)
+grid_state = {"grid": None, "loaded_at": 0.0}
+grid_lock = threading.Lock()
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY)
+# No DynamoDB client is created until the shared cache is first used.
+shared_table = dynamo.Table(CACHE_TABLE) if CACHE_TABLE else None
+
+
+def quantize(value):
+    return round(float(value), COORD_PRECISION)
+
+
+def count_cache(outcome):
+    with stats_lock:
+        cache_stats[outcome] += 1
+
+
+def cache_key(lat, lon, bucket):
+    return f"{lat:.{COORD_PRECISION}f}:{lon:.{COORD_PRECISION}f}:{bucket}"
+
+
+def shared_get(key):
+    table = shared_table
+    if table is None:
+        return None
+    try:
+        item = table.get_item(Key={"cacheKey": key}).get("Item")
+    except Exception as exc:
+        print("Shared cache read failed:", exc)
+        return None
+    # DynamoDB TTL deletes lazily, so expired rows can still be returned.
+    if not item or int(item.get("expiresAt", 0)) <= time.time():
+        return None
+    return item.get("body")
+
+
+def shared_put(key, body, expires_at):
+    table = shared_table
+    if table is None:
+        return
+    try:
+        table.put_item(Item={"cacheKey": key, "body": body, "expiresAt": int(expires_at)})
+    except Exception as exc:
+        print("Shared cache write failed:", exc)
+
+
+def emit_metrics(latency_ms, attempts, success):
+    # CloudWatch embedded metric format: one structured log line per upstream call.
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [[]],
+                "Metrics": [
+                    {"Name": "UpstreamLatency", "Unit": "Milliseconds"},
+                    {"Name": "UpstreamAttempts", "Unit": "Count"},
+                    {"Name": "UpstreamFailure", "Unit": "Count"},
+                    {"Name": "BreakerOpen", "Unit": "Count"},
+                ],
+            }],
+        },
+        "UpstreamLatency": latency_ms,
+        "UpstreamAttempts": attempts,
+        "UpstreamFailure": 0 if success else 1,
+        "BreakerOpen": 0 if breaker.state == "closed" else 1,
+        "BreakerState": breaker.state,
+    }))
+
+
+def fetch_upstream(lat, lon, timestamp=None):
+    if not breaker.allow():
+        emit_metrics(0, 0, False)
+        raise UpstreamUnavailable("circuit open")
+
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+    }
+    if timestamp is not None:
+        params["time"] = iso_time(timestamp)
+    path = f"/v3?{urllib.parse.urlencode(params)}"
+
+    started = time.perf_counter()
+    last_error = None
+    attempts = 0
+    for attempt in range(UPSTREAM_RETRIES + 1):
+        if attempt:
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            if time.perf_counter() - started + delay >= UPSTREAM_DEADLINE:
+                break
+            time.sleep(delay)
+        attempts += 1
+        try:
+            status, body = upstream_pool.request(path)
+        except (OSError, http.client.HTTPException) as exc:
+            last_error = exc
+            continue
+        if status == 429 or status >= 500:
+            last_error = f"HTTP {status}"
+            continue
+
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        upstream_stats["latency_ms"] = latency_ms
+        breaker.record_success()
+        emit_metrics(latency_ms, attempts, True)
+        return status, body
+
+    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    upstream_stats["latency_ms"] = latency_ms
+    breaker.record_failure()
+    emit_metrics(latency_ms, attempts, False)
+    raise UpstreamUnavailable(str(last_error))
+
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+# 0001-01-01T00:00:00Z to 9999-12-31T23:59:59Z, the seconds datetime can format.
+MIN_TIMESTAMP = -62135596800
+MAX_TIMESTAMP = 253402300799
+
+
+def is_number(value):
+    """A finite JSON number; bools are ints in Python but not coordinates."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def valid_coordinates(lat, lon):
+    return is_number(lat) and is_number(lon) and -90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0
+
+
+def parse_timestamp(value):
+    """Unix seconds or an ISO time as unix seconds, None when absent; ValueError otherwise."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError("time must be an ISO time or unix seconds")
+    if isinstance(value, (int, float)):
+        timestamp = float(value)
+    else:
+        value = str(value).strip()
+        try:
+            timestamp = float(value)
+        except ValueError:
+            timestamp = datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    if not math.isfinite(timestamp) or not MIN_TIMESTAMP <= timestamp <= MAX_TIMESTAMP:
+        raise ValueError("time must be a finite unix timestamp within years 1-9999")
+    return timestamp
+
+
+def planets_payload(lat, lon, timestamp, entries, engine):
+    return {
+        "meta": {
+            "time": iso_time(timestamp),
+            "latitude": lat,
+            "longitude": lon,
+            "engine": engine,
+        },
+        "data": entries,
+    }
+
+
+def local_payload(lat, lon, timestamp):
+    return planets_payload(lat, lon, timestamp, planet_ephemeris.visible_planets(timestamp, lat, lon), "local")
+
+
+def load_grid(timestamp):
+    if planet_grid is None or not (GRID_PATH or (GRID_BUCKET and GRID_KEY)):
+        return None
+    grid = grid_state["grid"]
+    if grid is not None and grid.covers(timestamp):
+        return grid
+
+    with grid_lock:
+        grid = grid_state["grid"]
+        # A rebuilt artifact replaces the old one in place; look for it at
+        # most every GRID_RELOAD_SECONDS when a request falls outside the window.
+        if (grid is None or not grid.covers(timestamp)) and time.time() - grid_state["loaded_at"] >= GRID_RELOAD_SECONDS:
+            grid_state["loaded_at"] = time.time()
+            try:
+                if GRID_PATH:
+                    grid = planet_grid.PlanetGrid.from_path(GRID_PATH)
+                else:
+                    import boto3
+
+                    grid = planet_grid.PlanetGrid.from_s3(boto3.client("s3"), GRID_BUCKET, GRID_KEY)
+                grid_state["grid"] = grid
+            except Exception as exc:
+                print("Planet grid unavailable:", exc)
+            if grid is not None and grid.end < time.time():
+                # The scheduled rebuild (PlanetGridBuilder) has not replaced it.
+                print(f"Planet grid expired at {iso_time(grid.end)}; serving the live ephemeris")
+    return grid if grid is not None and grid.covers(timestamp) else None
+
+
+def grid_payload(grid, lat, lon, timestamp):
+    entries = [entry for entry in grid.lookup(timestamp, lat, lon) if entry["aboveHorizon"]]
+    return planets_payload(lat, lon, timestamp, entries, "grid")
+
+
+def use_local_engine():
+    return PLANETS_ENGINE == "local" and planet_ephemeris is not None
+
+
+def compute_payload(lat, lon, timestamp):
+    """(engine, payload) from the grid or the local engine, or None to go upstream."""
+    grid = load_grid(timestamp)
+    if grid is not None:
+        try:
+            return "grid", grid_payload(grid, lat, lon, timestamp)
+        except Exception as exc:
+            print("Planet grid lookup failed, computing live:", exc)
+    if use_local_engine():
+        try:
+            return "local", local_payload(lat, lon, timestamp)
+        except Exception as exc:
+            print("Local ephemeris failed, falling back to upstream:", exc)
+    return None
+
+
+def resolve_computed(lat, lon, timestamp):
+    """(engine, body, tier) for a grid or local result, through the memory cache."""
+    lat = quantize(lat)
+    lon = quantize(lon)
+    bucket = int(timestamp // LOCAL_TIME_BUCKET_SECONDS)
+    key = "computed:" + cache_key(lat, lon, bucket)
+
+    cached = memory_cache.get(key)
+    if cached is not None:
+        count_cache("hits")
+        engine, body = cached
+        return engine, body, "memory"
+
+    computed = compute_payload(lat, lon, timestamp)
+    if computed is None:
+        return None
+    count_cache("misses")
+    engine, payload = computed
+    body = codec.dumps(payload)
+    memory_cache.set(key, (engine, body), (bucket + 1) * LOCAL_TIME_BUCKET_SECONDS)
+    return engine, body, engine
+
+
+def resolve_upstream(lat, lon, timestamp, explicit_time=False):
+    lat = quantize(lat)
+    lon = quantize(lon)
+    bucket = int(timestamp // TIME_BUCKET_SECONDS)
+    key = cache_key(lat, lon, bucket)
+    expires_at = max((bucket + 1) * TIME_BUCKET_SECONDS, time.time() + CACHE_TTL_SECONDS)
+
+    body = memory_cache.get(key)
+    if body is not None:
+        count_cache("hits")
+        return 200, body, "memory"
+
+    body = shared_get(key)
+    if body is not None:
+        count_cache("hits")
+        memory_cache.set(key, body, expires_at)
+        return 200, body, "shared"
+
+    count_cache("misses")
+    stale_key = cache_key(lat, lon, "latest")
+    try:
+        status, body_bytes = fetch_upstream(lat, lon, timestamp if explicit_time else None)
+    except UpstreamUnavailable:
+        body = None if explicit_time else stale_cache.get(stale_key)
+        if body is None:
+            raise
+        return 200, body, "stale"
+    if status != 200:
+        return status, None, "upstream"
+
+    body = codec.dumps(json.loads(body_bytes))
+    memory_cache.set(key, body, expires_at)
+    if not explicit_time:
+        stale_cache.set(stale_key, body)
+    shared_put(key, body, expires_at)
+    return 200, body, "upstream"
+
+
+def cache_headers(tier, engine="upstream"):
+    with stats_lock:
+        hits, misses = cache_stats["hits"], cache_stats["misses"]
+    headers = {
+        "X-Planets-Engine": engine,
+        "X-Cache": "HIT" if tier in CACHE_HIT_TIERS else "MISS",
+        "X-Cache-Tier": tier,
+        "X-Cache-Hits": str(hits),
+        "X-Cache-Misses": str(misses),
+        "X-Upstream-Breaker": breaker.state,
+    }
+    if upstream_stats["latency_ms"] is not None:
+        headers["X-Upstream-Latency-Ms"] = str(upstream_stats["latency_ms"])
+    return headers
+
+
+def unavailable_response():
+    headers = cache_headers("upstream")
+    retry_after = breaker.retry_after()
+    if retry_after:
+        headers["Retry-After"] = str(retry_after)
+    return response(503, {"message": "Planet data is temporarily unavailable"}, headers)
+
+
+def response(status, body, extra_headers=None):
+    headers = {"Content-Type": "application/json", **CORS_HEADERS}
+    if extra_headers:
+        headers.update(extra_headers)
+    return {
+        "statusCode": status,
+        "headers": headers,
+        "body": body if isinstance(body, str) else codec.dumps(body),
+    }
+
+
+def parse_body(event):
+    body = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    body = json.loads(body)
+    if not isinstance(body, dict):
+        raise ValueError("request body must be a JSON object")
+    return body
+
+
+def parse_locations(raw_locations, default_timestamp):
+    if not isinstance(raw_locations, list) or not raw_locations:
+        raise ValueError("locations must be a non-empty list")
+    if len(raw_locations) > BATCH_MAX_LOCATIONS:
+        raise ValueError(f"at most {BATCH_MAX_LOCATIONS} locations per batch")
+
+    locations = []
+    for entry in raw_locations:
+        if not isinstance(entry, dict):
+            raise ValueError("each location must be an object with lat and lon")
+        lat = entry.get("lat")
+        lon = entry.get("lon", entry.get("lng"))
+        if not valid_coordinates(lat, lon):
+            raise ValueError("each location needs lat in [-90, 90] and lon in [-180, 180]")
+        timestamp = parse_timestamp(entry.get("time"))
+        explicit_time = timestamp is not None
+        if timestamp is None:
+            timestamp = default_timestamp
+        bucket = int(timestamp // TIME_BUCKET_SECONDS)
+        locations.append((quantize(lat), quantize(lon), bucket, timestamp, explicit_time))
+    return locations
+
+
+def resolve_batch_local(unique, timestamps):
+    entries = planet_ephemeris.visible_planets_batch(
+        [timestamps[key][0] for key in unique],
+        [lat for lat, _, _ in unique],
+        [lon for _, lon, _ in unique],
+    )
+    return {key: {"status": 200, "data": data} for key, data in zip(unique, entries)}
+
+
+def resolve_batch_upstream(unique, timestamps):
+    def resolve(key):
+        lat, lon, _ = key
+        timestamp, explicit_time = timestamps[key]
+        try:
+            status, body, _ = resolve_upstream(lat, lon, timestamp, explicit_time)
+        except UpstreamUnavailable:
+            return {"status": 503, "error": "Planet data is temporarily unavailable"}
+        except Exception as exc:
+            print("Batch upstream error:", exc)
+            return {"status": 502, "error": "Error calling visibleplanets API"}
+        if status != 200:
+            return {"status": status, "error": "Error calling visibleplanets API"}
+        return {"status": 200, "data": json.loads(body).get("data", [])}
+
+    return dict(zip(unique, batch_pool.map(resolve, unique)))
+
+
+def handle_batch(event):
+    try:
+        body = parse_body(event)
+        now = parse_timestamp(body.get("time"))
+        if now is None:
+            now = time.time()
+        locations = parse_locations(body.get("locations"), now)
+    except (ValueError, TypeError) as exc:
+        return response(400, {"message": str(exc)})
+
+    timestamps = {}
+    for lat, lon, bucket, timestamp, explicit_time in locations:
+        timestamps.setdefault((lat, lon, bucket), (timestamp, explicit_time))
+    unique = list(timestamps)
+
+    engine = "upstream"
+    resolved = None
+    if use_local_engine():
+        try:
+            resolved = resolve_batch_local(unique, timestamps)
+            engine = "local"
+        except Exception as exc:
+            print("Local ephemeris failed, falling back to upstream:", exc)
+    if resolved is None:
+        resolved = resolve_batch_upstream(unique, timestamps)
+
+    results = []
+    for lat, lon, bucket, _, _ in locations:
+        key = (lat, lon, bucket)
+        results.append({
+            "lat": lat,
+            "lon": lon,
+            "time": iso_time(timestamps[key][0]),
+            **resolved[key],
+        })
+
+    return response(200, {
+        "meta": {"requested": len(locations), "resolved": len(unique), "engine": engine},
+        "results": results,
+    }, {"X-Planets-Engine": engine})
+
+
+def handle_timeline(lat, lon, qs):
+    if not use_local_engine():
+        return response(503, {"message": "Timeline mode requires the local ephemeris engine"})
+
+    try:
+        start = parse_timestamp(qs.get("start"))
+        if start is None:
+            start = time.time()
+        end = parse_timestamp(qs.get("end"))
+        if end is None:
+            end = start + TIMELINE_DEFAULT_WINDOW
+        step_minutes = float(qs.get("step") or 60)
+    except ValueError:
+        return response(400, {"message": "start/end must be ISO times or unix seconds, step minutes"})
+
+    # The comparison is False for nan, and the upper bound rejects inf.
+    if not TIMELINE_MIN_STEP_MINUTES <= step_minutes <= TIMELINE_MAX_STEP_MINUTES:
+        return response(400, {
+            "message": f"step must be between {TIMELINE_MIN_STEP_MINUTES} and {TIMELINE_MAX_STEP_MINUTES} minutes"
+        })
+    step = step_minutes * 60.0
+    if end <= start:
+        return response(400, {"message": "end must be after start"})
+    if end - start > TIMELINE_MAX_WINDOW:
+        return response(400, {"message": f"window may span at most {TIMELINE_MAX_WINDOW // 3600} hours"})
+    count = int((end - start) // step) + 1
+    if count > TIMELINE_MAX_STEPS:
+        return response(400, {"message": f"at most {TIMELINE_MAX_STEPS} steps per timeline"})
+
+    timestamps = [start + i * step for i in range(count)]
+    positions, alt, az, events = planet_ephemeris.timeline(timestamps, lat, lon)
+
+    def fmt(value):
+        return iso_time(value) if value is not None else None
+
+    bodies = []
+    for name in planet_ephemeris.BODIES:
+        altitudes = [round(float(a), 2) for a in alt[name]]
+        peak_at, peak_alt = events[name]["peak"]
+        bodies.append({
+            "name": name,
+            "magnitude": round(float(positions[name]["magnitude"][0]), 2),
+            "constellation": planet_ephemeris.constellation_names(positions[name]["ecliptic_longitude"][0])[0],
+            "altitude": altitudes,
+            "azimuth": [round(float(a), 2) for a in az[name]],
+            "aboveHorizon": [a > 0 for a in altitudes],
+            "rise": fmt(events[name]["rise"]),
+            "set": fmt(events[name]["set"]),
+            "peak": {"time": fmt(peak_at), "altitude": round(peak_alt, 2)},
+        })
+
+    return response(200, {
+        "meta": {
+            "latitude": lat,
+            "longitude": lon,
+            "start": iso_time(start),
+            "end": iso_time(timestamps[-1]),
+            "stepMinutes": step / 60.0,
+            "engine": "local",
+        },
+        "times": [iso_time(t) for t in timestamps],
+        "bodies": bodies,
+    }, {"X-Planets-Engine": "local"})
 
 
 def lambda_handler(event, context):
     try:
+        if event.get("routeKey") == BATCH_ROUTE:
+            return handle_batch(event)
+
         qs = event.get("queryStringParameters") or {}
         lat = qs.get("lat")
         lon = qs.get("lon")
 
         if not lat or not lon:
-            return {
-                "statusCode": 400,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "GET,OPTIONS",
-                },
-                "body": json.dumps({"message": "lat and lon query params are required"}),
-            }
-
-        query = urllib.parse.urlencode({
-            "latitude": lat,
-            "longitude": lon,
-        })
-        url = f"https://api.visibleplanets.dev/v3?{query}"
+            return response(400, {"message": "lat and lon query params are required"})
 
-        req = urllib.request.Request(url, method="GET")
-        with urllib.request.urlopen(req) as resp:
-            status = resp.getcode()
-            body_bytes = resp.read()
+        try:
+            lat = float(lat)
+            lon = float(lon)
+        except ValueError:
+            return response(400, {"message": "lat and lon must be numbers"})
+        if not valid_coordinates(lat, lon):
+            return response(400, {"message": "lat must be in [-90, 90] and lon in [-180, 180]"})
 
+        if qs.get("start") or qs.get("end"):
+            return handle_timeline(lat, lon, qs)
+
+        try:
+            requested = parse_timestamp(qs.get("time"))
+        except ValueError:
+            return response(400, {"message": "time must be an ISO time or unix seconds"})
+        now = requested if requested is not None else time.time()
+
+        computed = resolve_computed(lat, lon, now)
+        if computed is not None:
+            engine, body, tier = computed
+            return response(200, body, cache_headers(tier, engine))
+
+        try:
+            status, body, tier = resolve_upstream(lat, lon, now, requested is not None)
+        except UpstreamUnavailable as exc:
+            print("Upstream unavailable:", exc)
+            return unavailable_response()
         if status != 200:
-            return {
-                "statusCode": status,
-                "headers": {
-                    "Content-Type": "application/json",
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "GET,OPTIONS",
-                },
-                "body": json.dumps({
-                    "message": "Error calling visibleplanets API",
-                    "status": status,
-                }),
-            }
-
-        data = json.loads(body_bytes)
-
-        return {
-            "statusCode": 200,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "GET,OPTIONS",
-            },
-            "body": json.dumps(data),
-        }
+            return response(status, {
+                "message": "Error calling visibleplanets API",
+                "status": status,
+            }, cache_headers(tier))
+
+        return response(200, body, cache_headers(tier))
 
     except Exception as err:
         print("Lambda error:", err)
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "GET,OPTIONS",
-            },
-            "body": json.dumps({
-                "message": "Internal server error",
-                "error": str(err),
-            }),
-        }
+        return response(500, {"message": "Internal server error"})
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+
+from boto3.dynamodb.conditions import Attr
+
+from deploy import CONFIG_PATH, LAMBDA_SRC_DIR, boto_session, get_setting, load_env_file
+
+sys.path.insert(0, str(LAMBDA_SRC_DIR))
+
+import cluster_pyramid  # noqa: E402
+import geo  # noqa: E402
+import recommendation_schema  # noqa: E402
+import search_index  # noqa: E402
+
+
+def dynamodb_resource(config: dict):
+    region = get_setting(config, "AWS_REGION", "us-east-1")
+    profile = get_setting(config, "AWS_PROFILE", "").strip() or None
+    return boto_session(region, profile).resource("dynamodb")
+
+
+def recommendations_table(config: dict):
+    return dynamodb_resource(config).Table(get_setting(config, "REC_TABLE", "Recommendations"))
+
+
+def details_table(config: dict):
+    return dynamodb_resource(config).Table(get_setting(config, "REC_DETAILS_TABLE", "RecommendationDetails"))
+
+
+def clusters_table(config: dict):
+    return dynamodb_resource(config).Table(get_setting(config, "REC_CLUSTERS_TABLE", "RecommendationClusters"))
+
+
+def search_table(config: dict):
+    return dynamodb_resource(config).Table(get_setting(config, "REC_SEARCH_TABLE", "RecommendationSearch"))
+
+
+def scan_all(table, **kwargs):
+    while True:
+        out = table.scan(**kwargs)
+        yield from out.get("Items", [])
+        if "LastEvaluatedKey" not in out:
+            return
+        kwargs["ExclusiveStartKey"] = out["LastEvaluatedKey"]
+
+
+def backfill_geohash(config: dict, args) -> int:
+    table = recommendations_table(config)
+    updated = skipped = 0
+    for item in scan_all(table, FilterExpression=Attr("deleted").not_exists()):
+        position = recommendation_schema.position(item)
+        if position is None:
+            print(f"Skipping {item.get('spotId')}: no coordinates")
+            skipped += 1
+            continue
+        attrs = geo.index_attributes(*position)
+        if not args.force and all(item.get(key) == value for key, value in attrs.items()):
+            continue
+        names = {f"#{key}": key for key in attrs}
+        values = {f":{key}": value for key, value in attrs.items()}
+        if not args.dry_run:
+            table.update_item(
+                Key={"spotId": item["spotId"]},
+                UpdateExpression="SET " + ", ".join(f"#{key} = :{key}" for key in attrs),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ConditionExpression="attribute_exists(spotId)",
+            )
+        updated += 1
+    print(f"{'Would update' if args.dry_run else 'Updated'} {updated} recommendations, skipped {skipped}")
+    return 0
+
+
+def migrate_schema(config: dict, args) -> int:
+    """Split legacy rows (whole body under "data") into summary + detail items."""
+    table = recommendations_table(config)
+    details = details_table(config)
+    migrated = skipped = 0
+    for item in scan_all(table, FilterExpression=Attr("data").exists() & Attr("deleted").not_exists()):
+        body = item["data"]
+        position = recommendation_schema.position(item)
+        if position is None:
+            print(f"Skipping {item['spotId']}: no coordinates")
+            skipped += 1
+            continue
+        summary, detail = recommendation_schema.build_items(
+            item["spotId"],
+            body,
+            *position,
+            datetime.now(timezone.utc),
+            created_by=item.get("createdBy"),
+            created_at=item.get("createdAt"),
+        )
+        # Keep the original change stamp: the content clients see is unchanged.
+        for key in ("updatedAt", "syncShard"):
+            if key in item:
+                summary[key] = item[key]
+        if not args.dry_run:
+            # Detail first, so a reader never sees a summary without one.
+            details.put_item(Item=detail)
+            try:
+                table.put_item(Item=summary, ConditionExpression=Attr("data").exists())
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+        migrated += 1
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {migrated} recommendations, skipped {skipped}")
+    return 0
+
+
+def rebuild_clusters(config: dict, args) -> int:
+    """Recompute the cluster pyramid from scratch; posts and deletes keep it current afterwards."""
+    table = recommendations_table(config)
+    clusters = clusters_table(config)
+    points = []
+    for item in scan_all(table, FilterExpression=Attr("deleted").not_exists()):
+        position = recommendation_schema.position(item)
+        if position is not None:
+            points.append((item["spotId"], *position))
+    items = cluster_pyramid.aggregate(points)
+    fresh = {(item["level"], item["cell"]) for item in items}
+    stale = []
+    for item in scan_all(clusters, ProjectionExpression="#level, cell", ExpressionAttributeNames={"#level": "level"}):
+        key = (int(item["level"]), item["cell"])
+        if key not in fresh:
+            stale.append(key)
+    if not args.dry_run:
+        with clusters.batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+            for level, cell in stale:
+                batch.delete_item(Key={"level": level, "cell": cell})
+    print(
+        f"{'Would write' if args.dry_run else 'Wrote'} {len(items)} clusters for {len(points)} recommendations, "
+        f"removed {len(stale)} stale"
+    )
+    return 0
+
+
+def rebuild_search(config: dict, args) -> int:
+    """Re-index every live recommendation and drop postings of spots that are gone."""
+    table = recommendations_table(config)
+    search = search_table(config)
+    bodies = {detail["spotId"]: detail.get("data") or {} for detail in scan_all(details_table(config))}
+    rows = []
+    indexed = 0
+    for item in scan_all(table, FilterExpression=Attr("deleted").not_exists()):
+        body = item.get("data") or bodies.get(item["spotId"])
+        if body is None:
+            continue
+        rows.extend(search_index.posting_rows(item["spotId"], body))
+        indexed += 1
+    fresh = {(row["gram"], row["key"]) for row in rows}
+    stale = []
+    for row in scan_all(search, ProjectionExpression="gram, #key", ExpressionAttributeNames={"#key": "key"}):
+        if (row["gram"], row["key"]) not in fresh:
+            stale.append(row)
+    if not args.dry_run:
+        with search.batch_writer() as batch:
+            for row in rows:
+                batch.put_item(Item=row)
+            for row in stale:
+                batch.delete_item(Key={"gram": row["gram"], "key": row["key"]})
+    print(
+        f"{'Would write' if args.dry_run else 'Wrote'} {len(rows)} postings for {indexed} recommendations, "
+        f"removed {len(stale)} stale"
+    )
+    return 0
+
+
+def compact_tombstones(config: dict, args) -> int:
+    table = recommendations_table(config)
+    days = args.days if args.days is not None else int(get_setting(config, "REC_TOMBSTONE_RETENTION_DAYS", "30"))
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    purged = 0
+    for item in scan_all(
+        table,
+        FilterExpression=Attr("deleted").eq(True) & Attr("deletedAt").lt(cutoff),
+        ProjectionExpression="spotId",
+    ):
+        if not args.dry_run:
+            try:
+                # Only purge if it is still a tombstone; the spot may have been re-created.
+                table.delete_item(
+                    Key={"spotId": item["spotId"]},
+                    ConditionExpression=Attr("deleted").eq(True),
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+        purged += 1
+    print(f"{'Would purge' if args.dry_run else 'Purged'} {purged} tombstones older than {days} days")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintenance tasks for the Recommendations table.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill-geohash", help="write geohash index attributes on existing rows")
+    backfill.add_argument("--force", action="store_true", help="rewrite attributes even when already present")
+    backfill.add_argument("--dry-run", action="store_true", help="only report what would change")
+    backfill.set_defaults(func=backfill_geohash)
+
+    migrate = commands.add_parser("migrate-schema", help="split legacy rows into summary and detail items")
+    migrate.add_argument("--dry-run", action="store_true", help="only report what would change")
+    migrate.set_defaults(func=migrate_schema)
+
+    rebuild = commands.add_parser("rebuild-clusters", help="recompute the map cluster pyramid from the table")
+    rebuild.add_argument("--dry-run", action="store_true", help="only report what would change")
+    rebuild.set_defaults(func=rebuild_clusters)
+
+    reindex = commands.add_parser("rebuild-search", help="rebuild the text search postings from the tables")
+    reindex.add_argument("--dry-run", action="store_true", help="only report what would change")
+    reindex.set_defaults(func=rebuild_search)
+
+    compact = commands.add_parser("compact-tombstones", help="purge delete markers older than the sync retention")
+    compact.add_argument("--days", type=int, help="retention in days (default: REC_TOMBSTONE_RETENTION_DAYS or 30)")
+    compact.add_argument("--dry-run", action="store_true", help="only report what would be purged")
+    compact.set_defaults(func=compact_tombstones)
+
+    args = parser.parse_args()
+    return args.func(load_env_file(CONFIG_PATH), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
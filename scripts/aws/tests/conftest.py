@@ -0,0 +1,14 @@
+import os
+import sys
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parents[1] / "lambdas"
+sys.path.insert(0, str(LAMBDA_DIR))
+
+# Handlers read their table names at import time. The DynamoDB client is only
+# created on first use, and the tests swap the tables for fakes.FakeTable
+# first.
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("FAV_TABLE", "UserFavorites")
+os.environ.setdefault("REC_TABLE", "Recommendations")
+os.environ.setdefault("REC_DETAILS_TABLE", "RecommendationDetails")
@@ -0,0 +1,68 @@
+class FakeTable:
+    """The slice of ``vela_common.dynamo.Table`` the read handlers call.
+
+    ``query`` serves one partition (the first key attribute) in range-key
+    order, honouring Limit, ExclusiveStartKey and ScanIndexForward.
+    ``scan`` walks the items in key order like DynamoDB: Limit counts the
+    items read before the filter, and a page that reaches Limit returns a
+    LastEvaluatedKey even when nothing follows it. Writes replace or remove
+    items by key; conditions are left to the tests that need them.
+    """
+
+    def __init__(self, items=(), key=("spotId",)):
+        self.items = list(items)
+        self.key = key
+        self.calls = []
+
+    def _key_of(self, item):
+        return {name: item[name] for name in self.key}
+
+    def get_item(self, **params):
+        self.calls.append(("get_item", params))
+        for item in self.items:
+            if self._key_of(item) == params["Key"]:
+                return {"Item": dict(item)}
+        return {}
+
+    def put_item(self, **params):
+        self.calls.append(("put_item", params))
+        item = params["Item"]
+        self.items = [row for row in self.items if self._key_of(row) != self._key_of(item)] + [dict(item)]
+        return {}
+
+    def delete_item(self, **params):
+        self.calls.append(("delete_item", params))
+        self.items = [row for row in self.items if self._key_of(row) != params["Key"]]
+        return {}
+
+    def query(self, **params):
+        self.calls.append(("query", params))
+        hash_key, range_key = self.key[0], self.key[-1]
+        partition = params["ExpressionAttributeValues"][":user"]
+        rows = sorted(
+            (item for item in self.items if item[hash_key] == partition),
+            key=lambda item: item[range_key],
+            reverse=not params.get("ScanIndexForward", True),
+        )
+        start = params.get("ExclusiveStartKey")
+        if start:
+            keys = [row[range_key] for row in rows]
+            rows = rows[keys.index(start[range_key]) + 1:]
+        page = rows[:params["Limit"]]
+        out = {"Items": [dict(row) for row in page]}
+        if len(rows) > len(page):
+            out["LastEvaluatedKey"] = self._key_of(page[-1])
+        return out
+
+    def scan(self, **params):
+        self.calls.append(("scan", params))
+        rows = sorted(self.items, key=lambda item: tuple(item[name] for name in self.key))
+        start = params.get("ExclusiveStartKey")
+        if start:
+            keys = [self._key_of(row) for row in rows]
+            rows = rows[keys.index(start) + 1:]
+        read = rows[:params["Limit"]]
+        out = {"Items": [dict(row) for row in read if "deleted" not in row]}
+        if len(read) == params["Limit"]:
+            out["LastEvaluatedKey"] = self._key_of(read[-1])
+        return out
@@ -0,0 +1,89 @@
+import json
+import math
+from decimal import Decimal
+
+import pytest
+
+from vela_common import codec, dynamo
+
+SAMPLES = [
+    {"items": [{"spotId": "spot-1", "lat": 32.08, "lon": -69.13, "bortle": 1, "verified": True}], "nextToken": None},
+    {"name": "Café \"Orion\"", "region": "Île-de-France", "emoji": "\U0001f52d", "del": "\x7f", "tab": "\t"},
+    {"tiny": 1e-05, "huge": 1.5e+300, "big": 1e16, "negative": -0.0, "whole": 1.0, "edge": 9.999e15},
+    {"ints": [0, -1, 2 ** 63 - 1, 2 ** 70], "nested": [[], {}, [{"a": [1, [2, [3]]]}]]},
+    {1: "non-string key"},
+    [1, "two", 3.5, None, False],
+    "just a string",
+    12345,
+]
+
+
+@pytest.fixture(params=["stdlib", "orjson"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(codec, "orjson", None)
+    elif codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("value", SAMPLES)
+def test_output_parses_to_what_json_dumps_wrote(backend, value):
+    encoded = codec.dumps(value)
+    assert json.loads(encoded) == json.loads(json.dumps(value))
+    assert codec.dumpb(value) == encoded.encode("utf-8")
+
+
+def test_output_is_compact(backend):
+    assert codec.dumps({"a": [1, 2], "b": {"c": None}}) == '{"a":[1,2],"b":{"c":null}}'
+
+
+def test_stdlib_output_is_ascii(monkeypatch):
+    monkeypatch.setattr(codec, "orjson", None)
+    assert codec.dumpb({"name": "Café \U0001f52d"}) == b'{"name":"Caf\\u00e9 \\ud83d\\udd2d"}'
+
+
+def test_orjson_writes_non_finite_floats_as_null():
+    if codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    assert json.loads(codec.dumps({"nan": float("nan"), "inf": [float("inf")]})) == {"nan": None, "inf": [None]}
+
+
+def test_stdlib_keeps_non_finite_floats(monkeypatch):
+    monkeypatch.setattr(codec, "orjson", None)
+    value = json.loads(codec.dumps({"nan": float("nan"), "inf": float("-inf")}))
+    assert math.isnan(value["nan"]) and value["inf"] == float("-inf")
+
+
+def test_decimals_encode_as_the_numbers_the_api_returned(backend):
+    value = {"lat": Decimal("-23.86"), "bortle": Decimal("1"), "count": Decimal("1E+2")}
+    assert codec.dumps(value) == '{"lat":-23.86,"bortle":1,"count":100}'
+
+
+def test_unserializable_values_raise(backend):
+    with pytest.raises(TypeError):
+        codec.dumps({"when": object()})
+    with pytest.raises(TypeError):
+        codec.dumpb({"when": object()})
+
+
+@pytest.mark.parametrize("text, value", [
+    ("5", 5),
+    ("-12", -12),
+    ("1.50", 1.5),
+    ("2.0", 2),
+    ("1E+2", 100),
+    ("-0.00001", -1e-05),
+    ("123456789012345678901234567890", 123456789012345678901234567890),
+])
+def test_number(text, value):
+    parsed = codec.number(text)
+    assert parsed == value
+    assert type(parsed) is type(value)
+
+
+def test_wire_items_decode_straight_to_json_numbers():
+    wire = dynamo.to_item({"spotId": "a", "lat": Decimal("32.08"), "bortle": 2, "tags": ["x"], "verified": True})
+    item = dynamo.from_item(wire, codec.number)
+    assert item == {"spotId": "a", "lat": 32.08, "bortle": 2, "tags": ["x"], "verified": True}
+    assert json.loads(codec.dumps(item)) == item
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+pytest.importorskip("boto3")
+
+import delete_recommendation_handler  # noqa: E402
+from fakes import FakeTable  # noqa: E402
+from vela_common import dynamo  # noqa: E402
+
+
+class EditedTable(FakeTable):
+    """A table where someone edits the spot between each read and write."""
+
+    def __init__(self, items, edits):
+        super().__init__(items)
+        self.edits = edits
+
+    def put_item(self, **params):
+        if self.edits:
+            self.edits -= 1
+            self.items[0]["updatedAt"] = f"2026-01-0{self.edits + 2}T00:00:00.000000Z"
+        stamp = params.get("ExpressionAttributeValues", {}).get(":stamp")
+        if stamp is not None and self.items[0].get("updatedAt") != stamp:
+            raise dynamo.client().exceptions.ConditionalCheckFailedException(
+                {"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem"
+            )
+        return super().put_item(**params)
+
+
+def spot():
+    return {"spotId": "s1", "name": "Spot", "lat": 10, "lon": 20, "gh": "s1z0", "updatedAt": "2026-01-01T00:00:00.000000Z"}
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    def install(table):
+        details = FakeTable([{"spotId": "s1", "data": {"description": "dark"}}])
+        monkeypatch.setattr(delete_recommendation_handler, "table", table)
+        monkeypatch.setattr(delete_recommendation_handler, "details_table", details)
+        monkeypatch.setattr(delete_recommendation_handler, "meta_table", None)
+        monkeypatch.setattr(delete_recommendation_handler, "clusters_table", None)
+        monkeypatch.setattr(delete_recommendation_handler, "search_table", None)
+        return table, details
+    return install
+
+
+def delete(spot_id="s1"):
+    event = {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "admin-1", "cognito:groups": "admin"}}}},
+        "pathParameters": {"spotId": spot_id},
+    }
+    out = delete_recommendation_handler.lambda_handler(event, None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+def test_delete_leaves_a_tombstone_with_the_geohash(tables):
+    table, details = tables(FakeTable([spot()]))
+    assert delete() == (200, {"message": "Deleted", "spotId": "s1"})
+    tombstone = table.items[0]
+    assert tombstone["deleted"] is True and tombstone["gh"] == "s1z0" and "name" not in tombstone
+    assert details.items == []
+
+
+def test_deleting_a_missing_or_deleted_spot_is_a_200(tables):
+    table, _ = tables(FakeTable([{"spotId": "s1", "deleted": True}]))
+    assert delete()[0] == 200
+    assert delete("other")[0] == 200
+    assert not any(name == "put_item" for name, _ in table.calls)
+
+
+def test_an_edit_between_read_and_write_is_retried(tables):
+    table, _ = tables(EditedTable([spot()], edits=1))
+    assert delete()[0] == 200
+    assert table.items[0]["deleted"] is True
+
+
+def test_a_spot_that_keeps_changing_is_a_409(tables):
+    table, _ = tables(EditedTable([spot()], edits=delete_recommendation_handler.DELETE_ATTEMPTS))
+    status, _ = delete()
+    assert status == 409
+    assert "deleted" not in table.items[0]
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import get_favorites_handler
+import version_stamps
+from fakes import FakeTable
+
+
+def event(user_id="u1", params=None, if_none_match=None):
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    return {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": user_id}}}},
+        "queryStringParameters": params,
+        "headers": headers,
+    }
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    favorites = FakeTable([{"userId": "u1", "spotId": "spot-1", "lat": 1, "lon": 2}], key=("userId", "spotId"))
+    meta = FakeTable([{"pk": version_stamps.favorites_key("u1"), "version": 3}], key=("pk",))
+    monkeypatch.setattr(get_favorites_handler, "table", favorites)
+    monkeypatch.setattr(get_favorites_handler, "meta_table", meta)
+    return favorites, meta
+
+
+def queries(table):
+    return sum(1 for name, _ in table.calls if name == "query")
+
+
+def test_etag_depends_on_version_and_request():
+    tag = version_stamps.etag(3, "u1", {"view": "map"})
+    assert tag.startswith('W/"v3-')
+    assert tag == version_stamps.etag(3, "u1", {"view": "map"})
+    assert tag != version_stamps.etag(4, "u1", {"view": "map"})
+    assert tag != version_stamps.etag(3, "u2", {"view": "map"})
+    assert tag != version_stamps.etag(3, "u1", {"view": "full"})
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('W/"v3-abc"', True),
+    ('"v3-abc"', True),
+    ('"v2-abc", W/"v3-abc"', True),
+    ("*", True),
+    ('W/"v4-abc"', False),
+])
+def test_not_modified(header, matches):
+    headers = {"if-none-match": header} if header else {}
+    assert version_stamps.not_modified({"headers": headers}, 'W/"v3-abc"') is matches
+
+
+def test_favorites_304_skips_the_query(tables):
+    favorites, _ = tables
+    first = get_favorites_handler.lambda_handler(event(), None)
+    assert first["statusCode"] == 200
+    tag = first["headers"]["ETag"]
+    assert first["headers"]["Cache-Control"] == get_favorites_handler.ETAG_CACHE_CONTROL
+    assert json.loads(first["body"])["items"][0]["spotId"] == "spot-1"
+    assert queries(favorites) == 1
+
+    again = get_favorites_handler.lambda_handler(event(if_none_match=tag), None)
+    assert again["statusCode"] == 304
+    assert again["body"] == ""
+    assert again["headers"]["ETag"] == tag
+    assert "Content-Type" not in again["headers"]
+    assert queries(favorites) == 1
+
+
+def test_favorites_etag_changes_after_a_write(tables):
+    _, meta = tables
+    tag = get_favorites_handler.lambda_handler(event(), None)["headers"]["ETag"]
+    meta.items[0]["version"] = 4
+    out = get_favorites_handler.lambda_handler(event(if_none_match=tag), None)
+    assert out["statusCode"] == 200
+    assert out["headers"]["ETag"] != tag
+
+
+def test_favorites_etag_is_per_query(tables):
+    tag = get_favorites_handler.lambda_handler(event(), None)["headers"]["ETag"]
+    out = get_favorites_handler.lambda_handler(event(params={"view": "map"}, if_none_match=tag), None)
+    assert out["statusCode"] == 200
+    assert out["headers"]["ETag"] != tag
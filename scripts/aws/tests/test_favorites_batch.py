@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import favorites_batch_handler
+
+
+class FakeClient:
+    """transact_write_items that fails every transaction touching ``broken``."""
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.transactions = []
+
+    def transact_write_items(self, TransactItems):
+        spot_ids = {action["Put"]["Item"]["spotId"] for action in TransactItems}
+        if spot_ids & self.broken:
+            raise RuntimeError("throttled")
+        self.transactions.append(spot_ids)
+
+
+class FakeMeta:
+    def __init__(self):
+        self.bumps = []
+
+    def update_item(self, **params):
+        self.bumps.append(params["Key"]["pk"])
+        return {"Attributes": {"version": len(self.bumps)}}
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    def install(broken=()):
+        client = FakeClient(broken)
+        meta = FakeMeta()
+        monkeypatch.setattr(favorites_batch_handler, "client", client)
+        monkeypatch.setattr(favorites_batch_handler, "meta_table", meta)
+        monkeypatch.setattr(favorites_batch_handler, "TRANSACT_SIZE", 2)
+        return client, meta
+    return install
+
+
+def post(body):
+    event = {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": "u1"}}}, "http": {"method": "POST"}},
+        "body": body if isinstance(body, str) else json.dumps(body),
+    }
+    out = favorites_batch_handler.lambda_handler(event, None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+def points(*lats):
+    return {"items": [{"lat": lat, "lon": 0} for lat in lats]}
+
+
+def test_a_failed_chunk_is_reported_and_the_rest_still_counts(batch):
+    _, meta = batch(broken={"3.000000,0.000000"})
+    status, body = post(points(1, 2, 3, 4, 5))
+    assert status == 200
+    assert [result["status"] for result in body["results"]] == ["created", "created", "failed", "failed", "created"]
+    assert body["counts"] == {"created": 3, "failed": 2}
+    assert meta.bumps == ["favorites#u1"]
+
+
+def test_nothing_written_means_no_bump(batch):
+    _, meta = batch(broken={"1.000000,0.000000"})
+    status, body = post(points(1, 2))
+    assert status == 200
+    assert body["counts"] == {"failed": 2}
+    assert meta.bumps == []
+
+
+@pytest.mark.parametrize("value", ["NaN", "Infinity", "-Infinity"])
+def test_non_finite_coordinates_are_rejected(batch, value):
+    client, _ = batch()
+    status, body = post(f'{{"items": [{{"lat": {value}, "lon": 0}}]}}')
+    assert status == 400
+    assert body == {"message": "lat and lon must be finite numbers"}
+    assert client.transactions == []
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+import geo
+
+
+def random_point_in(rnd, min_lat, min_lon, max_lat, max_lon):
+    lat = rnd.uniform(min_lat, max_lat)
+    if min_lon <= max_lon:
+        return lat, rnd.uniform(min_lon, max_lon)
+    # Across the antimeridian: pick from [min_lon, 180] + [-180, max_lon].
+    lon = rnd.uniform(min_lon, max_lon + 360.0)
+    return lat, lon - 360.0 if lon > 180.0 else lon
+
+
+def test_encode_matches_reference_geohash():
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geo.encode(-25.382708, -49.265506, 8) == "6gkzwgjz"
+
+
+def test_index_attributes_are_prefixes():
+    attrs = geo.index_attributes(32.08, 34.78)
+    assert set(attrs) == set(geo.INDEX_ATTRIBUTES)
+    assert len(attrs["gh"]) == geo.GEOHASH_PRECISION
+    assert attrs["gh2"] == attrs["gh"][:2] and attrs["gh4"] == attrs["gh"][:4]
+
+
+@pytest.mark.parametrize("box", [
+    (10.0, 10.0, 10.5, 10.5),
+    (-33.9, 151.0, -33.7, 151.3),
+    (40.0, -4.0, 41.0, -3.0),
+    (-10.0, 170.0, 10.0, -170.0),
+    (60.0, -30.0, 70.0, 30.0),
+    (-89.9, -1.0, -85.0, 1.0),
+])
+def test_covering_contains_every_point_in_the_box(box):
+    cells = geo.covering(*box)
+    assert cells
+    assert len(cells) <= geo.MAX_COVER_CELLS
+    precision = len(next(iter(cells)))
+    assert all(len(cell) == precision for cell in cells)
+
+    rnd = random.Random(7)
+    corners = [(box[0], box[1]), (box[0], box[3]), (box[2], box[1]), (box[2], box[3])]
+    for lat, lon in corners + [random_point_in(rnd, *box) for _ in range(2000)]:
+        assert geo.encode(lat, lon, precision) in cells, (lat, lon)
+
+
+def test_covering_picks_the_finest_precision_that_fits():
+    small = geo.covering(10.0, 10.0, 10.01, 10.01)
+    large = geo.covering(10.0, 10.0, 20.0, 20.0)
+    assert len(next(iter(small))) > len(next(iter(large)))
+
+
+def test_covering_gives_up_on_the_whole_world():
+    assert geo.covering(-90.0, -180.0, 90.0, 180.0) is None
+
+
+def test_radius_bbox_encloses_the_circle():
+    rnd = random.Random(11)
+    for lat, lon, radius_km in [(32.08, 34.78, 50.0), (0.0, 179.9, 300.0), (-60.0, -70.0, 800.0)]:
+        box = geo.radius_bbox(lat, lon, radius_km)
+        for _ in range(500):
+            p_lat = lat + rnd.uniform(-10.0, 10.0)
+            p_lon = (lon + rnd.uniform(-20.0, 20.0) + 540.0) % 360.0 - 180.0
+            if geo.haversine_km(lat, lon, p_lat, p_lon) <= radius_km:
+                assert geo.in_bbox(p_lat, p_lon, *box), (p_lat, p_lon)
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+import get_favorites_handler
+from fakes import FakeTable
+
+
+def favorites_event(user_id, params=None, headers=None):
+    return {
+        "requestContext": {"authorizer": {"jwt": {"claims": {"sub": user_id}}}},
+        "queryStringParameters": params,
+        "headers": headers or {},
+    }
+
+
+def favorite(user_id, spot_id):
+    return {"userId": user_id, "spotId": spot_id, "lat": 1, "lon": 2, "createdAt": f"2026-01-01T00:00:{spot_id[-2:]}Z"}
+
+
+@pytest.fixture
+def favorites(monkeypatch):
+    table = FakeTable(
+        [favorite("u1", f"spot-{i:02d}") for i in range(23)] + [favorite("u2", "spot-99")],
+        key=("userId", "spotId"),
+    )
+    monkeypatch.setattr(get_favorites_handler, "table", table)
+    monkeypatch.setattr(get_favorites_handler, "meta_table", None)
+    return table
+
+
+def get_favorites(user_id, params):
+    out = get_favorites_handler.lambda_handler(favorites_event(user_id, params), None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+def test_token_round_trip():
+    last_key = {"userId": "u1", "spotId": "12.500000,-3.250000"}
+    token = get_favorites_handler.encode_token(last_key)
+    assert get_favorites_handler.decode_token(token, "u1") == last_key
+
+
+def test_token_is_bound_to_its_user():
+    token = get_favorites_handler.encode_token({"userId": "u1", "spotId": "spot-01"})
+    with pytest.raises(get_favorites_handler.BadRequest):
+        get_favorites_handler.decode_token(token, "u2")
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_item_once(favorites, order):
+    seen = []
+    params = {"limit": "5", "order": order}
+    pages = 0
+    while True:
+        status, body = get_favorites("u1", params)
+        assert status == 200
+        pages += 1
+        seen.extend(item["spotId"] for item in body["items"])
+        if "nextToken" not in body:
+            break
+        params = {"limit": "5", "order": order, "nextToken": body["nextToken"]}
+
+    expected = sorted(f"spot-{i:02d}" for i in range(23))
+    assert seen == (expected if order == "asc" else expected[::-1])
+    assert pages == 5
+
+
+def test_token_from_another_user_is_rejected(favorites):
+    _, body = get_favorites("u1", {"limit": "5"})
+    status, body = get_favorites("u2", {"nextToken": body["nextToken"]})
+    assert status == 400
+    assert body == {"message": "Invalid nextToken"}
+
+
+def test_all_follows_pages_up_to_the_cap(favorites, monkeypatch):
+    monkeypatch.setattr(get_favorites_handler, "MAX_LIMIT", 4)
+    monkeypatch.setattr(get_favorites_handler, "MAX_ALL_ITEMS", 10)
+    status, body = get_favorites("u1", {"all": "true", "view": "map"})
+    assert status == 200
+    assert [item["spotId"] for item in body["items"]] == [f"spot-{i:02d}" for i in range(10)]
+    assert body["truncated"] is True
+
+    _, rest = get_favorites("u1", {"all": "true", "nextToken": body["nextToken"]})
+    assert [item["spotId"] for item in rest["items"]] == [f"spot-{i:02d}" for i in range(10, 20)]
+    _, rest = get_favorites("u1", {"all": "true", "nextToken": rest["nextToken"]})
+    assert [item["spotId"] for item in rest["items"]] == [f"spot-{i:02d}" for i in range(20, 23)]
+    assert "nextToken" not in rest and "truncated" not in rest
+
+
+def test_all_at_exactly_the_cap_is_complete(favorites, monkeypatch):
+    monkeypatch.setattr(get_favorites_handler, "MAX_LIMIT", 5)
+    monkeypatch.setattr(get_favorites_handler, "MAX_ALL_ITEMS", 23)
+    status, body = get_favorites("u1", {"all": "true"})
+    assert status == 200
+    assert len(body["items"]) == 23
+    assert "nextToken" not in body and "truncated" not in body
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import get_recommendations_handler
+from fakes import FakeTable
+
+
+def spot(i, deleted=False):
+    item = {"spotId": f"spot-{i:03d}", "name": f"Spot {i}", "type": "desert", "lat": 10, "lon": 20}
+    if deleted:
+        item["deleted"] = True
+    return item
+
+
+@pytest.fixture
+def catalogue(monkeypatch):
+    table = FakeTable([spot(i, deleted=i % 7 == 3) for i in range(60)])
+    monkeypatch.setattr(get_recommendations_handler, "table", table)
+    monkeypatch.setattr(get_recommendations_handler, "meta_table", None)
+    monkeypatch.setattr(get_recommendations_handler, "body_cache", {})
+    return table
+
+
+def live_ids(table):
+    return sorted(item["spotId"] for item in table.items if "deleted" not in item)
+
+
+def get(params):
+    event = {"routeKey": "GET /recommendations", "queryStringParameters": params}
+    out = get_recommendations_handler.lambda_handler(event, None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+@pytest.mark.parametrize("last_key", [
+    {"spotId": "spot-1"},
+    {"spotId": "57.649110,10.407440"},
+    {"spotId": "café 漢 \U0001f600 \"quoted\""},
+])
+def test_token_round_trip(last_key):
+    token = get_recommendations_handler.encode_token(last_key)
+    assert "=" not in token
+    assert get_recommendations_handler.decode_token(token) == last_key
+
+
+@pytest.mark.parametrize("token", ["", "not base64!", "bnVsbA", "eyJzcG90SWQiOiAxfQ"])
+def test_token_rejects_garbage(token):
+    with pytest.raises(get_recommendations_handler.BadRequest):
+        get_recommendations_handler.decode_token(token)
+
+
+def test_invalid_token_is_a_400(catalogue):
+    assert get({"nextToken": "not base64!"}) == (400, {"message": "Invalid nextToken"})
+
+
+def test_pages_cover_every_live_item_once(catalogue):
+    seen = []
+    params = {"limit": "8"}
+    while True:
+        status, body = get(params)
+        assert status == 200
+        assert all(set(item) <= {"spotId", "name", "coordinates", "type"} for item in body["items"])
+        seen.extend(item["spotId"] for item in body["items"])
+        if "nextToken" not in body:
+            break
+        params = {"limit": "8", "nextToken": body["nextToken"]}
+    assert seen == live_ids(catalogue)
+
+
+def test_all_returns_the_whole_list_with_a_cursor(catalogue, monkeypatch):
+    monkeypatch.setattr(get_recommendations_handler, "MAX_LIMIT", 8)
+    status, body = get({"all": "true"})
+    assert status == 200
+    assert [item["spotId"] for item in body["items"]] == live_ids(catalogue)
+    assert "cursor" in body
+    assert "nextToken" not in body and "truncated" not in body
+
+
+def test_all_stops_at_the_cap(catalogue, monkeypatch):
+    monkeypatch.setattr(get_recommendations_handler, "MAX_LIMIT", 8)
+    monkeypatch.setattr(get_recommendations_handler, "MAX_ALL_ITEMS", 20)
+    status, body = get({"all": "true"})
+    assert status == 200
+    assert len(body["items"]) <= 20
+    assert body["truncated"] is True
+    assert "cursor" not in body
+
+    seen = [item["spotId"] for item in body["items"]]
+    while "nextToken" in body:
+        _, body = get({"all": "true", "nextToken": body["nextToken"]})
+        assert len(body["items"]) <= 20
+        seen.extend(item["spotId"] for item in body["items"])
+    assert seen == live_ids(catalogue)
+    assert "truncated" not in body and "cursor" in body
+
+
+def test_all_at_exactly_the_cap_is_complete(catalogue, monkeypatch):
+    # Only tombstones follow the last live item read.
+    catalogue.items = [spot(i) for i in range(20)] + [spot(i, deleted=True) for i in range(20, 30)]
+    monkeypatch.setattr(get_recommendations_handler, "MAX_LIMIT", 5)
+    monkeypatch.setattr(get_recommendations_handler, "MAX_ALL_ITEMS", 20)
+    status, body = get({"all": "true"})
+    assert status == 200
+    assert len(body["items"]) == 20
+    assert "nextToken" not in body and "truncated" not in body
+    assert "cursor" in body
@@ -0,0 +1,44 @@
+import io
+import json
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+os.environ.setdefault("SNAPSHOT_BUCKET", "vela-site")
+
+import publish_recommendations_snapshot as snapshot  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+
+
+@pytest.fixture
+def s3():
+    with Stubber(snapshot.s3) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+def expect_get(s3, **reply):
+    expected = {"Bucket": snapshot.BUCKET, "Key": snapshot.POINTER_KEY}
+    if "service_error_code" in reply:
+        s3.add_client_error("get_object", expected_params=expected, **reply)
+    else:
+        s3.add_response("get_object", reply, expected)
+
+
+def test_current_pointer_reads_latest_json(s3):
+    expect_get(s3, Body=io.BytesIO(json.dumps({"key": "data/recommendations/abc.json"}).encode()))
+    assert snapshot.current_pointer() == {"key": "data/recommendations/abc.json"}
+
+
+@pytest.mark.parametrize("code, status", [("NoSuchKey", 404), ("AccessDenied", 403)])
+def test_missing_pointer_is_none(s3, code, status):
+    # Without list rights on the key, S3 reports a missing object as 403.
+    expect_get(s3, service_error_code=code, http_status_code=status)
+    assert snapshot.current_pointer() is None
+
+
+def test_other_errors_propagate(s3):
+    expect_get(s3, service_error_code="SlowDown", http_status_code=503)
+    with pytest.raises(snapshot.ClientError):
+        snapshot.current_pointer()
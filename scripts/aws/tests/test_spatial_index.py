@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+import geo
+from spatial_index import NearestIndex
+
+
+def brute_force(points, lat, lon, k):
+    distances = sorted((geo.haversine_km(lat, lon, p_lat, p_lon), i) for i, (p_lat, p_lon) in enumerate(points))
+    return distances[:k]
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    rnd = random.Random(3)
+    # Uniform points plus a dense cluster, so leaves hold near-ties.
+    points = [(rnd.uniform(-90.0, 90.0), rnd.uniform(-180.0, 180.0)) for _ in range(1500)]
+    points += [(48.0 + rnd.gauss(0, 0.05), 2.0 + rnd.gauss(0, 0.05)) for _ in range(500)]
+    return points, NearestIndex(points, list(range(len(points))))
+
+
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_nearest_matches_brute_force(catalogue, k):
+    points, index = catalogue
+    rnd = random.Random(k)
+    queries = [(rnd.uniform(-90.0, 90.0), rnd.uniform(-180.0, 180.0)) for _ in range(40)]
+    queries += [(48.0, 2.0), (90.0, 0.0), (-90.0, 0.0), (0.0, 180.0), (0.0, -180.0)]
+    for lat, lon in queries:
+        found = index.nearest(lat, lon, k)
+        expected = brute_force(points, lat, lon, k)
+        assert [d for d, _ in found] == pytest.approx([d for d, _ in expected], abs=1e-6)
+        # Payloads can swap within a tie, but each must sit at its distance.
+        for distance, payload in found:
+            assert geo.haversine_km(lat, lon, *points[payload]) == pytest.approx(distance, abs=1e-6)
+
+
+def test_nearest_returns_everything_when_k_exceeds_size():
+    points = [(0.0, 0.0), (1.0, 1.0), (-1.0, 2.0)]
+    index = NearestIndex(points, ["a", "b", "c"])
+    assert len(index) == 3
+    assert [payload for _, payload in index.nearest(0.0, 0.0, 10)] == ["a", "b", "c"]
+
+
+def test_nearest_on_empty_index_or_zero_k():
+    assert NearestIndex([], []).nearest(0.0, 0.0, 3) == []
+    assert NearestIndex([(0.0, 0.0)], ["a"]).nearest(0.0, 0.0, 0) == []
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import visible_planets_lambda
+
+
+def get_planets(params):
+    out = visible_planets_lambda.lambda_handler({"queryStringParameters": params}, None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+def post_batch(body):
+    event = {"routeKey": visible_planets_lambda.BATCH_ROUTE, "body": json.dumps(body)}
+    out = visible_planets_lambda.lambda_handler(event, None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    (1700000000, 1700000000.0),
+    ("1700000000.5", 1700000000.5),
+    ("2024-01-15T03:00:00Z", 1705287600.0),
+    (visible_planets_lambda.MIN_TIMESTAMP, visible_planets_lambda.MIN_TIMESTAMP),
+    (visible_planets_lambda.MAX_TIMESTAMP, visible_planets_lambda.MAX_TIMESTAMP),
+])
+def test_parse_timestamp(value, expected):
+    assert visible_planets_lambda.parse_timestamp(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    True,
+    "nan",
+    float("inf"),
+    "not a time",
+    -2e11,
+    "-200000000000",
+    visible_planets_lambda.MIN_TIMESTAMP - 1,
+    visible_planets_lambda.MAX_TIMESTAMP + 1,
+])
+def test_parse_timestamp_rejects(value):
+    with pytest.raises(ValueError):
+        visible_planets_lambda.parse_timestamp(value)
+
+
+def test_range_ends_format_as_iso_times():
+    assert visible_planets_lambda.iso_time(visible_planets_lambda.MIN_TIMESTAMP) == "0001-01-01T00:00:00+00:00"
+    assert visible_planets_lambda.iso_time(visible_planets_lambda.MAX_TIMESTAMP) == "9999-12-31T23:59:59+00:00"
+
+
+def test_out_of_range_negative_time_is_a_400():
+    status, body = get_planets({"lat": "32.08", "lon": "34.78", "time": "-200000000000"})
+    assert status == 400
+    assert "time" in body["message"]
+
+
+@pytest.mark.parametrize("body", [
+    {"time": -2e11, "locations": [{"lat": 32.08, "lon": 34.78}]},
+    {"locations": [{"lat": 32.08, "lon": 34.78, "time": -2e11}]},
+])
+def test_out_of_range_negative_batch_time_is_a_400(body):
+    status, out = post_batch(body)
+    assert status == 400
+    assert "time" in out["message"]
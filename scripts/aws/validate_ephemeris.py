@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import math
+import sys
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+AWS_SCRIPTS_DIR = Path(__file__).resolve().parent
+LAMBDA_SRC_DIR = AWS_SCRIPTS_DIR / "lambdas"
+FIXTURES_DIR = AWS_SCRIPTS_DIR / "fixtures" / "visible_planets"
+UPSTREAM_URL = "https://api.visibleplanets.dev/v3"
+
+sys.path.insert(0, str(LAMBDA_SRC_DIR))
+
+FIXTURE_SITES = [
+    ("tel-aviv", 32.08, 34.78),
+    ("reykjavik", 64.15, -21.94),
+    ("quito", -0.18, -78.47),
+    ("santiago", -33.45, -70.67),
+    ("sydney", -33.87, 151.21),
+    ("mauna-kea", 19.82, -155.47),
+]
+# Times the committed reference fixtures were recorded at.
+FIXTURE_TIMES = ["2024-01-15T03:00:00Z", "2025-06-21T20:00:00Z", "2026-03-10T12:00:00Z"]
+
+# Every body in a fixture must match the engine within these bounds.
+# Azimuth error is scaled by cos(altitude), i.e. measured on the sky.
+ALTITUDE_TOLERANCE = 0.5  # degrees
+AZIMUTH_TOLERANCE = 1.0  # degrees
+MAGNITUDE_TOLERANCE = 0.5
+
+# Fixture sources: "upstream" responses are the contract the engine
+# replaces, so their entries must also have the engine's exact shape.
+# "pyephem" fixtures come from an independent ephemeris and only carry
+# the compared fields.
+UPSTREAM = "upstream"
+PYEPHEM = "pyephem"
+
+
+def parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+def fixture_path(source: str, name: str, when: datetime) -> Path:
+    prefix = "" if source == UPSTREAM else f"{source}-"
+    return FIXTURES_DIR / f"{prefix}{name}-{when.strftime('%Y%m%dT%H%M%SZ')}.json"
+
+
+def write_fixture(source: str, name: str, lat: float, lon: float, when: datetime, payload: dict) -> None:
+    fixture = {
+        "source": source,
+        "request": {"latitude": lat, "longitude": lon, "time": when.isoformat()},
+        "response": payload,
+    }
+    path = fixture_path(source, name, when)
+    path.write_text(json.dumps(fixture, indent=2) + "\n")
+    print(f"Recorded {path.relative_to(AWS_SCRIPTS_DIR)}")
+
+
+def record_upstream(when: datetime) -> None:
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    for name, lat, lon in FIXTURE_SITES:
+        query = urllib.parse.urlencode({
+            "latitude": lat,
+            "longitude": lon,
+            "time": when.isoformat().replace("+00:00", "Z"),
+        })
+        with urllib.request.urlopen(f"{UPSTREAM_URL}?{query}", timeout=10) as resp:
+            payload = json.loads(resp.read())
+        write_fixture(UPSTREAM, name, lat, lon, when, payload)
+
+
+def record_reference(when: datetime) -> None:
+    import ephem
+    import planet_ephemeris
+
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    for name, lat, lon in FIXTURE_SITES:
+        observer = ephem.Observer()
+        observer.lat = str(lat)
+        observer.lon = str(lon)
+        observer.elevation = 0
+        # Geometric altitudes, like the engine: no atmospheric refraction.
+        observer.pressure = 0
+        observer.date = when.replace(tzinfo=None)
+        data = []
+        for body_name in planet_ephemeris.BODIES:
+            body = getattr(ephem, body_name)(observer)
+            altitude = math.degrees(float(body.alt))
+            data.append({
+                "name": body_name,
+                "altitude": round(altitude, 3),
+                "azimuth": round(math.degrees(float(body.az)), 3),
+                "magnitude": round(float(body.mag), 2),
+                "aboveHorizon": altitude > 0.0,
+            })
+        payload = {"meta": {"time": when.isoformat(), "engine": f"pyephem {ephem.__version__}"}, "data": data}
+        write_fixture(PYEPHEM, name, lat, lon, when, payload)
+
+
+def shape(value):
+    """Key structure of a JSON value, ignoring the values themselves."""
+    if isinstance(value, dict):
+        return {key: shape(member) for key, member in value.items()}
+    return type(value).__name__ if isinstance(value, (bool, str)) else "number" if value is not None else "null"
+
+
+def load_fixtures() -> list[tuple[str, dict]]:
+    return [(path.stem, json.loads(path.read_text())) for path in sorted(FIXTURES_DIR.glob("*.json"))]
+
+
+def check_fixture(fixture: dict) -> list[str]:
+    """Every mismatch between the engine and one fixture; empty when it passes."""
+    import planet_ephemeris
+
+    req = fixture["request"]
+    response = fixture["response"]
+    when = parse_time((response.get("meta") or {}).get("time") or req["time"])
+    local = {
+        entry["name"]: entry
+        for entry in planet_ephemeris.visible_planets(
+            when.timestamp(), req["latitude"], req["longitude"], above_horizon_only=False
+        )
+    }
+
+    failures = []
+    expected_names = set()
+    for expected in response.get("data", []):
+        name = expected.get("name")
+        expected_names.add(name)
+        actual = local.get(name)
+        if actual is None:
+            failures.append(f"{name}: missing from the engine")
+            continue
+        d_alt = abs(actual["altitude"] - expected["altitude"])
+        d_az = abs((actual["azimuth"] - expected["azimuth"] + 180.0) % 360.0 - 180.0)
+        d_az *= math.cos(math.radians(expected["altitude"]))
+        d_mag = abs(actual["magnitude"] - expected["magnitude"]) if "magnitude" in expected else 0.0
+        if d_alt > ALTITUDE_TOLERANCE:
+            failures.append(f"{name}: altitude off by {d_alt:.3f} deg")
+        if d_az > AZIMUTH_TOLERANCE:
+            failures.append(f"{name}: azimuth off by {d_az:.3f} deg")
+        if d_mag > MAGNITUDE_TOLERANCE:
+            failures.append(f"{name}: magnitude off by {d_mag:.2f}")
+        if fixture.get("source") == UPSTREAM and shape(actual) != shape(expected):
+            failures.append(f"{name}: entry shape differs from upstream")
+
+    if fixture.get("source") == UPSTREAM:
+        # Upstream lists only bodies above the horizon; so must the engine.
+        for name, entry in local.items():
+            if entry["aboveHorizon"] and name not in expected_names and entry["altitude"] > ALTITUDE_TOLERANCE:
+                failures.append(f"{name}: above the horizon locally but missing upstream")
+    return failures
+
+
+def check() -> int:
+    fixtures = load_fixtures()
+    if not fixtures:
+        print(f"No fixtures in {FIXTURES_DIR}. Run with --record first.")
+        return 1
+
+    failed = 0
+    sources = {}
+    for stem, fixture in fixtures:
+        sources[fixture.get("source", UPSTREAM)] = sources.get(fixture.get("source", UPSTREAM), 0) + 1
+        failures = check_fixture(fixture)
+        failed += bool(failures)
+        print(f"{'ok  ' if not failures else 'FAIL'} {stem}")
+        for failure in failures:
+            print(f"     {failure}")
+
+    summary = ", ".join(f"{count} {source}" for source, count in sorted(sources.items()))
+    print(f"{len(fixtures)} fixtures checked ({summary}), {failed} failed")
+    if UPSTREAM not in sources:
+        print("No upstream fixtures: the response shape has not been checked. Run with --record.")
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate the local planet ephemeris against recorded fixtures.")
+    parser.add_argument("--record", action="store_true", help="record new fixtures from the upstream API")
+    parser.add_argument(
+        "--record-reference", action="store_true",
+        help="record reference fixtures at FIXTURE_TIMES from PyEphem (pip install ephem)",
+    )
+    parser.add_argument("--time", help="ISO timestamp to record upstream at (default: now)")
+    args = parser.parse_args()
+
+    if args.record:
+        record_upstream(parse_time(args.time) if args.time else datetime.now(timezone.utc).replace(microsecond=0))
+        return 0
+    if args.record_reference:
+        for value in FIXTURE_TIMES:
+            record_reference(parse_time(value))
+        return 0
+    return check()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 const AWS_ENDPOINTS = {
   visiblePlanets: import.meta.env.VITE_VISIBLE_PLANETS_URL,
   darkSpots: import.meta.env.VITE_DARK_SPOTS_URL,
+  recommendationsSnapshot: import.meta.env.VITE_RECOMMENDATIONS_SNAPSHOT_URL,
 };
 
 const normalizeBaseUrl = (value) => {
@@ -71,12 +72,21 @@ export const buildDarkSpotsUrl = (lat, lon, searchDistance) =>
 export const buildFavoritesUrl = () =>
   resolveApiBase(FAVORITES_API_BASE, "VITE_FAVORITES_API_BASE") + "/favorites";
 
+export const buildFavoritesListUrl = (params = {}) =>
+  joinQuery(buildFavoritesUrl(), params);
+
 export const buildRecommendationsUrl = () =>
   resolveApiBase(
     RECOMMENDATIONS_API_BASE,
     "VITE_RECOMMENDATIONS_API_BASE"
   ) + "/recommendations";
 
+export const getRecommendationsSnapshotUrl = () =>
+  AWS_ENDPOINTS.recommendationsSnapshot || "";
+
+export const buildRecommendationsListUrl = (params = {}) =>
+  joinQuery(buildRecommendationsUrl(), params);
+
 export const getLightmapTileUrlTemplate = () =>
   LIGHTMAP_API_BASE
     ? `${LIGHTMAP_API_BASE}/lightmap/{z}/{x}/{y}.png`
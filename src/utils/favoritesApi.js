@@ -1,4 +1,7 @@
-import { buildFavoritesUrl } from "./awsEndpoints";
+import { buildFavoritesListUrl, buildFavoritesUrl } from "./awsEndpoints";
+
+// The API caps one all=true response; follow nextToken a bounded number of times.
+const MAX_FAVORITE_PAGES = 20;
 
 const parseCoord = (value) => {
   const parsed = Number(value);
@@ -95,30 +98,41 @@ export async function deleteFavoriteSpot({ lat, lon, spotId, idToken }) {
 export async function fetchFavoriteSpots({ idToken }) {
   if (!idToken) return [];
 
-  const response = await fetch(buildFavoritesUrl(), {
-    headers: {
-      Authorization: `Bearer ${idToken}`,
-      Accept: "application/json",
-    },
-  });
-
-  if (!response.ok) {
-    const message = await response.text().catch(() => "");
-    throw new Error(
-      message
-        ? `Favorite API error: ${message}`
-        : `Favorite API error: ${response.status}`
+  const items = [];
+  let nextToken;
+  for (let page = 0; page < MAX_FAVORITE_PAGES; page += 1) {
+    const response = await fetch(
+      buildFavoritesListUrl({ view: "map", all: "true", nextToken }),
+      {
+        headers: {
+          Authorization: `Bearer ${idToken}`,
+          Accept: "application/json",
+        },
+      }
     );
-  }
 
-  const data = await response.json().catch(() => null);
-  const items = Array.isArray(data)
-    ? data
-    : Array.isArray(data?.items)
-    ? data.items
-    : Array.isArray(data?.Items)
-    ? data.Items
-    : [];
+    if (!response.ok) {
+      const message = await response.text().catch(() => "");
+      throw new Error(
+        message
+          ? `Favorite API error: ${message}`
+          : `Favorite API error: ${response.status}`
+      );
+    }
+
+    const data = await response.json().catch(() => null);
+    const pageItems = Array.isArray(data)
+      ? data
+      : Array.isArray(data?.items)
+      ? data.items
+      : Array.isArray(data?.Items)
+      ? data.Items
+      : [];
+    items.push(...pageItems);
+
+    nextToken = data?.nextToken;
+    if (!nextToken) break;
+  }
 
   return items.map(normalizeFavoriteItem).filter(Boolean);
 }
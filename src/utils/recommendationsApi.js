@@ -1,4 +1,8 @@
-import { buildRecommendationsUrl } from "./awsEndpoints";
+import {
+  buildRecommendationsListUrl,
+  buildRecommendationsUrl,
+  getRecommendationsSnapshotUrl,
+} from "./awsEndpoints";
 
 const normalizeString = (value) =>
   typeof value === "string" ? value.trim() : "";
@@ -64,29 +68,138 @@ export async function saveRecommendation({ location, idToken }) {
   return data ?? payload;
 }
 
+const extractItems = (data) => {
+  if (Array.isArray(data)) return data;
+  if (Array.isArray(data?.items)) return data.items;
+  if (Array.isArray(data?.Items)) return data.Items;
+  if (Array.isArray(data?.recommendations)) return data.recommendations;
+  return [];
+};
+
+const SYNC_STORAGE_KEY = "vela:recommendations:sync";
+
+const spotKey = (item) => item?.spotId ?? item?.id;
+
+const loadSyncState = () => {
+  if (typeof window === "undefined") return null;
+  try {
+    const parsed = JSON.parse(localStorage.getItem(SYNC_STORAGE_KEY));
+    if (typeof parsed?.cursor === "string" && Array.isArray(parsed?.items)) {
+      return parsed;
+    }
+  } catch {
+    // Corrupt or unavailable storage; fall back to a full load
+  }
+  return null;
+};
+
+const saveSyncState = (cursor, items) => {
+  if (typeof window === "undefined") return;
+  try {
+    if (cursor) {
+      localStorage.setItem(SYNC_STORAGE_KEY, JSON.stringify({ cursor, items }));
+    } else {
+      localStorage.removeItem(SYNC_STORAGE_KEY);
+    }
+  } catch {
+    // Storage full or unavailable; the next session does a full load
+  }
+};
+
+// Applies GET /recommendations?since= changes to the cached list. Any
+// failure (including 410 for an expired cursor) means a full reload.
+const syncRecommendations = async (cached, headers) => {
+  try {
+    const response = await fetch(
+      buildRecommendationsListUrl({ since: cached.cursor, view: "full" }),
+      { headers }
+    );
+    if (!response.ok) return null;
+    const data = await response.json();
+    if (!Array.isArray(data?.items) || !Array.isArray(data?.deleted)) {
+      return null;
+    }
+
+    const byId = new Map(cached.items.map((item) => [spotKey(item), item]));
+    data.deleted.forEach((spotId) => byId.delete(spotId));
+    data.items.forEach((item) => byId.set(spotKey(item), item));
+    return { items: [...byId.values()], cursor: data.cursor };
+  } catch {
+    return null;
+  }
+};
+
+// The published snapshot is a CDN hit; any problem with it (not deployed
+// yet, stale pointer, local dev) falls back to the API.
+const fetchRecommendationsSnapshot = async () => {
+  const pointerUrl = getRecommendationsSnapshotUrl();
+  if (!pointerUrl) return null;
+
+  try {
+    const pointerResponse = await fetch(pointerUrl, {
+      headers: { Accept: "application/json" },
+    });
+    if (!pointerResponse.ok) return null;
+    const pointer = await pointerResponse.json();
+    const path = pointer?.br ?? pointer?.gzip;
+    if (typeof path !== "string" || !pointer?.hash) return null;
+
+    const snapshotResponse = await fetch(new URL(path, pointerUrl), {
+      headers: { Accept: "application/json" },
+    });
+    if (!snapshotResponse.ok) return null;
+    const data = await snapshotResponse.json();
+    return Array.isArray(data?.items)
+      ? { items: data.items, cursor: pointer.cursor }
+      : null;
+  } catch {
+    return null;
+  }
+};
+
+const fetchAllRecommendations = async (headers) => {
+  const items = [];
+  let nextToken;
+  let cursor;
+
+  do {
+    const response = await fetch(
+      buildRecommendationsListUrl({ all: true, view: "full", nextToken }),
+      { headers }
+    );
+
+    if (!response.ok) {
+      const message = await response.text().catch(() => "");
+      throw new Error(
+        message
+          ? `Recommendations API error: ${message}`
+          : `Recommendations API error: ${response.status}`
+      );
+    }
+
+    const data = await response.json().catch(() => null);
+    items.push(...extractItems(data));
+    nextToken = data?.nextToken;
+    cursor = data?.cursor;
+  } while (nextToken);
+
+  return { items, cursor };
+};
+
 export async function fetchRecommendations({ idToken } = {}) {
   const headers = { Accept: "application/json" };
   if (idToken) {
     headers.Authorization = `Bearer ${idToken}`;
   }
 
-  const response = await fetch(buildRecommendationsUrl(), { headers });
-
-  if (!response.ok) {
-    const message = await response.text().catch(() => "");
-    throw new Error(
-      message
-        ? `Recommendations API error: ${message}`
-        : `Recommendations API error: ${response.status}`
-    );
-  }
+  const cached = loadSyncState();
+  const result =
+    (cached && (await syncRecommendations(cached, headers))) ??
+    (await fetchRecommendationsSnapshot()) ??
+    (await fetchAllRecommendations(headers));
 
-  const data = await response.json().catch(() => null);
-  if (Array.isArray(data)) return data;
-  if (Array.isArray(data?.items)) return data.items;
-  if (Array.isArray(data?.Items)) return data.Items;
-  if (Array.isArray(data?.recommendations)) return data.recommendations;
-  return [];
+  saveSyncState(result.cursor, result.items);
+  return result.items;
 }
 
 export async function deleteRecommendation({ spotId, idToken }) {